@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Measure the cold-start time of each uwtools CLI, failing if any exceeds its budget.
+
+Each CLI is run with --help in a fresh interpreter, so the time is dominated by imports. The time
+reported is the best of several runs, less the time to start a bare interpreter.
+
+Usage: cli_startup.py [--budget SECONDS] [--repeat N]
+"""
+
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+
+CLIS = [
+    "atparse_to_jinja2",
+    "experiment_manager",
+    "run_forecast",
+    "set_config",
+    "store_gc",
+    "templater",
+    "validate_config",
+]
+
+
+def best_time(code: str, repeat: int) -> float:
+    """
+    The shortest wall-clock time, in seconds, to run Python code in a fresh interpreter.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], capture_output=True, check=False)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    """
+    Time each CLI and compare against the budget.
+    """
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget", default=0.1, type=float, help="Seconds allowed per CLI")
+    parser.add_argument("--repeat", default=5, type=int, help="Runs per CLI")
+    args = parser.parse_args()
+    baseline = best_time("pass", args.repeat)
+    print(f"{'interpreter':>20s}: {baseline:.3f}s")
+    over = []
+    for cli in CLIS:
+        code = f"import sys; sys.argv = ['{cli}', '--help']\nfrom uwtools.cli.{cli} import main\n"
+        code += "try:\n    main()\nexcept SystemExit:\n    pass"
+        elapsed = best_time(code, args.repeat) - baseline
+        status = "OK" if elapsed <= args.budget else "OVER BUDGET"
+        print(f"{cli:>20s}: {elapsed:.3f}s {status}")
+        if elapsed > args.budget:
+            over.append(cli)
+    if over:
+        sys.exit(f"Startup time over {args.budget:.3f}s budget: {', '.join(over)}")
+
+
+if __name__ == "__main__":
+    main()
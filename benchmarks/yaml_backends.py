@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Compare YAMLConfig load and dump times using the pure-Python and libyaml PyYAML backends.
+
+Usage: yaml_backends.py [SIZE_MB]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import yaml
+
+from uwtools import config
+
+
+def make_config(path: Path, size_mb: float) -> None:
+    """
+    Write a synthetic experiment-like YAML config of roughly the given size.
+    """
+    i = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while f.tell() < size_mb * 1000 * 1000:
+            cfg = {
+                f"task_{i}": {
+                    "account": "user_account",
+                    "cores": i % 128,
+                    "walltime": "00:30:00",
+                    "envvars": {f"VAR_{j}": f"value_{i}_{j}" for j in range(10)},
+                    "files": [f"/path/to/file_{i}_{j}.nc" for j in range(10)],
+                    "ratio": i / 7,
+                    "enabled": bool(i % 2),
+                }
+            }
+            yaml.dump(cfg, f, sort_keys=False)
+            i += 1
+
+
+def main() -> None:
+    """
+    Time loading and dumping with each backend.
+    """
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with tempfile.TemporaryDirectory() as tmp:
+        infile = Path(tmp, "in.yaml")
+        make_config(infile, size_mb)
+        outfile = str(Path(tmp, "out.yaml"))
+        backends = {
+            "python": (yaml.SafeLoader, yaml.SafeDumper),
+            "libyaml": (config.SafeLoader, config.SafeDumper),
+        }
+        print(f"{infile.stat().st_size / 1e6:.1f} MB config")
+        for name, (loader, dumper) in backends.items():
+            with patch.multiple(config, SafeLoader=loader, SafeDumper=dumper):
+                start = time.perf_counter()
+                cfgobj = config.YAMLConfig(str(infile))
+                load = time.perf_counter() - start
+                start = time.perf_counter()
+                cfgobj.dump_file(outfile)
+                dump = time.perf_counter() - start
+            print(f"{name:>8}: load {load:6.2f}s  dump {dump:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,7 @@ cli() {
       experiment-manager
       run-forecast
       set-config
+      store-gc
       template
       validate-config
     )
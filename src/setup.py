@@ -31,6 +31,7 @@ setup(
             "experiment-manager = %s.cli.experiment_manager:main" % name_py,
             "run-forecast = %s.cli.run_forecast:main" % name_py,
             "set-config = %s.cli.set_config:main" % name_py,
+            "store-gc = %s.cli.store_gc:main" % name_py,
             "template = %s.cli.templater:main" % name_py,
             "validate-config = %s.cli.validate_config:main" % name_py,
         ]
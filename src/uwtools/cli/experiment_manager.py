@@ -8,8 +8,10 @@ import sys
 from argparse import HelpFormatter, Namespace
 from typing import List
 
-from uwtools.drivers import experiment
 from uwtools.utils import cli_helpers
+from uwtools.utils.imports import lazy_import
+
+experiment = lazy_import("uwtools.drivers.experiment")
 
 
 def main() -> None:
@@ -7,8 +7,10 @@ import sys
 from argparse import ArgumentParser, HelpFormatter, Namespace
 from typing import List
 
-from uwtools.drivers import forecast
 from uwtools.utils import cli_helpers
+from uwtools.utils.imports import lazy_import
+
+forecast = lazy_import("uwtools.drivers.forecast")
 
 
 def main() -> None:
@@ -7,9 +7,14 @@ import sys
 from argparse import ArgumentError, ArgumentParser, HelpFormatter, Namespace
 from typing import List
 
-from uwtools import config
+from uwtools.config_cache import DEFAULT_CACHE_SIZE
 from uwtools.exceptions import UWConfigError
 from uwtools.utils import cli_helpers
+from uwtools.utils.imports import lazy_import
+from uwtools.utils.memory import MAP
+
+config = lazy_import("uwtools.config")
+config_batch = lazy_import("uwtools.config_batch")
 
 
 def main() -> None:
@@ -24,8 +29,21 @@ def main() -> None:
         verbose=args.verbose,
     )
     try:
+        if args.manifest:
+            results = config_batch.run(
+                config_batch.load_manifest(args.manifest),
+                log=log,
+                jobs=args.jobs,
+                cache_dir=args.cache_dir,
+                cache_size=args.cache_size * MAP["MB"],
+            )
+            if not config_batch.report(results, log):
+                sys.exit("Set config failure: not all manifest entries succeeded")
+            return
         config.create_config_obj(
             input_base_file=args.input_base_file,
+            cache_dir=args.cache_dir,
+            cache_size=args.cache_size * MAP["MB"],
             compare=args.compare,
             config_file=args.config_file,
             config_file_type=args.config_file_type,
@@ -56,11 +74,18 @@ def parse_args(args: List[str]) -> Namespace:
         formatter_class=lambda prog: HelpFormatter(prog, max_help_position=8),
     )
     required = parser.add_argument_group("required arguments")
-    required.add_argument(
+    inputs = required.add_mutually_exclusive_group(required=True)
+    inputs.add_argument(
         "-i",
         "--input-base-file",
         help="Path to a YAML, bash/ini, or namelist config base file",
-        required=True,
+        type=cli_helpers.path_if_file_exists,
+    )
+    inputs.add_argument(
+        "-m",
+        "--manifest",
+        help="Path to a YAML or JSON manifest listing many files to process",
+        metavar="FILE",
         type=cli_helpers.path_if_file_exists,
     )
     optional = parser.add_argument_group("optional arguments")
@@ -77,6 +102,13 @@ def parse_args(args: List[str]) -> Namespace:
         action="store_true",
         help="Print rendered config file to stdout only.",
     )
+    optional.add_argument(
+        "-j",
+        "--jobs",
+        help="Number of processes to use with --manifest (default: one per CPU).",
+        metavar="N",
+        type=int,
+    )
     optional.add_argument(
         "-l",
         "--log-file",
@@ -105,6 +137,18 @@ def parse_args(args: List[str]) -> Namespace:
         action="store_true",
         help="Print all logging messages.",
     )
+    optional.add_argument(
+        "--cache-dir",
+        help="Path to a directory in which to cache results, to reuse when inputs are unchanged.",
+        metavar="DIR",
+    )
+    optional.add_argument(
+        "--cache-size",
+        default=DEFAULT_CACHE_SIZE // MAP["MB"],
+        help="Maximum size of the result cache, in MB.",
+        metavar="MB",
+        type=int,
+    )
     optional.add_argument(
         "--compare",
         action="store_true",
@@ -148,6 +192,11 @@ def parse_args(args: List[str]) -> Namespace:
     if parsed.quiet and parsed.dry_run:
         raise ArgumentError(None, "Specifying --quiet will suppress --dry-run output")
 
+    per_file = ["compare", "config_file", "config_file_type", "dry_run", "input_file_type"]
+    per_file += ["outfile", "output_file_type", "show_format", "values_needed"]
+    if parsed.manifest and any(getattr(parsed, opt) for opt in per_file):
+        raise ArgumentError(None, "Option --manifest cannot be combined with per-file options")
+
     # Return validated arguments.
 
     return parsed
@@ -0,0 +1,78 @@
+# pylint: disable=duplicate-code
+"""
+CLI for garbage-collecting a shared store of staged files.
+"""
+
+import sys
+from argparse import ArgumentParser, HelpFormatter, Namespace
+from pathlib import Path
+from typing import List
+
+from uwtools.utils import cli_helpers
+from uwtools.utils.imports import lazy_import
+
+store = lazy_import("uwtools.files.store")
+
+
+def main() -> None:
+    """
+    Main entry point.
+    """
+    args = parse_args(sys.argv[1:])
+    name = "store-gc"
+    log = cli_helpers.setup_logging(
+        log_file=args.log_file, log_name=name, quiet=args.quiet, verbose=args.verbose
+    )
+    result = store.Store(Path(args.store)).gc(dry_run=args.dry_run)
+    verb = "Would remove" if args.dry_run else "Removed"
+    msg = f"{verb} {result.objects} stored files ({result.size} bytes)"
+    log.info(msg)
+    msg = f"{verb} {result.refs} references to files no longer staged"
+    log.info(msg)
+
+
+def parse_args(args: List[str]) -> Namespace:
+    """
+    Parse CLI arguments.
+    """
+    args = args or ["--help"]
+    parser = ArgumentParser(
+        description="Remove stored files that no staged file refers to.",
+        formatter_class=lambda prog: HelpFormatter(prog, max_help_position=8),
+    )
+    required = parser.add_argument_group("required arguments")
+    required.add_argument(
+        "-s",
+        "--store",
+        help="Path to the store directory",
+        metavar="DIR",
+        required=True,
+        type=cli_helpers.path_if_file_exists,
+    )
+    optional = parser.add_argument_group("optional arguments")
+    optional.add_argument(
+        "-d",
+        "--dry-run",
+        action="store_true",
+        help="Report what would be removed, but remove nothing.",
+    )
+    optional.add_argument(
+        "-l",
+        "--log-file",
+        default="/dev/null",
+        help="Log to this file.",
+        metavar="FILE",
+    )
+    optional.add_argument(
+        "-q",
+        "--quiet",
+        action="store_true",
+        help="Print no log messages.",
+    )
+    optional.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="Print all log messages.",
+    )
+    return parser.parse_args(args)
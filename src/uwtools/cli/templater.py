@@ -9,7 +9,10 @@ import sys
 from argparse import ArgumentError, ArgumentParser, HelpFormatter, Namespace
 from typing import List
 
-from uwtools.utils import cli_helpers, templater
+from uwtools.utils import cli_helpers
+from uwtools.utils.imports import lazy_import
+
+templater = lazy_import("uwtools.utils.templater")
 
 
 def main() -> None:
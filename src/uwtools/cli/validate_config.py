@@ -7,8 +7,10 @@ import sys
 from argparse import HelpFormatter, Namespace
 from typing import List
 
-from uwtools.config_validator import config_is_valid
 from uwtools.utils import cli_helpers
+from uwtools.utils.imports import lazy_import
+
+config_validator = lazy_import("uwtools.config_validator")
 
 
 def main() -> None:
@@ -20,7 +22,7 @@ def main() -> None:
     log = cli_helpers.setup_logging(
         log_file=args.log_file, log_name=name, quiet=args.quiet, verbose=args.verbose
     )
-    valid = config_is_valid(
+    valid = config_validator.config_is_valid(
         config_file=args.config_file, validation_schema=args.validation_schema, log=log
     )
     sys.exit(0 if valid else 1)
@@ -1,30 +1,45 @@
+# pylint: disable=too-many-lines
 """
 The abstract Config class and its format-specific subclasses.
 """
 from __future__ import annotations
 
 import configparser
-import copy
 import inspect
 import json
 import logging
 import os
 import re
 import sys
+import threading
 from abc import ABC, abstractmethod
-from collections import OrderedDict, UserDict
+from collections import ChainMap, OrderedDict, UserDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import MappingProxyType
 from types import SimpleNamespace as ns
-from typing import List, Optional, Union
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Union
 
 import f90nml
 import jinja2
 import yaml
 
-from uwtools import exceptions, logger
-from uwtools.j2template import J2Template
+from uwtools import config_includes, exceptions, logger
+from uwtools.config_cache import DEFAULT_CACHE_SIZE, ConfigCache
+from uwtools.config_graph import ConfigGraph, KeyPath, fragments, is_template, keypath_str
+from uwtools.j2template import J2Template, template_cache_info
 from uwtools.logger import Logger
 from uwtools.utils import cli_helpers
 
+# Use the libyaml-backed loader and dumper, which are much faster, when PyYAML was built with them.
+try:
+    from yaml import CSafeDumper as SafeDumper
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # pragma: no cover
+    from yaml import SafeDumper, SafeLoader  # type: ignore
+
+INCLUDE_PREFETCH_WORKERS = 8
+
 msgs = ns(
     unhashable="""
 ERROR:
@@ -68,14 +83,46 @@ class Config(ABC, UserDict):
         super().__init__()
         self.config_path = config_path
         self.log = logging.getLogger(log_name)
+        self._graph: Optional[ConfigGraph] = None
+        self._updated: List[KeyPath] = []
+        self.includes: List[str] = []
+        self._local = threading.local()
         self.update(self._load(self.config_path))
 
+    def __delitem__(self, key) -> None:
+        """
+        Delete a top-level key, noting the change for the next dereference_all().
+        """
+        super().__delitem__(key)
+        self._updated.append((key,))
+
+    def __getstate__(self) -> dict:
+        """
+        The state to copy or pickle, which excludes the per-thread loading state.
+        """
+        state = self.__dict__.copy()
+        del state["_local"]
+        return state
+
     def __repr__(self) -> str:
         """
         The string representation of a Config object.
         """
         return json.dumps(self.data)
 
+    def __setitem__(self, key, item) -> None:
+        """
+        Set a top-level key, noting the change for the next dereference_all().
+        """
+        super().__setitem__(key, item)
+        self._updated.append((key,))
+
+    def __setstate__(self, state: dict) -> None:
+        """
+        Restore copied or pickled state.
+        """
+        self.__dict__.update(state, _local=threading.local())
+
     # Private methods
 
     @abstractmethod
@@ -94,13 +141,210 @@ class Config(ABC, UserDict):
 
         :param filepaths: Paths to the config files to read and merge.
         """
+        self._prefetch(filepaths)
         cfg = {}
         for filepath in filepaths:
-            if not os.path.isabs(filepath):
-                filepath = os.path.join(os.path.dirname(self.config_path), filepath)
-            cfg.update(self._load(config_path=filepath))
+            cfg.update(self._load_include(self._include_path(filepath)))
+        return cfg
+
+    def _load_include(self, filepath: str) -> dict:
+        """
+        Load an included config file, reusing an earlier parse of it if no file it draws on changed.
+
+        :param filepath: Path to the included file.
+        :raises: UWConfigError if the file includes itself, directly or indirectly.
+        """
+        path = os.path.abspath(filepath)
+        including = self._including
+        if path in including:
+            cycle = including[including.index(path) :] + [path]
+            msg = "Include cycle: %s" % " -> ".join(cycle)
+            self.log.error(msg)
+            raise exceptions.UWConfigError(msg)
+        key = (type(self), path, os.path.dirname(os.path.abspath(self.config_path)))
+        entry = config_includes.cache_get(key, including)
+        if entry is None:
+            # Collect the files this one includes in turn, apart from those of any outer file.
+            outer = getattr(self._local, "files", self.includes)
+            self._local.files = []
+            signature = config_includes.signature(path)
+            including.append(path)
+            try:
+                cfg = self._load(config_path=filepath)
+                nested = self._local.files
+            finally:
+                including.pop()
+                self._local.files = outer
+            files = [(path, signature)] + [(f, config_includes.signature(f)) for f in nested]
+            config_includes.cache_put(key, cfg, files)
+        else:
+            cfg, files = entry
+        getattr(self._local, "files", self.includes).extend(f for f, _ in files)
         return cfg
 
+    @property
+    def _including(self) -> List[str]:
+        """
+        The files being loaded by the current thread, outermost first.
+        """
+        if not hasattr(self._local, "including"):
+            self._local.including = [os.path.abspath(self.config_path)]
+        return self._local.including
+
+    def _include_path(self, filepath: str) -> str:
+        """
+        The path to an included file, which is relative to the config file's directory if not
+        absolute.
+
+        :param filepath: The path given in the !INCLUDE tag.
+        """
+        if not os.path.isabs(filepath):
+            filepath = os.path.join(os.path.dirname(self.config_path), filepath)
+        return filepath
+
+    @staticmethod
+    def _include_filepaths(value: str) -> List[str]:
+        """
+        The paths in an !INCLUDE directive in an INI or Fortran namelist config value.
+
+        :param value: The config value.
+        """
+        return value.lstrip("!INCLUDE [").rstrip("]").split(",")
+
+    def _include_targets(self, ref_dict: dict) -> Iterator[str]:
+        """
+        The paths in all !INCLUDE directives in an INI or Fortran namelist config.
+
+        :param ref_dict: The config, or a section of it.
+        """
+        for value in ref_dict.values():
+            if isinstance(value, dict):
+                yield from self._include_targets(value)
+            elif isinstance(value, str) and "!INCLUDE" in value:
+                yield from self._include_filepaths(value)
+
+    def _prefetch(self, filepaths: List[str]) -> None:
+        """
+        Load included files concurrently, so that they are cached when loaded in turn.
+
+        Reading files one after another is slow on parallel filesystems, so up to
+        INCLUDE_PREFETCH_WORKERS files are read and parsed at once. The results are merged in
+        their original order when the files are loaded in turn, so any errors are ignored here:
+        they are raised then.
+
+        :param filepaths: Paths to the included files.
+        """
+        if getattr(self._local, "prefetching", False):
+            return
+        paths = list(dict.fromkeys(self._include_path(filepath) for filepath in filepaths))
+        if len(paths) < 2:
+            return
+        including = list(self._including)
+
+        def load(path: str) -> None:
+            self._local.prefetching = True
+            self._local.including = list(including)
+            self._local.files = []
+            try:
+                self._load_include(path)
+            except Exception:  # pylint: disable=broad-exception-caught
+                pass
+
+        with ThreadPoolExecutor(max_workers=min(INCLUDE_PREFETCH_WORKERS, len(paths))) as pool:
+            list(pool.map(load, paths))
+
+    def _context(self, ref_dict: dict, full_dict: dict) -> Mapping:
+        """
+        A read-only view of the values available to templates in a section of the config.
+
+        Creating the context like this gives templates access to all the keys in the current
+        section without the need to reference the current section name, to the other sections with
+        dot values, and to environment variables. Top-level keys take precedence over section keys,
+        which take precedence over environment variables. Nothing is copied, so the view reflects
+        any values rendered since it was created.
+
+        :param ref_dict: The dictionary containing the values to render.
+        :param full_dict: Dictionary providing values to be used for rendering Jinja2 templates.
+        """
+        layers = [full_dict] if ref_dict is full_dict else [full_dict, ref_dict]
+        return MappingProxyType(ChainMap(*layers, os.environ))
+
+    def _render(self, key: str, val: Any, context: Mapping) -> Any:
+        """
+        Render a templated value, leaving in place any of its templates that cannot be rendered.
+
+        :param key: The key of the value to render.
+        :param val: The value to render.
+        :param context: The values available to the templates, see _context().
+        """
+        # Choosing sys._getframe() here because it's more efficient than other inspect methods.
+
+        func_name = f"{self.__class__.__name__}.{sys._getframe().f_code.co_name}"  # pylint: disable=protected-access
+
+        error_catcher = {}
+        # Find expressions first, and process them as a single template if they exist. Find
+        # individual double curly brace template in the string otherwise. We need one substitution
+        # template at a time so that we can opt to leave some un-filled when they are not yet set.
+        # For example, we can save cycle-dependent templates to fill in at run time.
+        templates = fragments(val)
+        data = []
+        for template in templates:
+            try:
+                j2tmpl = J2Template(
+                    configure_obj=context,
+                    template_str=template,
+                    loader_args={"undefined": jinja2.StrictUndefined},
+                )
+            except jinja2.exceptions.TemplateAssertionError as e:
+                msg = msgs.unregistered_filter.format(filter=repr(e).split()[-1][:-3], key=key)
+                self.log.exception(msg)
+                raise exceptions.UWConfigError(msg)
+            rendered = template
+            try:
+                # Fill in a template that has the appropriate variables set.
+                rendered = j2tmpl.render_template()
+            except jinja2.exceptions.UndefinedError:
+                # Leave a templated field as-is in the resulting dict.
+                error_catcher[template] = "UndefinedError"
+            except TypeError:
+                error_catcher[template] = "TypeError"
+            except ZeroDivisionError:
+                error_catcher[template] = "ZeroDivisionError"
+            except Exception as e:
+                # Fail on any other exception...something is probably wrong.
+                msg = f"{key}: {template}"
+                self.log.exception(msg)
+                raise e
+
+            data.append(rendered)
+            for tmpl, err in error_catcher.items():
+                msg = f"{func_name}: {tmpl} raised {err}"
+                self.log.debug(msg)
+
+        # Put the full template line back together as it was, filled or not, and make a guess on its
+        # intended type.
+        return self.str_to_type("".join(data))
+
+    def _update_values(self, src: dict, dst: dict, path: KeyPath) -> List[KeyPath]:
+        """
+        Recursively update a dictionary, returning the key paths of the values that were replaced.
+
+        :param src: The dictionary with new data to use.
+        :param dst: The dictionary to update with the new data.
+        :param path: The key path to the dictionary being updated.
+        """
+        replaced = []
+        templates = {} if self._graph is None else self._graph.templates
+        for key, new_val in src.items():
+            keypath = path + (key,)
+            if isinstance(new_val, dict) and isinstance(dst.get(key), dict):
+                replaced.extend(self._update_values(new_val, dst[key], keypath))
+                continue
+            if key not in dst or dst[key] != new_val or keypath in templates:
+                replaced.append(keypath)
+            dst[key] = new_val
+        return replaced
+
     # Public methods
 
     def compare_config(self, dict1: dict, dict2: Optional[dict] = None) -> None:
@@ -152,10 +396,7 @@ class Config(ABC, UserDict):
         """
         ref_dict = self.data if ref_dict is None else ref_dict
         full_dict = self.data if full_dict is None else full_dict
-
-        # Choosing sys._getframe() here because it's more efficient than other inspect methods.
-
-        func_name = f"{self.__class__.__name__}.{sys._getframe().f_code.co_name}"  # pylint: disable=protected-access
+        context = self._context(ref_dict, full_dict)
 
         for key, val in ref_dict.items():
             if isinstance(val, dict):
@@ -163,78 +404,44 @@ class Config(ABC, UserDict):
             else:
                 # Save a bit of compute and only do this part for strings that contain the jinja
                 # double brackets.
-                v_str = str(val)
-                is_a_template = any((ele for ele in ["{{", "{%"] if ele in v_str))
-                if is_a_template:
-                    error_catcher = {}
-                    # Find expressions first, and process them as a single template if they exist.
-                    # Find individual double curly brace template in the string otherwise. We need
-                    # one substitution template at a time so that we can opt to leave some un-filled
-                    # when they are not yet set. For example, we can save cycle-dependent templates
-                    # to fill in at run time.
-                    if "{%" in val:
-                        # Treat entire line as a single template.
-                        templates = [v_str]
-                    else:
-                        # Separate out all the double curly bracket pairs.
-                        templates = re.findall(r"{{[^}]*}}|\S", v_str)
-                    data = []
-                    for template in templates:
-                        # Creating the config object for the template like this, gives us access to
-                        # all the keys in the current section without the need to reference the
-                        # current section name, and to the other sections with dot values. Also make
-                        # environment variables available with env prefix.
-                        if ref_dict == full_dict:
-                            config_obj = {**os.environ, **full_dict}
-                        else:
-                            config_obj = {**os.environ, **ref_dict, **full_dict}
-                        try:
-                            j2tmpl = J2Template(
-                                configure_obj=config_obj,
-                                template_str=template,
-                                loader_args={"undefined": jinja2.StrictUndefined},
-                            )
-                        except jinja2.exceptions.TemplateAssertionError as e:
-                            msg = msgs.unregistered_filter.format(
-                                filter=repr(e).split()[-1][:-3], key=key
-                            )
-                            self.log.exception(msg)
-                            raise exceptions.UWConfigError(msg)
-                        rendered = template
-                        try:
-                            # Fill in a template that has the appropriate variables set.
-                            rendered = j2tmpl.render_template()
-                        except jinja2.exceptions.UndefinedError:
-                            # Leave a templated field as-is in the resulting dict.
-                            error_catcher[template] = "UndefinedError"
-                        except TypeError:
-                            error_catcher[template] = "TypeError"
-                        except ZeroDivisionError:
-                            error_catcher[template] = "ZeroDivisionError"
-                        except Exception as e:
-                            # Fail on any other exception...something is probably wrong.
-                            msg = f"{key}: {template}"
-                            self.log.exception(msg)
-                            raise e
-
-                        data.append(rendered)
-                        for tmpl, err in error_catcher.items():
-                            msg = f"{func_name}: {tmpl} raised {err}"
-                            self.log.debug(msg)
-
-                    # Put the full template line back together as it was, filled or not, and make a
-                    # guess on its intended type.
-                    ref_dict[key] = self.str_to_type("".join(data))
+                if is_template(val):
+                    ref_dict[key] = self._render(key, val, context)
 
     def dereference_all(self) -> None:
         """
-        Dereference iteratively until no Jinja2 templates remain.
+        Dereference until no Jinja2 templates remain, other than those that cannot be rendered.
+
+        Each templated value is rendered once, after the values it refers to. Values that refer to
+        each other in a cycle are left as-is, and reported along with the chain of references, as
+        are values that refer to undefined variables.
+
+        The original templates are remembered. When called again after update_values(), only the
+        updated values, and the values rendered from them, are rendered again from their original
+        templates. Changes made to nested sections other than by update_values() are not detected.
         """
-        prev = copy.deepcopy(self.data)
-        self.dereference()
-        while prev != self.data:
-            self.dereference()
-            prev = copy.deepcopy(self.data)
+        if self._graph is None or self._graph.data is not self.data:
+            self._graph = ConfigGraph(self.data)
+        else:
+            self._graph.update(self._updated)
+        self._updated = []
+        graph = self._graph
+        for cycle in graph.cycles:
+            msg = "Reference cycle: %s" % " -> ".join(keypath_str(path) for path in cycle)
+            self.log.warning(msg)
+        contexts: Dict[int, Mapping] = {}
+
+        def render(key: str, val: Any, section: dict) -> Any:
+            if id(section) not in contexts:
+                contexts[id(section)] = self._context(section, self.data)
+            return self._render(key, val, contexts[id(section)])
+
+        graph.render(render)
+        for chain in graph.unresolved.values():
+            msg = "Unresolved reference: %s" % " -> ".join(chain)
+            self.log.debug(msg)
+        cache = template_cache_info()
+        msg = f"Template cache: {cache.hits} hits, {cache.misses} misses, {cache.currsize} entries"
+        self.log.debug(msg)
 
     def dictionary_depth(self, config_dict: dict) -> int:
         """
@@ -326,15 +533,26 @@ class Config(ABC, UserDict):
         """
         if ref_dict is None:
             ref_dict = self.data
-        for key, value in copy.deepcopy(ref_dict).items():
+            self._prefetch(list(self._include_targets(ref_dict)))
+        # Iterate over a snapshot of the items, as included values are merged in along the way.
+        for key, value in list(ref_dict.items()):
             if isinstance(value, dict):
                 self.parse_include(ref_dict[key])
             elif isinstance(value, str) and "!INCLUDE" in value:
-                filepaths = value.lstrip("!INCLUDE [").rstrip("]").split(",")
+                filepaths = self._include_filepaths(value)
                 # Update the dictionary with the values in the included file.
                 self.update_values(self._load_paths(filepaths))
                 del ref_dict[key]
 
+    def referenced_environment(self) -> Dict[str, Optional[str]]:
+        """
+        The values of the environment variables referred to by Jinja2 templates in the config.
+
+        Variables that are not set are included, with value None.
+        """
+        graph = ConfigGraph(self.data) if self._graph is None else self._graph
+        return {name: os.environ.get(name) for name in sorted(graph.external_names())}
+
     @logger.verbose()
     def str_to_type(self, s: str) -> Union[bool, float, int, str]:
         """
@@ -373,15 +591,10 @@ class Config(ABC, UserDict):
         :param dst: The Config to update with the new data.
         """
         srcdict = src.data if isinstance(src, Config) else src
-        dstcfg = self if dst is None else dst
-        for key, new_val in srcdict.items():
-            if isinstance(new_val, dict):
-                if isinstance(dstcfg.get(key), dict):
-                    self.update_values(new_val, dstcfg[key])
-                else:
-                    dstcfg[key] = new_val
-            else:
-                dstcfg[key] = new_val
+        if dst is None:
+            self._updated.extend(self._update_values(srcdict, self.data, ()))
+        else:
+            self._update_values(srcdict, dst, ())  # type: ignore
 
 
 class F90Config(Config):
@@ -522,7 +735,7 @@ class YAMLConfig(Config):
         """
         The string representation of a YAMLConfig object.
         """
-        return yaml.dump(self.data)
+        return yaml.dump(self.data, Dumper=SafeDumper)
 
     # Private methods
 
@@ -536,6 +749,10 @@ class YAMLConfig(Config):
         """
         loader = self._yaml_loader
         with open(config_path, "r", encoding="utf-8") as file_name:
+            # Start reading every file this one includes before parsing it.
+            targets = re.findall(r"!INCLUDE\s*\[([^\]]*)\]", file_name.read())
+            self._prefetch([path.strip(" '\"") for paths in targets for path in paths.split(",")])
+            file_name.seek(0)
             try:
                 cfg = yaml.load(file_name, Loader=loader)
             except yaml.constructor.ConstructorError as e:
@@ -564,11 +781,14 @@ class YAMLConfig(Config):
         return self._load_paths(filepaths)
 
     @property
-    def _yaml_loader(self) -> type[yaml.SafeLoader]:
+    def _yaml_loader(self) -> type[SafeLoader]:
         """
-        Set up the loader with the appropriate constructors.
+        Set up a loader with the appropriate constructors.
+
+        The loader is a subclass of SafeLoader private to this object, so that configs can be
+        loaded concurrently, each resolving !INCLUDE tags itself.
         """
-        loader = yaml.SafeLoader
+        loader: type[SafeLoader] = type("YAMLConfigLoader", (SafeLoader,), {})
         loader.add_constructor("!INCLUDE", self._yaml_include)
         return loader
 
@@ -592,7 +812,7 @@ class YAMLConfig(Config):
         :param opts: Other options required by a subclass.
         """
         with open(path, "w", encoding="utf-8") as file_name:
-            yaml.dump(cfg, file_name, sort_keys=False)
+            yaml.dump(cfg, file_name, Dumper=SafeDumper, sort_keys=False)
 
 
 class FieldTableConfig(YAMLConfig):
@@ -655,6 +875,9 @@ class FieldTableConfig(YAMLConfig):
 
 def create_config_obj(
     input_base_file: str,
+    base_config: Optional[Config] = None,
+    cache_dir: Optional[str] = None,
+    cache_size: int = DEFAULT_CACHE_SIZE,
     compare: bool = False,
     config_file: Optional[str] = None,
     config_file_type: Optional[str] = None,
@@ -683,13 +906,38 @@ def create_config_obj(
 
     infile_type = input_file_type or cli_helpers.get_file_type(input_base_file)
 
-    config_class = globals()[f"{infile_type}Config"]
-    config_obj = config_class(input_base_file, log_name=log.name)
+    # Reuse a cached output file, if one was created from identical inputs.
+
+    cache = None
+    if cache_dir and outfile and not (compare or dry_run or show_format or values_needed):
+        cache = ConfigCache(cache_dir, cache_size)
+        cache_key = cache.key(
+            files=[input_base_file, config_file],
+            options=[
+                infile_type,
+                config_file_type,
+                Path(config_file).suffix if config_file else None,
+                output_file_type,
+                Path(outfile).suffix,
+            ],
+        )
+        if cache.fetch(cache_key, outfile):
+            msg = f"Wrote cached result to {outfile}"
+            log.info(msg)
+            return
+
+    # A caller may supply input_base_file already loaded, to be updated in place.
+
+    config_obj = base_config
+    if config_obj is None:
+        config_obj = globals()[f"{infile_type}Config"](input_base_file, log_name=log.name)
+    includes = config_obj.includes
 
     if config_file:
         config_file_type = config_file_type or cli_helpers.get_file_type(config_file)
 
         user_config_obj = globals()[f"{config_file_type}Config"](config_file)
+        includes = includes + user_config_obj.includes
 
         if config_file_type != infile_type:
             config_depth = user_config_obj.dictionary_depth(user_config_obj.data)
@@ -752,3 +1000,5 @@ def create_config_obj(
                     raise ValueError(err_msg)
                 # Dump to file:
                 dump_method(path=outfile, cfg=config_obj)
+        if cache:
+            cache.store(cache_key, outfile, includes, config_obj.referenced_environment())
@@ -0,0 +1,170 @@
+"""
+Support for running many set_config conversions, listed in a manifest, in a single run.
+"""
+
+import copy
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import yaml
+
+from uwtools import config
+from uwtools.exceptions import UWConfigError
+from uwtools.logger import Logger
+from uwtools.utils import cli_helpers
+
+ENTRY_KEYS = (
+    "input_base_file",
+    "config_file",
+    "outfile",
+    "input_file_type",
+    "config_file_type",
+    "output_file_type",
+)
+PATH_KEYS = ("input_base_file", "config_file", "outfile")
+
+Chunk = List[Tuple[int, Dict[str, str]]]
+
+
+class Result(NamedTuple):
+    """
+    The outcome of one manifest entry.
+    """
+
+    entry: int
+    outfile: Optional[str]
+    seconds: float
+    error: Optional[str] = None
+
+
+def _chunks(entries: List[Dict[str, str]], jobs: int) -> List[Chunk]:
+    """
+    Split the manifest entries into chunks of work, numbering each entry.
+
+    Entries sharing an input base file go in the same chunk where possible, so that the file is
+    loaded once per chunk, but large groups are split so that all processes have work to do.
+
+    :param entries: The manifest entries.
+    :param jobs: The number of processes that will run the chunks.
+    """
+    groups: Dict[Tuple[str, Optional[str]], Chunk] = {}
+    for index, entry in enumerate(entries):
+        key = (entry["input_base_file"], entry.get("input_file_type"))
+        groups.setdefault(key, []).append((index, entry))
+    size = max(1, -(-len(entries) // jobs))
+    return [group[i : i + size] for group in groups.values() for i in range(0, len(group), size)]
+
+
+def _run_chunk(
+    chunk: Chunk, log_name: Optional[str], level: str, options: Dict[str, Any]
+) -> List[Result]:
+    """
+    Process a chunk of manifest entries sharing an input base file, loading the file only once.
+
+    :param chunk: The numbered manifest entries.
+    :param log_name: Name of the logger to log to, whose handlers are already set up.
+    :param level: The logging level.
+    :param options: Other create_config_obj() arguments, applied to every entry.
+    """
+    log = Logger(name=log_name, level=level, quiet=True)
+    base = None
+    results = []
+    for index, entry in chunk:
+        start = time.perf_counter()
+        error = None
+        try:
+            if base is None:
+                path = entry["input_base_file"]
+                infile_type = entry.get("input_file_type") or cli_helpers.get_file_type(path)
+                base = getattr(config, f"{infile_type}Config")(path, log_name=log_name)
+            config.create_config_obj(
+                base_config=copy.deepcopy(base), log=log, **options, **entry  # type: ignore
+            )
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            error = str(e) or type(e).__name__
+            msg = f"Manifest entry {index} failed: {error}"
+            log.error(msg)
+        results.append(Result(index, entry.get("outfile"), time.perf_counter() - start, error))
+    return results
+
+
+def load_manifest(path: str) -> List[Dict[str, str]]:
+    """
+    Read the conversions listed in a YAML or JSON manifest.
+
+    The manifest is a list of mappings, each with an input_base_file key and, optionally, any of the
+    config_file, outfile, input_file_type, config_file_type, and output_file_type keys, taking the
+    values of the corresponding set_config options. Relative paths are relative to the manifest.
+
+    :param path: Path to the manifest.
+    :raises: UWConfigError if the manifest is malformed.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            entries = yaml.load(f, Loader=config.SafeLoader)
+        except yaml.YAMLError as e:
+            raise UWConfigError(f"Could not parse manifest {path}: {e}") from e
+    if not isinstance(entries, list):
+        raise UWConfigError(f"Manifest {path} must contain a list of entries")
+    root = os.path.dirname(os.path.abspath(path))
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict) or "input_base_file" not in entry:
+            raise UWConfigError(f"Manifest entry {index} must be a mapping with an input_base_file")
+        unknown = sorted(set(entry) - set(ENTRY_KEYS))
+        if unknown:
+            raise UWConfigError(f"Manifest entry {index} has unknown keys: {', '.join(unknown)}")
+        for key in PATH_KEYS:
+            if entry.get(key):
+                entry[key] = os.path.join(root, entry[key])
+    return entries
+
+
+def report(results: List[Result], log: Logger) -> bool:
+    """
+    Log the outcome and timing of each manifest entry.
+
+    Returns True if every entry succeeded, or False otherwise.
+
+    :param results: The results of the manifest entries.
+    :param log: The logger to log to.
+    """
+    log.info("Manifest summary:")
+    for result in results:
+        status = "OK" if result.error is None else "FAILED"
+        line = f"{result.entry:>4d} {status:<6s} {result.seconds:8.3f}s {result.outfile or '-'}"
+        msg = line if result.error is None else f"{line}: {result.error}"
+        log.info(msg)
+    failed = sum(result.error is not None for result in results)
+    msg = f"{len(results) - failed} of {len(results)} entries succeeded"
+    log.info(msg)
+    return failed == 0
+
+
+def run(
+    entries: List[Dict[str, str]],
+    log: Logger,
+    jobs: Optional[int] = None,
+    **options: Any,
+) -> List[Result]:
+    """
+    Process manifest entries in parallel, across a pool of processes.
+
+    :param entries: The manifest entries.
+    :param log: The logger to log to.
+    :param jobs: The number of processes to use, or None for one per CPU. With 1, the entries are
+        processed in this process.
+    :param options: Other create_config_obj() arguments, applied to every entry.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    chunks = _chunks(entries, jobs)
+    if jobs == 1:
+        results = [r for chunk in chunks for r in _run_chunk(chunk, log.name, log.level, options)]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [
+                pool.submit(_run_chunk, chunk, log.name, log.level, options) for chunk in chunks
+            ]
+            results = [r for future in futures for r in future.result()]
+    return sorted(results, key=lambda result: result.entry)
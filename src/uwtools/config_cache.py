@@ -0,0 +1,174 @@
+"""
+A persistent, on-disk cache of rendered config files.
+"""
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+# Bump this whenever a change to the code could change the contents of cached outputs.
+CACHE_VERSION = 1
+
+DEFAULT_CACHE_SIZE = 1000 * 1000 * 1000
+
+
+def digest(path: str) -> str:
+    """
+    The SHA-256 digest of a file's contents.
+
+    :param path: Path to the file.
+    """
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class ConfigCache:
+    """
+    Rendered config files, keyed by the contents of the files they were created from.
+
+    An entry is looked up by a key derived from the input and config file contents and the
+    conversion options. It is only used if every file !INCLUDEd along the way is unchanged, and
+    every environment variable the templates referred to has the same value (or is still unset).
+    The cache may be shared by concurrent processes: access is serialized by a lock file. Once the
+    cache exceeds its size cap, the least recently used entries are removed.
+    """
+
+    def __init__(self, path: str, max_size: int = DEFAULT_CACHE_SIZE) -> None:
+        """
+        Construct a ConfigCache object.
+
+        :param path: Path to the cache directory, which is created if necessary.
+        :param max_size: The maximum total size of the cache entries, in bytes.
+        """
+        self.path = Path(path)
+        self.max_size = max_size
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    # Private methods
+
+    def _entries(self) -> List[Path]:
+        """
+        The manifest files of the cache entries, least recently used first.
+        """
+        manifests = [(p.stat().st_mtime, p) for p in self.path.glob("[!.]*.json")]
+        return [p for _, p in sorted(manifests)]
+
+    def _evict(self) -> None:
+        """
+        Remove the least recently used entries until the cache is within its size cap.
+        """
+        entries = self._entries()
+        sizes = {
+            m: sum(p.stat().st_size for p in (m, self._output(m)) if p.exists()) for m in entries
+        }
+        total = sum(sizes.values())
+        for manifest in entries:
+            if total <= self.max_size:
+                break
+            self._remove(manifest)
+            total -= sizes[manifest]
+
+    @contextmanager
+    def _lock(self, exclusive: bool) -> Iterator[None]:
+        """
+        Hold the cache lock.
+
+        :param exclusive: Hold the lock exclusively, rather than shared with other readers?
+        """
+        with open(self.path / ".lock", "a", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _output(manifest: Path) -> Path:
+        """
+        The path to the cached output corresponding to a manifest.
+
+        :param manifest: Path to the manifest file.
+        """
+        return manifest.with_suffix(".out")
+
+    def _remove(self, manifest: Path) -> None:
+        """
+        Remove a cache entry.
+
+        :param manifest: Path to the entry's manifest file.
+        """
+        for path in (manifest, self._output(manifest)):
+            path.unlink(missing_ok=True)
+
+    # Public methods
+
+    @staticmethod
+    def key(files: List[Optional[str]], options: List[Optional[str]]) -> str:
+        """
+        A cache key for the given input files and options.
+
+        :param files: Paths to the files the output is created from, or None if not given.
+        :param options: The options affecting the output.
+        """
+        parts = [CACHE_VERSION, [None if f is None else digest(f) for f in files], options]
+        return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+    def fetch(self, key: str, outfile: str) -> bool:
+        """
+        Write a cached output to a file, if there is a valid entry for it.
+
+        Returns True if the output was written, or False otherwise.
+
+        :param key: The cache key.
+        :param outfile: Path to write the output to.
+        """
+        manifest = self.path / f"{key}.json"
+        with self._lock(exclusive=False):
+            try:
+                with open(manifest, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+                for path, file_digest in entry["files"].items():
+                    if not os.path.isfile(path) or digest(path) != file_digest:
+                        return False
+                for name, value in entry["environ"].items():
+                    if os.environ.get(name) != value:
+                        return False
+                shutil.copyfile(self._output(manifest), outfile)
+            except FileNotFoundError:
+                return False
+            # Mark the entry as recently used.
+            os.utime(manifest)
+        return True
+
+    def store(self, key: str, outfile: str, files: List[str], environ: Dict[str, Optional[str]]):
+        """
+        Add an output to the cache, evicting least recently used entries if necessary.
+
+        :param key: The cache key.
+        :param outfile: Path to the output to cache.
+        :param files: Paths to the files !INCLUDEd while creating the output.
+        :param environ: The values (or None, if unset) of environment variables referred to.
+        """
+        manifest = self.path / f"{key}.json"
+        entry = {
+            "files": {os.path.abspath(path): digest(path) for path in files},
+            "environ": environ,
+        }
+        tmp_manifest, tmp_output = [
+            self.path / f".{key}.{os.getpid()}.{x}" for x in ("json", "out")
+        ]
+        with self._lock(exclusive=True):
+            shutil.copyfile(outfile, tmp_output)
+            with open(tmp_manifest, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            # Move the output into place first: The manifest is what makes an entry visible.
+            os.replace(tmp_output, self._output(manifest))
+            os.replace(tmp_manifest, manifest)
+            self._evict()
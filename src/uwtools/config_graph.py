@@ -0,0 +1,418 @@
+"""
+A dependency graph over the Jinja2-templated values in a config.
+"""
+
+import os
+import re
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from jinja2 import Environment, meta, nodes
+from jinja2.exceptions import TemplateSyntaxError
+
+from uwtools.j2template import register_filters
+
+KeyPath = Tuple[Any, ...]
+
+_PARSER = Environment()
+register_filters(_PARSER)
+
+
+def fragments(val: Any) -> List[str]:
+    """
+    The pieces of a templated value that are rendered independently.
+
+    A value containing a Jinja2 statement is treated as a single template. Otherwise, each
+    double-curly-brace expression is rendered on its own, so that some can be left unfilled when
+    they are not yet set.
+
+    :param val: A templated config value.
+    """
+    if "{%" in val:
+        return [str(val)]
+    return re.findall(r"{{[^}]*}}|\S", str(val))
+
+
+def is_template(val: Any) -> bool:
+    """
+    Does the value contain Jinja2 template markup?
+
+    :param val: A config value.
+    """
+    v_str = str(val)
+    return "{{" in v_str or "{%" in v_str
+
+
+def keypath_str(path: KeyPath) -> str:
+    """
+    A dotted string representation of a key path.
+
+    :param path: The key path.
+    """
+    return ".".join(str(key) for key in path)
+
+
+def references(template: str) -> Set[Tuple[str, ...]]:
+    """
+    The variable references, with any attribute or constant-key lookups, in a Jinja2 template.
+
+    For example, "{{ fcst.length // freq }}" references ("fcst", "length") and ("freq",). Templates
+    that fail to parse reference nothing: They will raise the appropriate error when rendered.
+
+    :param template: A Jinja2 template string.
+    """
+    try:
+        ast = _PARSER.parse(template)
+        undeclared = meta.find_undeclared_variables(ast)
+    except TemplateSyntaxError:
+        return set()
+    refs: Set[Tuple[str, ...]] = set()
+
+    def chain(node: nodes.Node) -> Optional[Tuple[str, ...]]:
+        if isinstance(node, nodes.Name):
+            return (node.name,)
+        if isinstance(node, nodes.Getattr):
+            base = chain(node.node)
+            return None if base is None else base + (node.attr,)
+        if (
+            isinstance(node, nodes.Getitem)
+            and isinstance(node.arg, nodes.Const)
+            and isinstance(node.arg.value, str)
+        ):
+            base = chain(node.node)
+            return None if base is None else base + (node.arg.value,)
+        return None
+
+    def visit(node: nodes.Node) -> None:
+        path = chain(node)
+        if path is not None:
+            if path[0] in undeclared:
+                refs.add(path)
+            return
+        for child in node.iter_child_nodes():
+            visit(child)
+
+    visit(ast)
+    return refs
+
+
+class ConfigGraph:  # pylint: disable=too-many-instance-attributes
+    """
+    The dependencies between the templated values in a config, and the order to render them in.
+
+    Every value in the config is scanned once. A templated value depends on each templated value at
+    or below the config location its references resolve to, using the same lookup precedence as
+    rendering: top-level keys, then keys in the same section, then environment variables. Values
+    are rendered in dependency order, so each is rendered exactly once. Values that take part in a
+    reference cycle are left as-is.
+
+    The original templates are retained, so that after the config is updated only the changed
+    values, and those that depend on them, need to be rendered again.
+    """
+
+    def __init__(self, data: dict) -> None:
+        """
+        Construct a ConfigGraph object.
+
+        :param data: The config dictionary to scan.
+        """
+        self.data = data
+        self.cycles: List[List[KeyPath]] = []
+        self.deps: Dict[KeyPath, List[KeyPath]] = {}
+        self.missing: Dict[KeyPath, List[str]] = {}
+        self.templates: Dict[KeyPath, Any] = {}
+        self.unresolved: Dict[KeyPath, List[str]] = {}
+        self._below: Dict[KeyPath, Dict[KeyPath, None]] = {}
+        self._dependents: Dict[KeyPath, Dict[KeyPath, None]] = {}
+        self._names: Dict[str, Dict[KeyPath, None]] = {}
+        self._refs: Dict[KeyPath, Set[Tuple[str, ...]]] = {}
+        self._scan(data, ())
+        self._link(list(self.templates))
+        self.order = self._sort(list(self.templates))
+
+    # Private methods
+
+    def _add(self, path: KeyPath, val: Any) -> None:
+        """
+        Record a templated value and the references it makes.
+
+        :param path: The key path of the value.
+        :param val: The value.
+        """
+        self.templates[path] = val
+        self._refs[path] = set()
+        for fragment in fragments(val):
+            if is_template(fragment):
+                self._refs[path].update(references(fragment))
+        for ref in self._refs[path]:
+            self._names.setdefault(ref[0], {})[path] = None
+        for i in range(len(path) + 1):
+            self._below.setdefault(path[:i], {})[path] = None
+
+    def _cycle(self, start: KeyPath, members: Set[KeyPath]) -> List[KeyPath]:
+        """
+        The shortest chain of references from a templated value back to itself.
+
+        :param start: The key path of the value.
+        :param members: The key paths of the values in its strongly connected component.
+        """
+        previous: Dict[KeyPath, KeyPath] = {}
+        queue = deque([start])
+        while True:
+            path = queue.popleft()
+            for dep in self.deps[path]:
+                if dep == start:
+                    chain = [path]
+                    while chain[-1] != start:
+                        chain.append(previous[chain[-1]])
+                    return chain[::-1] + [start]
+                if dep in members and dep not in previous:
+                    previous[dep] = path
+                    queue.append(dep)
+
+    def _leaves(self, path: KeyPath) -> List[KeyPath]:
+        """
+        The templated values at or below a config location.
+
+        :param path: The key path to the config location.
+        """
+        return list(self._below.get(path, {}))
+
+    def _link(self, paths: List[KeyPath]) -> None:
+        """
+        Resolve the references made by templated values to the templated values they depend on.
+
+        :param paths: The key paths of the templated values.
+        """
+        for path in paths:
+            self._unlink(path)
+            targets: Dict[KeyPath, None] = {}
+            for ref in sorted(self._refs[path]):
+                target = self._locate(ref, path[:-1])
+                if target is not None:
+                    leaves = self._leaves(target)
+                    # A value that refers to itself renders as itself, so it cannot be resolved.
+                    if target == path:
+                        self.missing.setdefault(path, []).append(ref[0])
+                    targets.update(dict.fromkeys(leaf for leaf in leaves if leaf != path))
+                elif ref[0] not in os.environ and ref[0] not in _PARSER.globals:
+                    self.missing.setdefault(path, []).append(ref[0])
+            self.deps[path] = list(targets)
+            for target in targets:
+                self._dependents.setdefault(target, {})[path] = None
+
+    def _locate(self, ref: Tuple[str, ...], parent: KeyPath) -> Optional[KeyPath]:
+        """
+        The key path a reference resolves to, or None if it names no config value.
+
+        :param ref: The reference, as a variable name followed by any lookups.
+        :param parent: The key path of the section containing the templated value.
+        """
+        name, *lookups = ref
+        if name in self.data:
+            path: KeyPath = (name,)
+        elif parent and name in self._node(parent):
+            path = parent + (name,)
+        else:
+            return None
+        node = self._node(path)
+        for key in lookups:
+            if not isinstance(node, dict) or key not in node:
+                break
+            path, node = path + (key,), node[key]
+        return path
+
+    def _node(self, path: KeyPath) -> Any:
+        """
+        The config value at a key path.
+
+        :param path: The key path.
+        """
+        node: Any = self.data
+        for key in path:
+            node = node[key]
+        return node
+
+    def _remove(self, path: KeyPath) -> None:
+        """
+        Forget a templated value.
+
+        :param path: The key path of the value.
+        """
+        self._unlink(path)
+        for name in {ref[0] for ref in self._refs.pop(path)}:
+            del self._names[name][path]
+        for i in range(len(path) + 1):
+            del self._below[path[:i]][path]
+        del self.templates[path]
+        self.unresolved.pop(path, None)
+
+    def _scan(self, config: dict, parent: KeyPath) -> None:
+        """
+        Record the templated values in a config section, and the references they make.
+
+        :param config: The config section to scan.
+        :param parent: The key path of the section.
+        """
+        for key, val in config.items():
+            path = parent + (key,)
+            if isinstance(val, dict):
+                self._scan(val, path)
+            elif is_template(val):
+                self._add(path, val)
+
+    def _sort(self, paths: List[KeyPath]) -> List[KeyPath]:
+        """
+        Topologically sort templated values, recording any reference cycles among them.
+
+        The strongly connected components of the dependency graph are found by Tarjan's algorithm,
+        which yields them dependencies first. Every value in a component of more than one value is
+        in a cycle, and is reported with the shortest chain of references leading back to it,
+        unless it is on the chain reported for an earlier value in the component.
+
+        Ties are broken by the order of the given paths. Dependencies on other values are assumed
+        to be satisfied. Values in cycles are excluded from the result.
+
+        :param paths: The key paths of the templated values to sort.
+        """
+        self.cycles = []
+        order: List[KeyPath] = []
+        position = {path: i for i, path in enumerate(paths)}
+        index: Dict[KeyPath, int] = {}
+        low: Dict[KeyPath, int] = {}
+        stack: List[KeyPath] = []
+        onstack: Set[KeyPath] = set()
+        for root in paths:
+            if root in index:
+                continue
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            onstack.add(root)
+            work: List[Tuple[KeyPath, int]] = [(root, 0)]
+            while work:
+                path, i = work[-1]
+                deps = self.deps[path]
+                if i < len(deps):
+                    work[-1] = (path, i + 1)
+                    dep = deps[i]
+                    if dep not in position:
+                        continue
+                    if dep not in index:
+                        index[dep] = low[dep] = len(index)
+                        stack.append(dep)
+                        onstack.add(dep)
+                        work.append((dep, 0))
+                    elif dep in onstack:
+                        low[path] = min(low[path], index[dep])
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[path])
+                if low[path] != index[path]:
+                    continue
+                members = [stack.pop()]
+                while members[-1] != path:
+                    members.append(stack.pop())
+                onstack.difference_update(members)
+                if len(members) == 1:
+                    order.append(path)
+                    continue
+                cyclic = set(members)
+                covered: Set[KeyPath] = set()
+                for member in sorted(members, key=position.__getitem__):
+                    if member not in covered:
+                        cycle = self._cycle(member, cyclic)
+                        self.cycles.append(cycle)
+                        covered.update(cycle)
+        return order
+
+    def _unlink(self, path: KeyPath) -> None:
+        """
+        Forget the dependencies of a templated value.
+
+        :param path: The key path of the value.
+        """
+        for target in self.deps.pop(path, []):
+            del self._dependents[target][path]
+        self.missing.pop(path, None)
+
+    # Public methods
+
+    def external_names(self) -> Set[str]:
+        """
+        The names referred to by templated values that do not name config values.
+
+        These are the environment variables the templates depend on, whether or not they are set.
+        """
+        names = set()
+        for path, refs in self._refs.items():
+            for ref in refs:
+                if ref[0] not in _PARSER.globals and self._locate(ref, path[:-1]) is None:
+                    names.add(ref[0])
+        return names
+
+    def render(self, render: Callable[[Any, Any, dict], Any]) -> None:
+        """
+        Render every templated value not in a cycle, in dependency order, updating the config.
+
+        Afterwards, the unresolved attribute maps each value still containing a template, owing to
+        a reference that names neither a config value nor an environment variable, to the chain of
+        references that leads to the missing name.
+
+        :param render: Called with a key, its value, and its section; returns the rendered value.
+        """
+        for path in self.order:
+            section = self._node(path[:-1])
+            key = path[-1]
+            section[key] = render(key, section[key], section)
+            self.unresolved.pop(path, None)
+            if not is_template(section[key]):
+                continue
+            if path in self.missing:
+                self.unresolved[path] = [keypath_str(path), self.missing[path][0]]
+                continue
+            for dep in self.deps[path]:
+                if dep in self.unresolved:
+                    self.unresolved[path] = [keypath_str(path)] + self.unresolved[dep]
+                    break
+
+    def update(self, paths: List[KeyPath]) -> None:
+        """
+        Account for changes to the config, preparing to render only the affected values.
+
+        Templated values below the changed locations are rescanned. Those values, and any that
+        refer to the changed locations, directly or indirectly, are restored to their original
+        templates and ordered for rendering. Values are not rendered until render() is called.
+
+        :param paths: The key paths of the config locations whose values were replaced.
+        """
+        dirty: Dict[KeyPath, None] = {}
+        for path in paths:
+            for leaf in self._leaves(path):
+                dirty.update(self._dependents.get(leaf, {}))
+                self._remove(leaf)
+            try:
+                node = self._node(path)
+            except (KeyError, TypeError):
+                node = None  # The key was deleted.
+            if isinstance(node, dict):
+                self._scan(node, path)
+            elif is_template(node):
+                self._add(path, node)
+            dirty.update(dict.fromkeys(self._leaves(path)))
+            # Any value referring to a key named in the path may now resolve differently.
+            for name in path:
+                dirty.update(self._names.get(name, {}))
+        todo = [leaf for leaf in dirty if leaf in self.templates]
+        while todo:
+            leaf = todo.pop()
+            for dependent in self._dependents.get(leaf, {}):
+                if dependent not in dirty:
+                    dirty[dependent] = None
+                    todo.append(dependent)
+        dirty_paths = [leaf for leaf in dirty if leaf in self.templates]
+        for leaf in dirty_paths:
+            self._node(leaf[:-1])[leaf[-1]] = self.templates[leaf]
+        self._link(dirty_paths)
+        self.order = self._sort(dirty_paths)
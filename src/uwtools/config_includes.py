@@ -0,0 +1,76 @@
+"""
+A cache of parsed !INCLUDE files, shared by the configs loaded in a process.
+"""
+
+import copy
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+CACHE_SIZE = 256
+
+# The (path, stat signature) of an included file and of each file it included in turn.
+Files = List[Tuple[str, Tuple[int, int]]]
+
+# A parsed file depends on the config class that parsed it and, as nested includes are relative to
+# it, on the top-level config's directory: (config class, include path, config directory).
+Key = Tuple[type, str, str]
+
+_cache: OrderedDict[Key, Tuple[dict, Files]] = OrderedDict()
+_lock = threading.Lock()
+
+
+def cache_clear() -> None:
+    """
+    Forget all parsed include files.
+    """
+    with _lock:
+        _cache.clear()
+
+
+def cache_get(key: Key, including: List[str]) -> Optional[Tuple[dict, Files]]:
+    """
+    A copy of a parsed include file, and the files it draws on, if none of them has changed.
+
+    :param key: The cache key.
+    :param including: The include files being loaded, which the entry may not draw on.
+    """
+    with _lock:
+        entry = _cache.get(key)
+        if entry is None:
+            return None
+        _cache.move_to_end(key)
+    cfg, files = entry
+    try:
+        if any(signature(f) != sig or f in including for f, sig in files):
+            return None
+    except FileNotFoundError:
+        return None
+    return copy.deepcopy(cfg), files
+
+
+def cache_put(key: Key, cfg: dict, files: Files) -> None:
+    """
+    Cache a copy of a parsed include file, evicting the least recently used if necessary.
+
+    :param key: The cache key.
+    :param cfg: The parsed contents.
+    :param files: The (path, stat signature) of the file and each file it included in turn.
+    """
+    entry = (copy.deepcopy(cfg), files)
+    with _lock:
+        _cache[key] = entry
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def signature(path: str) -> Tuple[int, int]:
+    """
+    The modification time and size of a file, which change when it is rewritten.
+
+    :param path: Path to the file.
+    """
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
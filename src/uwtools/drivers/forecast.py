@@ -4,12 +4,14 @@ This file contains the forecast drivers for a variety of apps and physics suites
 
 import logging
 import os
-import shutil
 import sys
-from typing import Dict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 from uwtools import config
 from uwtools.drivers.driver import Driver
+from uwtools.files.gateway import unix
+from uwtools.files.store import Store
 from uwtools.utils import file_helpers
 
 
@@ -115,15 +117,17 @@ class FV3Forecast(Driver):
 
         Args:
            run_directory: path of desired run directory
-           exist_act: - could be any of 'delete', 'rename', 'quit'
+           exist_act: - could be any of 'delete', 'delete_async', 'rename', 'quit'
                       - how program should act if run directory exists
                       - default is to delete old run directory
+                      - delete_async renames the old run directory aside and deletes it in the
+                        background (see file_helpers.wait_for_deletions())
            Returns: None
         """
 
         # Caller should only provide correct argument.
 
-        if exist_act not in ["delete", "rename", "quit"]:
+        if exist_act not in ["delete", "delete_async", "rename", "quit"]:
             raise ValueError("Bad argument to create_directory_structure")
 
         # Exit program with error if caller chooses to quit.
@@ -167,17 +171,91 @@ class FV3Forecast(Driver):
         This will take in the executable built in run_cmd and then run it.
         """
 
-    def stage_static_files(self, run_directory: str, static_files: Dict[str, str]) -> None:
+    def stage_static_files(
+        self,
+        run_directory: str,
+        static_files: Dict[str, Union[str, Dict[str, str]]],
+        strategy: Optional[Union[str, Sequence[str]]] = None,
+        store: Optional[str] = None,
+        verify: Optional[int] = None,
+        throttle: Optional[Dict[str, Any]] = None,
+    ) -> None:
         """
         Takes in run directory and dictionary of file names and paths that need to be staged in the
         run directory.
 
-        Creates dst file in run directory and copies contents from the src path provided.
+        Creates each dst file in the run directory from the src path provided, in parallel, by the
+        first staging strategy that works: by default a reflink, else a hardlink, else a symlink,
+        else a copy. The strategy used for each file is logged. A strategy can be configured in the
+        driver YAML for all files, and overridden for a file by giving a mapping in place of its
+        path:
+
+            static:
+              global_o3prdlos.f77: /path/to/ozprdlos_2015_new_sbuvO3_tclm15_nuchem.f77
+              field_table: {path: /path/to/field_table, strategy: copy}
+            static_strategy: hardlink
+            static_store: /path/to/shared/store
+            static_verify: 0
+            static_throttle: {bandwidth: 200000000, files: 4}
+
+        Given a content-addressed store shared by experiments, each file is first added to the
+        store, if not already there, and the stored copy staged, so that run directories hardlinked
+        or reflinked to it share a single copy of the file.
+
+        Staged files can be verified by checksum, in full or by sampling blocks of large files. A
+        file that does not match its source is an error. On a shared node, copies can be throttled
+        to an aggregate bandwidth, in bytes per second, and a number of files at once.
+
+        Args:
+            run_directory: path of run directory
+            static_files: dst file names, relative to the run directory, and their src paths
+            strategy: a strategy, meaning it and those after it in the order above, or a list of
+                      strategies to try in order, e.g. the driver YAML's static_strategy value
+            store: path of a shared store, e.g. the driver YAML's static_store value
+            verify: 0 to verify whole files, a number of blocks to sample from each file, or None
+                    not to verify, e.g. the driver YAML's static_verify value
+            throttle: unix.Throttle() arguments, e.g. the driver YAML's static_throttle value
         """
 
         os.makedirs(run_directory, exist_ok=True)
-        for dst_fn, src_path in static_files.items():
-            dst_path = os.path.join(run_directory, dst_fn)
-            shutil.copyfile(src_path, dst_path)
-            msg = f"File {src_path} staged in run directory at {dst_fn}"
+        groups: Dict[Tuple[str, ...], List[Tuple[Path, Path]]] = {}
+        for dst_fn, src in static_files.items():
+            if isinstance(src, dict):
+                src_path, strategies = src["path"], self._strategies(src.get("strategy", strategy))
+            else:
+                src_path, strategies = src, self._strategies(strategy)
+            pair = (Path(src_path), Path(run_directory, dst_fn))
+            groups.setdefault(strategies, []).append(pair)
+        results = []
+        options = None if verify is None else unix.VerifyOptions(samples=verify)
+        limit = None if throttle is None else unix.Throttle(**throttle)
+        if store is None:
+            with unix.Copier(verification=options, throttle=limit) as copier:
+                for strategies, pairs in groups.items():
+                    results += copier.copy(pairs, strategies=strategies)
+        else:
+            shared = Store(Path(store))
+            for strategies, pairs in groups.items():
+                results += shared.stage(
+                    pairs, strategies=strategies, verify=options, throttle=limit
+                )
+        for result in results:
+            dst_fn = os.path.relpath(result.dst, run_directory)
+            msg = f"File {result.src} staged in run directory at {dst_fn} by {result.strategy}"
             logging.info(msg)
+
+    @staticmethod
+    def _strategies(strategy: Optional[Union[str, Sequence[str]]]) -> Tuple[str, ...]:
+        """
+        The staging strategies to try, in order, given a strategy or a list of strategies.
+
+        Args:
+            strategy: a strategy, meaning it and those after it in order of cost, or a list
+        """
+        if strategy is None:
+            return unix.STRATEGIES
+        if isinstance(strategy, str):
+            if strategy not in unix.STRATEGIES:
+                raise ValueError(f"Unknown staging strategy {strategy}")
+            return unix.STRATEGIES[unix.STRATEGIES.index(strategy) :]
+        return tuple(strategy)
@@ -2,33 +2,492 @@
 Gateway for interacting with S3.
 """
 
+import json
 import logging
+import mmap
 import os
 import pathlib
-from typing import Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
 
-import boto3
-from botocore.exceptions import ClientError
+from uwtools.utils.imports import lazy_import
 
-S3_CLIENT = boto3.client("s3")
+boto3 = lazy_import("boto3")
+boto3_transfer = lazy_import("boto3.s3.transfer")
+botocore_config = lazy_import("botocore.config")
+botocore_exceptions = lazy_import("botocore.exceptions")
+
+# The client is created when first needed, as doing so is expensive, and is then shared by all
+# threads in the process: boto3 clients are thread-safe, so that they share one connection pool.
+S3_CLIENT = None
+SETTINGS: Dict[str, Union[float, int]] = {
+    "connect_timeout": 10,
+    "max_pool_connections": 50,
+    "read_timeout": 60,
+    "retries": 5,
+}
+_client_lock = threading.Lock()
+_client_pid: Optional[int] = None
+
+MB = 1024 * 1024
+
+# Seconds for which a listing of the objects under a prefix is reused by stat().
+LISTING_TTL = 60.0
+
+# (direction, local path, bucket, key)
+Job = Tuple[str, str, str, str]
+
+
+class ObjectInfo(NamedTuple):
+    """
+    Metadata of an S3 object.
+    """
+
+    size: int
+    etag: str
+
+
+# The time each (bucket, prefix) was listed, and the objects found directly under it.
+_listings: Dict[Tuple[str, str], Tuple[float, Dict[str, ObjectInfo]]] = {}
+_listings_lock = threading.Lock()
+
+# The retries taken by requests for each (bucket, key) being transferred.
+_retries: Dict[Tuple[str, str], int] = {}
+_retries_lock = threading.Lock()
+
+
+class TransferResult(NamedTuple):
+    """
+    The outcome of transferring one object.
+    """
+
+    source: str
+    destination: str
+    size: int
+    seconds: float
+    error: Optional[str] = None
+    queued: float = 0.0
+    retries: int = 0
+
+
+class Transfer:
+    """
+    Concurrent uploads to, and downloads from, S3.
+
+    Objects are transferred concurrently by a pool of worker threads sharing the process's client
+    and so its connection pool. Objects larger than the multipart threshold are themselves split
+    into chunks, which are transferred concurrently.
+    """
+
+    def __init__(
+        self,
+        workers: int = 8,
+        multipart_threshold: int = 8 * MB,
+        multipart_chunksize: int = 8 * MB,
+        part_concurrency: int = 4,
+        resumable: bool = False,
+    ) -> None:
+        """
+        :param workers: The number of objects to transfer concurrently.
+        :param multipart_threshold: Size in bytes from which an object is transferred in chunks.
+        :param multipart_chunksize: Size in bytes of each chunk.
+        :param part_concurrency: The number of chunks of each object to transfer concurrently.
+        :param resumable: Download with download_ranged(), so that interrupted downloads resume.
+        """
+        self.workers = workers
+        self.multipart_threshold = multipart_threshold
+        self.multipart_chunksize = multipart_chunksize
+        self.part_concurrency = part_concurrency
+        self.resumable = resumable
+        self.jobs: List[Job] = []
+
+    # Private methods
+
+    def _transfer(self, job: Job, config, submitted: float) -> TransferResult:
+        """
+        Transfer one object, recording rather than raising any error.
+
+        :param job: The direction, local path, bucket and key of the transfer.
+        :param config: The boto3 transfer configuration.
+        :param submitted: When the transfer was queued, by time.perf_counter().
+        """
+        direction, path, bucket, key = job
+        uri = f"s3://{bucket}/{key}"
+        source, destination = (path, uri) if direction == "upload" else (uri, path)
+        logging.debug("Transferring %s to %s", source, destination)
+        start = time.perf_counter()
+        with _retries_lock:
+            _retries.pop((bucket, key), None)
+        error = None
+        try:
+            if direction == "upload":
+                _client().upload_file(path, bucket, key, Config=config)
+                _forget(bucket, key)
+            else:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                if self.resumable:
+                    download_ranged(
+                        bucket,
+                        key,
+                        path,
+                        part_size=self.multipart_chunksize,
+                        workers=self.part_concurrency,
+                    )
+                else:
+                    _client().download_file(bucket, key, path, Config=config)
+            size = os.path.getsize(path)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logging.error("Could not transfer %s to %s: %s", source, destination, e)
+            size, error = 0, str(e)
+        with _retries_lock:
+            retries = _retries.pop((bucket, key), 0)
+        seconds = time.perf_counter() - start
+        return TransferResult(
+            source, destination, size, seconds, error, queued=start - submitted, retries=retries
+        )
+
+    # Public methods
+
+    def download(self, bucket: str, key: str, path: str) -> None:
+        """
+        Add an S3 object to download.
+
+        :param bucket: The bucket to download from.
+        :param key: The key of the object.
+        :param path: The local path to download to or, if a directory, to download into.
+        """
+        if path.endswith(os.sep) or os.path.isdir(path):
+            path = os.path.join(path, os.path.basename(key))
+        self.jobs.append(("download", path, bucket, key))
+
+    def run(self) -> List[TransferResult]:
+        """
+        Transfer the added objects, returning the outcome of each, in the order they were added.
+        """
+        connections = self.workers * self.part_concurrency
+        if SETTINGS["max_pool_connections"] < connections:
+            configure(max_pool_connections=connections)
+        config = boto3_transfer.TransferConfig(
+            multipart_threshold=self.multipart_threshold,
+            multipart_chunksize=self.multipart_chunksize,
+            max_concurrency=self.part_concurrency,
+            use_threads=self.part_concurrency > 1,
+        )
+        submitted = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(lambda job: self._transfer(job, config, submitted), self.jobs))
+
+    def upload(self, path: str, bucket: str, key: str = "") -> None:
+        """
+        Add a local file to upload.
+
+        :param path: The local file to upload.
+        :param bucket: The bucket to upload to.
+        :param key: The key of the object or, if empty or ending with "/", its prefix, to which the
+            file's name is appended.
+        """
+        if not key or key.endswith("/"):
+            key += os.path.basename(path)
+        self.jobs.append(("upload", path, bucket, key))
+
+
+def _client():
+    """
+    The S3 client for this process, created with the current settings if necessary.
+    """
+    global S3_CLIENT, _client_pid  # pylint: disable=global-statement
+    # A client inherited from a parent process would share its connections, so is not reused.
+    # The client is read once, as configure() may discard it at any time.
+    client, pid = S3_CLIENT, _client_pid
+    if client is not None and pid in (None, os.getpid()):
+        return client
+    with _client_lock:
+        client, pid = S3_CLIENT, _client_pid
+        if client is None or pid not in (None, os.getpid()):
+            config = botocore_config.Config(
+                connect_timeout=SETTINGS["connect_timeout"],
+                max_pool_connections=SETTINGS["max_pool_connections"],
+                read_timeout=SETTINGS["read_timeout"],
+                retries={"max_attempts": SETTINGS["retries"], "mode": "standard"},
+            )
+            client = boto3.session.Session().client("s3", config=config)
+            client.meta.events.register("before-parameter-build.s3", _note_object)
+            client.meta.events.register("after-call.s3", _count_retries)
+            S3_CLIENT, _client_pid = client, os.getpid()
+    return client
+
+
+def _count_retries(parsed: dict, context: dict, **_) -> None:
+    """
+    Count the retries a request took against the object it was for (see _note_object()).
+
+    :param parsed: The parsed response.
+    :param context: The request context.
+    """
+    retries = parsed.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+    obj = context.get("uwtools_object")
+    if retries and obj is not None:
+        with _retries_lock:
+            _retries[obj] = _retries.get(obj, 0) + retries
+
+
+def _forget(bucket: str, key: str) -> None:
+    """
+    Drop any cached listing that an object, having just been written, would be missing from.
+
+    :param bucket: The bucket of the object.
+    :param key: The key of the object.
+    """
+    with _listings_lock:
+        _listings.pop((bucket, _prefix(key)), None)
+
+
+def _list(bucket: str, prefix: str) -> Dict[str, ObjectInfo]:
+    """
+    The objects directly under a prefix, found by paginated listing.
+
+    :param bucket: The bucket to list.
+    :param prefix: The prefix, empty or ending with "/", to list.
+    """
+    objects = {}
+    paginator = _client().get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix, Delimiter="/"):
+        for obj in page.get("Contents", []):
+            objects[obj["Key"]] = ObjectInfo(obj["Size"], obj["ETag"])
+    return objects
+
+
+def _note_object(params: dict, context: dict, **_) -> None:
+    """
+    Note, in a request's context, the object the request is for.
+
+    :param params: The request parameters.
+    :param context: The request context.
+    """
+    if "Bucket" in params and "Key" in params:
+        context["uwtools_object"] = (params["Bucket"], params["Key"])
+
+
+def _prefix(key: str) -> str:
+    """
+    The "directory" part of a key, up to and including its last "/", or empty if it has none.
+
+    :param key: The key of an object.
+    """
+    return "".join(key.rpartition("/")[:2])
+
+
+def _ranges_done(state: str, header: str) -> Set[int]:
+    """
+    The ranges recorded as complete by an interrupted download of the same object.
+
+    :param state: Path to the file recording the download's progress.
+    :param header: The first line of the file, identifying the object and range size.
+    """
+    try:
+        with open(state, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return set()
+    if not lines or lines[0] != header:
+        return set()
+    return {int(line) for line in lines[1:] if line.isdigit()}
+
+
+def configure(
+    connect_timeout: Optional[float] = None,
+    max_pool_connections: Optional[int] = None,
+    read_timeout: Optional[float] = None,
+    retries: Optional[int] = None,
+) -> None:
+    """
+    Change the S3 client settings, which take effect when the client is next used.
+
+    :param connect_timeout: Seconds to wait for a connection to be made.
+    :param max_pool_connections: The maximum number of connections to keep in the pool, which
+        should be at least the number of threads transferring files concurrently.
+    :param read_timeout: Seconds to wait to read from a connection.
+    :param retries: The maximum number of attempts at each request.
+    """
+    global S3_CLIENT  # pylint: disable=global-statement
+    updates = {
+        "connect_timeout": connect_timeout,
+        "max_pool_connections": max_pool_connections,
+        "read_timeout": read_timeout,
+        "retries": retries,
+    }
+    with _client_lock:
+        SETTINGS.update({k: v for k, v in updates.items() if v is not None})
+        S3_CLIENT = None
 
 
 def download_file(bucket_name: str, source_name: str, target_name: str) -> None:
     """
     Download files from S3.
     """
-    S3_CLIENT.download_file(bucket_name, source_name, target_name)
+    _client().download_file(bucket_name, source_name, target_name)
+
+
+def download_ranged(
+    bucket: str,
+    key: str,
+    path: str,
+    part_size: int = 64 * MB,
+    workers: int = 8,
+    use_mmap: bool = False,
+) -> int:
+    """
+    Download one S3 object in byte ranges, fetched in parallel, returning its size.
+
+    The object is downloaded to <path>.partial, preallocated to the object's size, into which each
+    range is written in place by offset writes or, optionally, through a memory map. Completed
+    ranges are recorded in <path>.ranges, so that a later call for the same, unchanged object
+    fetches only the missing ranges. The partial file is renamed to the path when complete.
+
+    :param bucket: The bucket to download from.
+    :param key: The key of the object.
+    :param path: The local path to download to.
+    :param part_size: Size in bytes of each range.
+    :param workers: The number of ranges to fetch concurrently.
+    :param use_mmap: Write through a memory map instead of by offset writes.
+    """
+    head = _client().head_object(Bucket=bucket, Key=key)
+    size, etag = head["ContentLength"], head["ETag"]
+    partial, state = f"{path}.partial", f"{path}.ranges"
+    header = json.dumps({"etag": etag, "part_size": part_size, "size": size}, sort_keys=True)
+    ranges = [(start, min(start + part_size, size)) for start in range(0, size, part_size)]
+    done = _ranges_done(state, header) if os.path.exists(partial) else set()
+    if not done:
+        with open(state, "w", encoding="utf-8") as f:
+            print(header, file=f)
+    logging.debug(
+        "Downloading %s of %s ranges of s3://%s/%s",
+        len(ranges) - len(done),
+        len(ranges),
+        bucket,
+        key,
+    )
+    fd = os.open(partial, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        os.ftruncate(fd, size)
+        # Unsupported by the platform or filesystem, or an empty object: the file is sparse.
+        if hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(fd, 0, size)
+            except OSError:
+                pass
+        mm = mmap.mmap(fd, size) if use_mmap and size else None
+        failed, lock = threading.Event(), threading.Lock()
+        with open(state, "a", encoding="utf-8") as log:
+
+            def fetch(index: int) -> None:
+                if failed.is_set():
+                    return
+                try:
+                    fetch_range(index)
+                except BaseException:
+                    failed.set()
+                    raise
+
+            def fetch_range(index: int) -> None:
+                start, end = ranges[index]
+                response = _client().get_object(
+                    Bucket=bucket, Key=key, Range=f"bytes={start}-{end - 1}", IfMatch=etag
+                )
+                offset = start
+                for chunk in response["Body"].iter_chunks(MB):
+                    if mm is None:
+                        written = 0
+                        while written < len(chunk):
+                            written += os.pwrite(fd, chunk[written:], offset + written)
+                    else:
+                        mm[offset : offset + len(chunk)] = chunk
+                    offset += len(chunk)
+                if offset != end:
+                    raise IOError("Short read of s3://%s/%s range %s" % (bucket, key, index))
+                with lock:
+                    log.write(f"{index}\n")
+                    log.flush()
+
+            try:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    todo = [i for i in range(len(ranges)) if i not in done]
+                    list(executor.map(fetch, todo))
+            finally:
+                if mm is not None:
+                    mm.close()
+    finally:
+        os.close(fd)
+    os.replace(partial, path)
+    os.remove(state)
+    return size
 
 
 def exists(_path: pathlib.Path) -> bool:
     """
     Returns True if file exists.
     """
-    try:
-        S3_CLIENT.head_object(Bucket=_path.parts[0], Key="/".join(_path.parts[1:]))
-    except ClientError:
-        return False
-    return True
+    key = "/".join(_path.parts[1:])
+    return stat(_path.parts[0], [key])[key] is not None
+
+
+def listing_cache_clear() -> None:
+    """
+    Forget all cached listings.
+    """
+    with _listings_lock:
+        _listings.clear()
+
+
+def parse_uri(uri: str) -> Tuple[str, str]:
+    """
+    The bucket and, possibly empty, key named in an s3://bucket/key URI.
+
+    :param uri: The URI.
+    :raises: ValueError if the URI does not name a bucket.
+    """
+    if not uri.startswith("s3://"):
+        raise ValueError("Not an S3 URI: %s" % uri)
+    bucket, _, key = uri[len("s3://") :].partition("/")
+    if not bucket:
+        raise ValueError("No bucket in S3 URI %s" % uri)
+    return bucket, key
+
+
+def stat(
+    bucket: str, keys: Iterable[str], ttl: Optional[float] = None
+) -> Dict[str, Optional[ObjectInfo]]:
+    """
+    The metadata of each of the given objects, or None for those that do not exist.
+
+    Rather than requesting each object's metadata in turn, the keys are grouped by prefix, i.e. by
+    "directory", and the objects under each prefix are listed, up to 1000 per request, with the
+    prefixes listed concurrently. Listings are cached, and reused for ttl seconds.
+
+    :param bucket: The bucket holding the objects.
+    :param keys: The keys of the objects.
+    :param ttl: Seconds for which a cached listing is reused, or None for LISTING_TTL.
+    """
+    keys = list(keys)
+    ttl = LISTING_TTL if ttl is None else ttl
+    prefixes = {_prefix(key) for key in keys}
+    now = time.monotonic()
+    listings = {}
+    with _listings_lock:
+        for prefix in prefixes:
+            listed = _listings.get((bucket, prefix))
+            if listed is not None and now - listed[0] < ttl:
+                listings[prefix] = listed[1]
+    unlisted = sorted(prefixes - set(listings))
+    if unlisted:
+        with ThreadPoolExecutor(max_workers=min(len(unlisted), 8)) as executor:
+            listings.update(zip(unlisted, executor.map(lambda p: _list(bucket, p), unlisted)))
+        with _listings_lock:
+            for prefix in unlisted:
+                _listings[(bucket, prefix)] = (now, listings[prefix])
+    return {key: listings[_prefix(key)].get(key) for key in keys}
 
 
 def upload_file(source_path: str, bucket: str, target_name: Optional[str] = None) -> bool:
@@ -44,8 +503,9 @@ def upload_file(source_path: str, bucket: str, target_name: Optional[str] = None
     # Upload the file.
 
     try:
-        S3_CLIENT.upload_file(source_path, bucket, target_name)
-    except ClientError as error:
+        _client().upload_file(source_path, bucket, target_name)
+    except botocore_exceptions.ClientError as error:
         logging.error(error)
         return False
+    _forget(bucket, target_name)
     return True
@@ -2,49 +2,787 @@
 Unix-based, threaded, local file copying.
 """
 
+from __future__ import annotations
+
+import errno
+import fcntl
+import hashlib
+import json
 import logging
+import mmap
+import os
+import re
 import shutil
-from concurrent.futures import ThreadPoolExecutor, wait
+import stat
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager, nullcontext
+from fnmatch import translate
 from pathlib import Path
-from typing import List, Tuple
+from typing import (
+    TYPE_CHECKING,
+    ContextManager,
+    Dict,
+    Generator,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from uwtools.files.model import File
+
+
+# The most bytes to ask the kernel to copy in one call.
+CHUNK = 1024 * 1024 * 1024
+
+# The Linux ioctl request to share the blocks of one file with another.
+FICLONE = 0x40049409
+
+# The bytes read and written at once when copying through user space.
+BUFSIZE = 1024 * 1024
+
+# The bytes hashed from each block sampled from a file.
+SAMPLE_BLOCK = 1024 * 1024
+
+# Ways to stage a file, from cheapest to most expensive.
+STRATEGIES = ("reflink", "hardlink", "symlink", "copy")
+
+# A directory's entries: relative path -> (is a directory, size, modification time in ns).
+Entries = Dict[str, Tuple[bool, int, int]]
+
+# Errors with which a kernel-side copy reports that it cannot copy between the given files.
+UNSUPPORTED = {errno.EINVAL, errno.ENOSYS, errno.ENOTSUP, errno.EOPNOTSUPP, errno.EXDEV}
+
+
+class CopyResult(NamedTuple):
+    """
+    The outcome of copying one src->dst pair.
+    """
+
+    src: Path
+    dst: Path
+    size: int
+    seconds: float
+    error: Optional[str] = None
+    strategy: Optional[str] = None
+    queued: float = 0.0
+
+
+class SyncOptions(NamedTuple):
+    """
+    Options for incremental directory copies: see sync().
+    """
+
+    checksum: bool = False
+    delete: bool = False
 
-from uwtools.files.model import File
+
+class VerifyOptions(NamedTuple):
+    """
+    Options for verifying copies by checksum: see verify().
+    """
+
+    samples: int = 0
+
+
+class VerifyResult(NamedTuple):
+    """
+    The outcome of comparing a copied file with its source.
+    """
+
+    src: Path
+    dst: Path
+    ok: bool
+    src_digest: Optional[str] = None
+    dst_digest: Optional[str] = None
+    error: Optional[str] = None
+
+
+class WalkEntry(NamedTuple):
+    """
+    A file or directory found by walk(), with the result of statting it.
+    """
+
+    path: str
+    rel: str
+    stat: os.stat_result
+
+    @property
+    def is_dir(self) -> bool:
+        """
+        Whether the entry is a directory.
+        """
+        return stat.S_ISDIR(self.stat.st_mode)
 
 
-class Copier:
+class Copier:  # pylint: disable=too-many-instance-attributes
     """
-    A threaded file copier.
+    A threaded file copier, whose bounded pool of threads is reused by successive copies.
     """
 
-    def __init__(self, srcs: List[File], dsts: List[Path]) -> None:
-        self.pairs: List[Tuple[Path, Path]] = list(zip([Path(x.path) for x in srcs], dsts))
+    def __init__(
+        self,
+        srcs: Optional[List[File]] = None,
+        dsts: Optional[List[Path]] = None,
+        workers: int = 8,
+        fail_fast: bool = True,
+        strategies: Optional[Sequence[str]] = None,
+        incremental: Optional[SyncOptions] = None,
+        verification: Optional[VerifyOptions] = None,
+        throttle: Optional[Throttle] = None,
+    ) -> None:
+        """
+        :param srcs: The files or directories to copy with run().
+        :param dsts: The corresponding destinations.
+        :param workers: The number of pairs to copy concurrently.
+        :param fail_fast: Raise the first error, abandoning pairs not yet started, rather than
+            recording every pair's error in its result.
+        :param strategies: Stage files by the first of these strategies that works (see stage()),
+            rather than copying them.
+        :param incremental: Update existing destination directories incrementally, with these
+            options (see sync()), rather than replacing them.
+        :param verification: Verify each copy by checksum, with these options (see verify()),
+            treating a mismatch as an error.
+        :param throttle: Limit the bandwidth of, and the number of files in, copies.
+        """
+        self.pairs: List[Tuple[Path, Path]] = list(
+            zip([Path(x.path) for x in srcs or []], dsts or [])
+        )
+        self.workers = workers
+        self.fail_fast = fail_fast
+        self.strategies = strategies
+        self.incremental = incremental
+        self.verification = verification
+        self.throttle = throttle
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def __enter__(self) -> "Copier":
+        return self
 
-    def run(self) -> None:
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    # Private methods
+
+    def _copy(
+        self,
+        src: Path,
+        dst: Path,
+        failed: threading.Event,
+        strategies: Optional[Sequence[str]],
+        submitted: float,
+    ) -> Optional[CopyResult]:
+        """
+        Copy one pair, recording any error in its result unless failing fast.
+
+        :param src: The file or directory to copy.
+        :param dst: The destination.
+        :param failed: Set when failing fast, after which pairs are skipped, returning None.
+        :param strategies: Stage a file by the first of these strategies that works, if given.
+        :param submitted: When the copy was queued, by time.perf_counter().
+        """
+        if failed.is_set():
+            return None
+        start = time.perf_counter()
+        queued = start - submitted
+        try:
+            if strategies and src.is_file():
+                strategy = stage(src, dst, strategies, self.throttle)
+                size = src.stat().st_size
+            else:
+                strategy = "sync" if self.incremental and src.is_dir() else "copy"
+                size = _copy(src, dst, self.incremental, self.throttle)
+            if self.verification is not None:
+                for result in verify([(src, dst)], self.verification.samples, workers=1):
+                    if not result.ok:
+                        raise OSError(f"{result.dst} does not match {result.src}: {result.error}")
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            if self.fail_fast:
+                failed.set()
+                raise
+            logging.error("Could not copy %s to %s: %s", src, dst, e)
+            return CopyResult(src, dst, 0, time.perf_counter() - start, str(e), queued=queued)
+        seconds = time.perf_counter() - start
+        return CopyResult(src, dst, size, seconds, strategy=strategy, queued=queued)
+
+    # Public methods
+
+    def close(self) -> None:
+        """
+        Shut down the pool of threads, which is recreated if the copier is used again.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def copy(
+        self, pairs: List[Tuple[Path, Path]], strategies: Optional[Sequence[str]] = None
+    ) -> List[CopyResult]:
         """
-        Copy each src->dst pair in a thread.
+        Copy each src->dst pair in a thread, returning the outcome of each, in order.
+
+        :param pairs: The (file or directory, destination) pairs.
+        :param strategies: Staging strategies to use instead of those given to the constructor.
         """
-        executor = ThreadPoolExecutor()
-        futures = [executor.submit(_copy, src, dst) for src, dst in self.pairs]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        failed = threading.Event()
+        strategies = strategies or self.strategies
+        submitted = time.perf_counter()
+        futures = [
+            self._executor.submit(self._copy, src, dst, failed, strategies, submitted)
+            for src, dst in pairs
+        ]
         wait(futures)
+        results = [future.result() for future in futures]
+        return [result for result in results if result is not None]
+
+    def run(self) -> List[CopyResult]:
+        """
+        Copy each src->dst pair given to the constructor in a thread.
+        """
+        return self.copy(self.pairs)
+
+
+class Throttle:
+    """
+    A limit on the aggregate bandwidth of, and the number of files in, the copies sharing it.
+
+    Bandwidth is metered by a token bucket shared by the threads copying: each chunk copied takes
+    tokens for its bytes, and a thread that takes more tokens than the bucket holds sleeps until the
+    bucket would have refilled, so that copies proceed at a steady rate after an initial burst.
+    """
+
+    def __init__(
+        self,
+        bandwidth: Optional[float] = None,
+        files: Optional[int] = None,
+        burst: Optional[float] = None,
+    ) -> None:
+        """
+        :param bandwidth: The most bytes per second to copy, in aggregate, or None for no limit.
+        :param files: The most files to copy at once, or None for no limit.
+        :param burst: The capacity of the bucket, in bytes: the most that can be copied at once
+            without waiting, and the size of each chunk copied. Defaults to a tenth of a second of
+            bandwidth, and at least 64 KiB.
+        """
+        self.bandwidth = bandwidth
+        self.burst = int(burst or max((bandwidth or 0) / 10, 64 * 1024))
+        self._files: ContextManager = nullcontext()
+        if files:
+            self._files = threading.BoundedSemaphore(files)
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._time = time.monotonic()
+
+    # Public methods
+
+    @property
+    def chunk(self) -> int:
+        """
+        The most bytes to copy at once.
+        """
+        return CHUNK if self.bandwidth is None else self.burst
+
+    @contextmanager
+    def file(self) -> Iterator[None]:
+        """
+        Hold one of the slots for files being copied, waiting for one to be free.
+        """
+        with self._files:
+            yield
+
+    def take(self, size: int) -> None:
+        """
+        Take tokens for bytes copied, waiting as long as the bucket is in debt.
+
+        :param size: The number of bytes.
+        """
+        if self.bandwidth is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._time) * self.bandwidth)
+            self._time = now
+            self._tokens -= size
+            delay = -self._tokens / self.bandwidth
+        if delay > 0:
+            time.sleep(delay)
+
+
+def digest(path: Path, samples: int = 0) -> str:
+    """
+    The SHA-256 checksum of a file, read through a memory map.
 
+    Given a number of samples, only the file's size and that many evenly spaced blocks, from its
+    first to its last, are hashed, so that large files can be compared cheaply, if less thoroughly.
+    Files no bigger than the samples are hashed in full. Sampled checksums can only be compared with
+    others taken with the same number of samples.
 
-def copy(srcs: List[File], dsts: List[Path]) -> None:
+    :param path: The file.
+    :param samples: The number of blocks to hash, or 0 to hash the whole file.
+    """
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return sha256.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view:
+                if samples and size > samples * SAMPLE_BLOCK:
+                    sha256.update(str(size).encode())
+                    step = (size - SAMPLE_BLOCK) // max(samples - 1, 1)
+                    for offset in range(0, step * samples, step):
+                        sha256.update(view[offset : offset + SAMPLE_BLOCK])
+                else:
+                    sha256.update(view)
+    return sha256.hexdigest()
+
+
+def copy(
+    srcs: List[File], dsts: List[Path], throttle: Optional[Throttle] = None
+) -> List[CopyResult]:
     """
     Copies each source item to corresponding destination item.
     """
-    Copier(srcs, dsts).run()
+    with Copier(srcs, dsts, throttle=throttle) as copier:
+        return copier.run()
 
 
-def _copy(src: Path, dst: Path) -> None:
+def stage(
+    src: Path,
+    dst: Path,
+    strategies: Sequence[str] = STRATEGIES,
+    throttle: Optional[Throttle] = None,
+) -> str:
     """
-    Copies file or directory from source to destination.
+    Stage a file by the first of the given strategies that works, returning its name.
+
+    The strategies are: "reflink", a copy sharing the source's blocks until either is modified,
+    which needs a filesystem such as Btrfs or XFS; "hardlink", which needs the destination on the
+    same filesystem; "symlink", an absolute symbolic link; and "copy", a full copy. Any existing
+    destination file is replaced.
 
-    Directories are copied recursively.
+    :param src: The file to stage.
+    :param dst: The destination.
+    :param strategies: The strategies to try, in order.
+    :param throttle: Limit the bandwidth of a copy.
+    :raises: ValueError if a strategy is unknown, or the last error if no strategy works.
+    """
+    unknown = [strategy for strategy in strategies if strategy not in STRATEGIES]
+    if unknown or not strategies:
+        raise ValueError("Unknown staging strategies %s: use %s" % (unknown, ", ".join(STRATEGIES)))
+    if dst.is_symlink() or dst.is_file():
+        dst.unlink()
+    error: Optional[OSError] = None
+    for strategy in strategies:
+        try:
+            if strategy == "reflink":
+                _reflink(src, dst)
+            elif strategy == "hardlink":
+                os.link(src, dst)
+            elif strategy == "symlink":
+                os.symlink(src.resolve(), dst)
+            else:
+                _copy_file(src, dst, throttle)
+        except OSError as e:
+            logging.debug("Could not %s %s to %s: %s", strategy, src, dst, e)
+            error = e
+            if dst.is_symlink() or dst.is_file():
+                dst.unlink()
+            continue
+        logging.debug("Staged %s at %s by %s", src, dst, strategy)
+        return strategy
+    assert error is not None
+    raise error
+
+
+def sync(
+    src: Path,
+    dst: Path,
+    checksum: bool = False,
+    delete: bool = False,
+    workers: int = 8,
+    throttle: Optional[Throttle] = None,
+) -> int:
+    """
+    Incrementally update a copy of a directory, returning the number of bytes copied.
+
+    Only files that are new, or whose size or modification time differ, are copied, and given the
+    source's modification time. Both directory trees are scanned, and files copied, in parallel.
+
+    :param src: The directory to copy.
+    :param dst: The destination directory, which need not exist.
+    :param checksum: Compare files of the same size by checksum rather than by modification time.
+    :param delete: Delete destination files and directories that are not in the source.
+    :param workers: The number of threads with which to scan directories and copy files.
+    :param throttle: Limit the bandwidth of, and the number of files in, copies.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        srcs = _scan(src, workers)
+        dsts = _scan(dst, workers) if dst.is_dir() else {}
+        if dst.exists() and not dst.is_dir():
+            dst.unlink()
+        stale = [
+            rel for rel, (is_dir, _, _) in dsts.items() if rel in srcs and srcs[rel][0] != is_dir
+        ]
+        if delete:
+            stale += [rel for rel in dsts if rel not in srcs]
+        for rel in sorted(stale):
+            path = dst / rel
+            if dsts[rel][0] and path.is_dir():
+                shutil.rmtree(path)
+            elif path.exists():
+                path.unlink()
+            del dsts[rel]
+        dst.mkdir(parents=True, exist_ok=True)
+        for rel in sorted(rel for rel, (is_dir, _, _) in srcs.items() if is_dir):
+            (dst / rel).mkdir(exist_ok=True)
+        files = [rel for rel, (is_dir, _, _) in srcs.items() if not is_dir]
+        if checksum:
+            changed = list(executor.map(lambda rel: _changed(src, dst, rel, dsts), files))
+        else:
+            changed = [dsts.get(rel) != srcs[rel] for rel in files]
+        todo = [rel for rel, change in zip(files, changed) if change]
+        sizes = list(executor.map(lambda rel: _replace_file(src / rel, dst / rel, throttle), todo))
+    logging.debug(
+        "Synced %s to %s: copied %s of %s files, removed %s paths",
+        src,
+        dst,
+        len(todo),
+        len(files),
+        len(stale),
+    )
+    return sum(sizes)
+
+
+def verify(
+    pairs: Sequence[Tuple[Path, Path]],
+    samples: int = 0,
+    workers: int = 8,
+    report: Optional[Path] = None,
+) -> List[VerifyResult]:
+    """
+    Compare copied files with their sources by checksum, hashing files in parallel, returning the
+    outcome for each file.
+
+    A directory is compared file by file. A copy that is the same file as its source, e.g. a
+    hardlink or symlink to it, matches without being hashed, and one whose size differs from its
+    source's does not match.
+
+    :param pairs: The (file or directory, copy) pairs.
+    :param samples: Compare checksums of this many blocks of each file (see digest()), or of whole
+        files if 0.
+    :param workers: The number of files to compare concurrently.
+    :param report: Write a JSON report of the files that do not match to this file.
+    """
+    files = []
+    for src, dst in pairs:
+        if Path(src).is_dir():
+            for entry in walk(src, follow_symlinks=True):
+                if not entry.is_dir:
+                    files.append((Path(entry.path), Path(dst, entry.rel)))
+        else:
+            files.append((Path(src), Path(dst)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda pair: _verify(pair[0], pair[1], samples), files))
+    mismatches = [result for result in results if not result.ok]
+    for result in mismatches:
+        logging.error("%s does not match %s: %s", result.dst, result.src, result.error)
+    if report is not None:
+        with open(report, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "files": len(results),
+                    "samples": samples,
+                    "mismatches": [
+                        {**result._asdict(), "src": str(result.src), "dst": str(result.dst)}
+                        for result in mismatches
+                    ],
+                },
+                f,
+                indent=2,
+            )
+    return results
+
+
+def walk(
+    root: Union[Path, str],
+    pattern: Optional[str] = None,
+    workers: int = 1,
+    follow_symlinks: bool = False,
+) -> Generator[WalkEntry, None, None]:
+    """
+    Walk a directory tree, yielding each file and directory under it as it is found.
+
+    Each entry is statted once, and its stat result yielded with it. Walking serially, entries are
+    yielded depth-first, and memory use grows only with the depth of the tree. Walking in parallel,
+    entries are yielded in no particular order, and memory use grows with the size of the
+    directories being scanned at once.
+
+    :param root: The directory.
+    :param pattern: A glob pattern, e.g. "*.nc" or "INPUT/*.nc", which paths relative to the
+        directory must match to be yielded. As with fnmatch, "*" matches "/". Directories not
+        matching are still walked.
+    :param workers: The number of directories to scan concurrently.
+    :param follow_symlinks: Stat the targets of symlinks, and descend into symlinked directories.
+    """
+    root = str(root)
+    if workers > 1:
+        entries = _walk_parallel(root, workers, follow_symlinks)
+    else:
+        entries = _walk_serial(root, follow_symlinks)
+    regex = re.compile(translate(pattern)) if pattern else None
+    for entry in entries:
+        if regex is None or regex.match(entry.rel):
+            yield entry
+
+
+def _changed(src: Path, dst: Path, rel: str, dsts: Entries) -> bool:
+    """
+    Whether a source file differs in size or, by checksum, in content, from its copy.
+
+    :param src: The source directory.
+    :param dst: The destination directory.
+    :param rel: The file's path relative to both directories.
+    :param dsts: The destination directory's entries.
+    """
+    if rel not in dsts or (src / rel).stat().st_size != dsts[rel][1]:
+        return True
+    return digest(src / rel) != digest(dst / rel)
+
+
+def _copy(
+    src: Path,
+    dst: Path,
+    incremental: Optional[SyncOptions] = None,
+    throttle: Optional[Throttle] = None,
+) -> int:
+    """
+    Copies file or directory from source to destination, returning the number of bytes copied.
+
+    Directories are copied recursively: replacing the destination or, given options for an
+    incremental copy, updating it with sync().
     """
     logging.debug("Copying %s to %s", src, dst)
     if src.is_file():
-        shutil.copy(src, dst)
-    else:
-        if dst.is_dir():
-            shutil.rmtree(dst)
-        shutil.copytree(src, dst)
+        return _copy_file(src, dst, throttle)
+    if incremental is not None:
+        checksum, delete = incremental
+        return sync(src, dst, checksum=checksum, delete=delete, throttle=throttle)
+    if dst.is_dir():
+        shutil.rmtree(dst)
+    sizes = []
+    copy_function = lambda s, d: sizes.append(_copy_file(Path(s), Path(d), throttle))
+    shutil.copytree(src, dst, copy_function=copy_function)
+    return sum(sizes)
+
+
+def _copy_file(src: Path, dst: Path, throttle: Optional[Throttle] = None) -> int:
+    """
+    Copies a file's contents and permissions, returning the number of bytes copied.
+
+    The data is copied within the kernel, without passing through user-space buffers, where
+    possible: by copy_file_range(), which also lets filesystems share blocks or copy server-side,
+    or else by sendfile().
+
+    :param src: The file to copy.
+    :param dst: The destination file, or a directory to copy into.
+    :param throttle: Limit the bandwidth of the copy.
+    :raises: shutil.SameFileError if the destination is the source, or a link to it.
+    """
+    if dst.is_dir():
+        dst = dst / src.name
+    # Opening the destination for writing would truncate the source through the link.
+    if dst.exists() and os.path.samefile(src, dst):
+        raise shutil.SameFileError(f"{src} and {dst} are the same file")
+    with throttle.file() if throttle else nullcontext():
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            size = _kernel_copy(fsrc.fileno(), fdst.fileno(), throttle)
+            if size is None:
+                size = 0
+                bufsize = min(BUFSIZE, throttle.chunk) if throttle else BUFSIZE
+                for block in iter(lambda: fsrc.read(bufsize), b""):
+                    fdst.write(block)
+                    size += len(block)
+                    if throttle:
+                        throttle.take(len(block))
+    shutil.copymode(src, dst)
+    return size
+
+
+def _kernel_copy(infd: int, outfd: int, throttle: Optional[Throttle] = None) -> Optional[int]:
+    """
+    Copy between open files within the kernel, returning the bytes copied, or None if unsupported.
+
+    :param infd: The file descriptor to copy from.
+    :param outfd: The file descriptor to copy to.
+    :param throttle: Limit the bandwidth of the copy.
+    """
+    chunk = throttle.chunk if throttle else CHUNK
+    for name in ("copy_file_range", "sendfile"):
+        if not hasattr(os, name):
+            continue  # pragma: no cover
+        copied = 0
+        try:
+            while True:
+                if name == "copy_file_range":
+                    n = os.copy_file_range(infd, outfd, chunk)
+                else:
+                    n = os.sendfile(outfd, infd, copied, chunk)
+                if n == 0:
+                    return copied
+                copied += n
+                if throttle:
+                    throttle.take(n)
+        except OSError as e:
+            if copied or e.errno not in UNSUPPORTED:
+                raise
+    return None
+
+
+def _reflink(src: Path, dst: Path) -> None:
+    """
+    Make a copy of a file that shares its blocks, on filesystems supporting it.
+
+    :param src: The file to copy.
+    :param dst: The destination file.
+    """
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    shutil.copymode(src, dst)
+
+
+def _replace_file(src: Path, dst: Path, throttle: Optional[Throttle] = None) -> int:
+    """
+    Replaces a file with a copy of another, with the same modification time, returning its size.
+
+    The destination is removed first, so that a hard or symbolic link is replaced, not written
+    through.
+
+    :param src: The file to copy.
+    :param dst: The file to replace, which need not exist.
+    :param throttle: Limit the bandwidth of the copy.
+    """
+    if dst.is_symlink() or dst.exists():
+        dst.unlink()
+    size = _copy_file(src, dst, throttle)
+    shutil.copystat(src, dst)
+    return size
+
+
+def _scan(root: Path, workers: int) -> Entries:
+    """
+    The directories and files under a directory, scanning its subdirectories in parallel.
+
+    :param root: The directory.
+    :param workers: The number of directories to scan concurrently.
+    """
+    entries: Entries = {}
+    for entry in walk(root, workers=workers, follow_symlinks=True):
+        info = entry.stat
+        is_dir = entry.is_dir
+        entries[entry.rel] = (
+            is_dir,
+            0 if is_dir else info.st_size,
+            0 if is_dir else info.st_mtime_ns,
+        )
+    return entries
+
+
+def _scandir(path: str, rel: str, follow_symlinks: bool) -> Generator[WalkEntry, None, None]:
+    """
+    The entries of one directory, each statted once.
+
+    :param path: The directory.
+    :param rel: Its path relative to the root of the walk.
+    :param follow_symlinks: Stat the targets of symlinks, and descend into symlinked directories.
+    """
+    with os.scandir(path) as it:
+        for entry in it:
+            info = entry.stat(follow_symlinks=follow_symlinks)
+            yield WalkEntry(entry.path, os.path.join(rel, entry.name), info)
+
+
+def _verify(src: Path, dst: Path, samples: int) -> VerifyResult:
+    """
+    Compare a copied file with its source.
+
+    :param src: The source file.
+    :param dst: The copy.
+    :param samples: The number of blocks to compare (see digest()), or 0 to compare whole files.
+    """
+    try:
+        if os.path.samefile(src, dst):
+            return VerifyResult(src, dst, True)
+        sizes = (src.stat().st_size, dst.stat().st_size)
+        if sizes[0] != sizes[1]:
+            return VerifyResult(src, dst, False, error="size %s differs from %s" % sizes[::-1])
+        digests = (digest(src, samples), digest(dst, samples))
+    except OSError as e:
+        return VerifyResult(src, dst, False, error=str(e))
+    if digests[0] != digests[1]:
+        return VerifyResult(src, dst, False, *digests, error="checksum differs")
+    return VerifyResult(src, dst, True, *digests)
+
+
+def _walk_parallel(root: str, workers: int, follow_symlinks: bool) -> Iterator[WalkEntry]:
+    """
+    Walk a directory tree, scanning up to a given number of directories concurrently.
+
+    :param root: The directory.
+    :param workers: The number of directories to scan concurrently.
+    :param follow_symlinks: Stat the targets of symlinks, and descend into symlinked directories.
+    """
+
+    def scan(path: str, rel: str) -> List[WalkEntry]:
+        return list(_scandir(path, rel, follow_symlinks))
+
+    todo = [(root, "")]
+    pending: Set[Future] = set()
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        while todo or pending:
+            while todo and len(pending) < workers:
+                pending.add(executor.submit(scan, *todo.pop()))
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for entry in future.result():
+                    if entry.is_dir:
+                        todo.append((entry.path, entry.rel))
+                    yield entry
+    finally:
+        # Stop scanning if the walk is abandoned early: ThreadPoolExecutor.shutdown() only accepts
+        # cancel_futures from Python 3.9.
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def _walk_serial(root: str, follow_symlinks: bool) -> Iterator[WalkEntry]:
+    """
+    Walk a directory tree depth-first, holding open only the directories on the current path.
+
+    :param root: The directory.
+    :param follow_symlinks: Stat the targets of symlinks, and descend into symlinked directories.
+    """
+    stack = [_scandir(root, "", follow_symlinks)]
+    try:
+        while stack:
+            entry = next(stack[-1], None)
+            if entry is None:
+                stack.pop()
+                continue
+            yield entry
+            if entry.is_dir:
+                stack.append(_scandir(entry.path, entry.rel, follow_symlinks))
+    finally:
+        for entries in stack:
+            entries.close()
@@ -1,10 +1,14 @@
-import os
-import pathlib
+import time
 from abc import ABC, abstractmethod
-from typing import List
+from pathlib import Path
+from typing import List, Optional, Sequence, TypeVar, Union
 
 from uwtools.files.gateway import s3, unix
+from uwtools.files.metrics import Metrics
 from uwtools.files.model import S3, File, Prefixes
+from uwtools.files.store import Store
+
+Results = TypeVar("Results", List[s3.TransferResult], List[unix.CopyResult])
 
 
 class FileManager(ABC):
@@ -12,6 +16,8 @@ class FileManager(ABC):
     Represents file operations in an environment.
     """
 
+    metrics: Optional[Metrics] = None
+
     @abstractmethod  # pragma: no cover
     def copy(self, source: List[File], destination: List):
         """
@@ -30,18 +36,51 @@ class FileManager(ABC):
         }
         return _map[_type]()
 
+    def _record(self, results: Results, start: float) -> Results:
+        """
+        Record the metrics of a batch of transfers, if collecting metrics, returning their outcomes.
+
+        :param results: The outcomes of the transfers.
+        :param start: When the batch started, by time.perf_counter().
+        """
+        if self.metrics is not None:
+            self.metrics.record(results, time.perf_counter() - start)
+        return results
+
 
 class S3FileManager(FileManager):
     """
     S3 based file operations.
     """
 
-    def copy(self, source: List[File], destination: List[S3]):
+    def __init__(self, workers: int = 8, metrics: Optional[Metrics] = None) -> None:
         """
-        Copies source to destination.
+        :param workers: The number of objects to transfer concurrently.
+        :param metrics: Metrics to record each transfer in.
+        """
+        self.workers = workers
+        self.metrics = metrics
+
+    def copy(
+        self, source: Sequence[File], destination: Sequence[Union[File, str]]
+    ) -> List[s3.TransferResult]:
+        """
+        Copies source to destination concurrently, returning the outcome of each copy.
+
+        Local sources are uploaded to S3 destinations, given as S3 files or, as they need not exist
+        yet, s3:// URIs. S3 sources are downloaded to local destinations, given as Unix files or
+        paths.
         """
+        start = time.perf_counter()
+        transfer = s3.Transfer(workers=self.workers)
         for src, dest in zip(source, destination):
-            s3.upload_file(src.path, "bucket_name_here", os.path.basename(dest.path))
+            if isinstance(src, S3):
+                transfer.download(
+                    src.bucket, src.key, dest.path if isinstance(dest, File) else dest
+                )
+            else:
+                transfer.upload(src.path, *s3.parse_uri(str(dest)))
+        return self._record(transfer.run(), start)
 
 
 class UnixFileManager(FileManager):
@@ -49,5 +88,29 @@ class UnixFileManager(FileManager):
     UNIX based file operations.
     """
 
-    def copy(self, source: List[File], destination: List[str]):
-        unix.copy(list(source), [pathlib.Path(x) for x in list(destination)])
+    def __init__(
+        self,
+        store: Optional[Store] = None,
+        metrics: Optional[Metrics] = None,
+        throttle: Optional[unix.Throttle] = None,
+    ) -> None:
+        """
+        :param store: A content-addressed store through which to stage files, rather than copying
+            them.
+        :param metrics: Metrics to record each copy in.
+        :param throttle: Limit the bandwidth of, and the number of files in, copies.
+        """
+        self.store = store
+        self.metrics = metrics
+        self.throttle = throttle
+
+    def copy(self, source: List[File], destination: List[str]) -> List[unix.CopyResult]:
+        """
+        Copies source to destination concurrently, returning the outcome of each copy.
+        """
+        start = time.perf_counter()
+        if self.store is not None:
+            pairs = [(Path(x.path), Path(y)) for x, y in zip(source, destination)]
+            return self._record(self.store.stage(pairs, throttle=self.throttle), start)
+        dsts = [Path(x) for x in list(destination)]
+        return self._record(unix.copy(list(source), dsts, self.throttle), start)
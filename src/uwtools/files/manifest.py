@@ -0,0 +1,205 @@
+"""
+A persistent manifest of directory trees, for detecting what changed in them between runs.
+"""
+
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+from uwtools.files.gateway import unix
+from uwtools.files.model import Unix
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    root TEXT NOT NULL,
+    rel TEXT NOT NULL,
+    is_dir INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT,
+    PRIMARY KEY (root, rel)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS changes (
+    root TEXT NOT NULL,
+    rel TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    PRIMARY KEY (root, rel)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS trees (
+    root TEXT PRIMARY KEY,
+    updated REAL NOT NULL
+);
+"""
+
+
+class Change(NamedTuple):
+    """
+    A file or directory added to, modified in, or removed from a tree.
+    """
+
+    rel: str
+    kind: str
+
+
+class Manifest:
+    """
+    A SQLite database of the paths, sizes, modification times and, optionally, SHA-256 digests of
+    the files in directory trees.
+
+    Each update walks a tree once, in parallel, and compares it with the recorded entries in the
+    database rather than in memory, so that trees of any size can be compared. Only entries that
+    changed are rewritten, and files are hashed only if new or, by size or modification time,
+    changed. The changes found are recorded, so that what changed at the last update can be looked
+    up without touching the tree.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """
+        :param path: The database file, created if necessary.
+        """
+        self.path = Path(path)
+        self._db = sqlite3.connect(self.path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+
+    def __enter__(self) -> "Manifest":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    # Private methods
+
+    def _digests(self, root: str, rels: List[str], workers: int) -> Iterator[Tuple[str, str]]:
+        """
+        The (digest, path) pairs of files, hashed in parallel.
+
+        :param root: The tree's root directory.
+        :param rels: The files' paths relative to it.
+        :param workers: The number of files to hash concurrently.
+        """
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            digests = executor.map(lambda rel: unix.digest(Path(root, rel)), rels)
+            yield from zip(digests, rels)
+
+    # Public methods
+
+    def changes(self, tree: Unix) -> Optional[List[Change]]:
+        """
+        The changes found by the last update of a tree, or None if it has never been updated.
+
+        :param tree: The tree's root directory.
+        """
+        root = str(Path(tree.path).resolve())
+        if self.updated(tree) is None:
+            return None
+        rows = self._db.execute(
+            "SELECT rel, kind FROM changes WHERE root = ? ORDER BY rel", (root,)
+        )
+        return [Change(*row) for row in rows]
+
+    def close(self) -> None:
+        """
+        Close the database.
+        """
+        self._db.close()
+
+    def update(self, tree: Unix, checksum: bool = False, workers: int = 8) -> List[Change]:
+        """
+        Record the current state of a tree, returning what changed since the last update.
+
+        On the first update of a tree, all its entries are added. A directory is modified only if
+        replaced by a file, or vice versa.
+
+        :param tree: The tree's root directory.
+        :param checksum: Record files' digests, and report a file whose size or modification time
+            changed as modified only if its digest changed too.
+        :param workers: The number of directories to scan, and files to hash, concurrently.
+        """
+        root = str(Path(tree.path).resolve())
+        db = self._db
+        with db:
+            db.execute("DROP TABLE IF EXISTS temp.seen")
+            db.execute(
+                "CREATE TEMP TABLE seen (rel TEXT PRIMARY KEY, is_dir INTEGER, size INTEGER,"
+                " mtime_ns INTEGER, digest TEXT) WITHOUT ROWID"
+            )
+            db.executemany(
+                "INSERT INTO seen VALUES (?, ?, ?, ?, NULL)",
+                (
+                    (e.rel, e.is_dir, 0 if e.is_dir else e.stat.st_size)
+                    + (0 if e.is_dir else e.stat.st_mtime_ns,)
+                    for e in tree.walk(workers=workers)
+                ),
+            )
+            # Carry recorded digests over to files whose size and modification time are unchanged.
+            db.execute(
+                "UPDATE seen SET digest = (SELECT digest FROM files f WHERE f.root = ? AND f.rel ="
+                " seen.rel AND f.is_dir = seen.is_dir AND f.size = seen.size AND f.mtime_ns ="
+                " seen.mtime_ns)",
+                (root,),
+            )
+            if checksum:
+                rels = [
+                    rel
+                    for (rel,) in db.execute(
+                        "SELECT rel FROM seen WHERE digest IS NULL AND NOT is_dir"
+                    )
+                ]
+                db.executemany(
+                    "UPDATE seen SET digest = ? WHERE rel = ?", self._digests(root, rels, workers)
+                )
+            changes = [
+                Change(rel, "added")
+                for (rel,) in db.execute(
+                    "SELECT rel FROM seen WHERE rel NOT IN (SELECT rel FROM files WHERE root = ?)",
+                    (root,),
+                )
+            ]
+            changes += [
+                Change(rel, "removed")
+                for (rel,) in db.execute(
+                    "SELECT rel FROM files WHERE root = ? AND rel NOT IN (SELECT rel FROM seen)",
+                    (root,),
+                )
+            ]
+            changes += [
+                Change(rel, "modified")
+                for rel, is_dir, was_dir, new, old in db.execute(
+                    "SELECT s.rel, s.is_dir, f.is_dir, s.digest, f.digest FROM seen s JOIN files f"
+                    " ON f.root = ? AND f.rel = s.rel WHERE f.is_dir != s.is_dir OR f.size !="
+                    " s.size OR f.mtime_ns != s.mtime_ns",
+                    (root,),
+                )
+                if is_dir != was_dir or not checksum or old is None or new != old
+            ]
+            db.execute(
+                "DELETE FROM files WHERE root = ? AND rel NOT IN (SELECT rel FROM seen)", (root,)
+            )
+            db.execute(
+                "INSERT OR REPLACE INTO files SELECT ?, s.* FROM seen s LEFT JOIN files f ON f.root"
+                " = ? AND f.rel = s.rel WHERE f.rel IS NULL OR f.is_dir != s.is_dir OR f.size !="
+                " s.size OR f.mtime_ns != s.mtime_ns OR f.digest IS NOT s.digest",
+                (root, root),
+            )
+            db.execute("DELETE FROM changes WHERE root = ?", (root,))
+            db.executemany(
+                "INSERT OR REPLACE INTO changes VALUES (?, ?, ?)",
+                [(root, change.rel, change.kind) for change in changes],
+            )
+            db.execute("INSERT OR REPLACE INTO trees VALUES (?, ?)", (root, time.time()))
+            db.execute("DROP TABLE temp.seen")
+        return sorted(changes)
+
+    def updated(self, tree: Unix) -> Optional[float]:
+        """
+        The time of the last update of a tree, in seconds since the epoch, or None if it has never
+        been updated.
+
+        :param tree: The tree's root directory.
+        """
+        root = str(Path(tree.path).resolve())
+        row = self._db.execute("SELECT updated FROM trees WHERE root = ?", (root,)).fetchone()
+        return None if row is None else row[0]
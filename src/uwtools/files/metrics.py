@@ -0,0 +1,172 @@
+"""
+Metrics of file transfers, for tuning the number of workers to each filesystem.
+"""
+
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import IO, List, NamedTuple, Optional, Sequence, Union
+
+from uwtools.files.gateway import s3, unix
+
+GB = 1000**3
+
+Result = Union[s3.TransferResult, unix.CopyResult]
+
+
+class Metric(NamedTuple):
+    """
+    The metrics of one transfer.
+    """
+
+    source: str
+    destination: str
+    size: int
+    seconds: float
+    queued: float
+    retries: int
+    error: Optional[str] = None
+
+    @property
+    def throughput(self) -> float:
+        """
+        The transfer's throughput in bytes per second.
+        """
+        return self.size / self.seconds if self.seconds > 0 else 0.0
+
+
+class Summary(NamedTuple):
+    """
+    The metrics of a run of transfers.
+    """
+
+    transfers: int
+    errors: int
+    size: int
+    seconds: float
+    queued: float
+    retries: int
+    slowest: List[Metric]
+
+    @property
+    def throughput(self) -> float:
+        """
+        The aggregate throughput in bytes per second, over the wall time of the transfers.
+        """
+        return self.size / self.seconds if self.seconds > 0 else 0.0
+
+
+class Metrics:
+    """
+    Collects the metrics of file transfers, optionally writing each as a line of JSON to a sink.
+
+    A run may comprise several batches of concurrent transfers, e.g. several FileManager copies.
+    Its aggregate throughput is over the wall time of the batches, not the sum of the times of the
+    transfers, which overlap.
+    """
+
+    def __init__(self, sink: Optional[Path] = None, slowest: int = 10) -> None:
+        """
+        :param sink: A file to append JSON lines to: one per transfer, and a summary on close().
+        :param slowest: The number of slowest transfers to keep for the summary.
+        """
+        self.metrics: List[Metric] = []
+        self.seconds = 0.0
+        self.slowest = slowest
+        self._lock = threading.Lock()
+        self._sink: Optional[IO[str]] = None
+        if sink is not None:
+            self._sink = open(sink, "a", encoding="utf-8")  # pylint: disable=consider-using-with
+
+    def __enter__(self) -> "Metrics":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    # Private methods
+
+    def _write(self, record: dict) -> None:
+        """
+        Write a JSON line to the sink, if any.
+
+        :param record: The line's contents.
+        """
+        if self._sink is not None:
+            self._sink.write(json.dumps(record) + "\n")
+
+    # Public methods
+
+    def close(self) -> None:
+        """
+        Log the summary and, if there is a sink, write it there and close the sink.
+        """
+        summary = self.summary()
+        msg = "Transferred %s bytes in %s files (%s errors) in %.3fs: %.3f GB/s"
+        args = (summary.size, summary.transfers, summary.errors, summary.seconds)
+        logging.info(msg, *args, summary.throughput / GB)
+        for metric in summary.slowest:
+            logging.info(
+                "%.3fs (%.3fs queued) %s to %s",
+                metric.seconds,
+                metric.queued,
+                metric.source,
+                metric.destination,
+            )
+        with self._lock:
+            if self._sink is not None:
+                record = summary._asdict()
+                record["slowest"] = [metric._asdict() for metric in summary.slowest]
+                self._write({"summary": {**record, "gb_per_second": summary.throughput / GB}})
+                self._sink.close()
+                self._sink = None
+
+    def record(self, results: Sequence[Result], seconds: float) -> List[Metric]:
+        """
+        Record the outcomes of a batch of concurrent transfers, returning their metrics.
+
+        :param results: The outcomes of the transfers.
+        :param seconds: The wall time of the batch.
+        """
+        metrics = []
+        for result in results:
+            if isinstance(result, s3.TransferResult):
+                source, destination, retries = result.source, result.destination, result.retries
+            else:
+                source, destination, retries = str(result.src), str(result.dst), 0
+            metrics.append(
+                Metric(
+                    source,
+                    destination,
+                    result.size,
+                    result.seconds,
+                    result.queued,
+                    retries,
+                    result.error,
+                )
+            )
+        with self._lock:
+            self.metrics += metrics
+            self.seconds += seconds
+            for metric in metrics:
+                self._write({**metric._asdict(), "throughput": metric.throughput})
+            if self._sink is not None:
+                self._sink.flush()
+        return metrics
+
+    def summary(self) -> Summary:
+        """
+        Summarize the transfers recorded so far.
+        """
+        with self._lock:
+            metrics = list(self.metrics)
+        return Summary(
+            transfers=len(metrics),
+            errors=sum(metric.error is not None for metric in metrics),
+            size=sum(metric.size for metric in metrics),
+            seconds=self.seconds,
+            queued=sum(metric.queued for metric in metrics),
+            retries=sum(metric.retries for metric in metrics),
+            slowest=sorted(metrics, key=lambda metric: -metric.seconds)[: self.slowest],
+        )
@@ -1,8 +1,12 @@
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
 from enum import Enum
 from glob import glob
 from pathlib import Path
-from typing import Any, List
+from typing import Any, Iterator, List, Optional
+
+from uwtools.files.gateway import s3, unix
 
 
 class Prefixes(Enum):
@@ -73,6 +77,13 @@ class S3(File):
     Represents an AWS S3 file.
     """
 
+    @property
+    def bucket(self) -> str:
+        """
+        Returns the bucket named in an s3://bucket/key URI.
+        """
+        return s3.parse_uri(self._uri)[0]
+
     @property
     def dir(self) -> List[Any]:
         """
@@ -80,12 +91,49 @@ class S3(File):
         """
         return []
 
+    @property
+    def etag(self) -> str:
+        """
+        Returns the object's ETag.
+        """
+        return self._stat().etag
+
     @property
     def exists(self) -> bool:
         """
         Returns true if the file exists.
         """
-        return True
+        return self._info is not None
+
+    @property
+    def key(self) -> str:
+        """
+        Returns the object key named in an s3://bucket/key URI, which may be empty.
+        """
+        return s3.parse_uri(self._uri)[1]
+
+    @property
+    def size(self) -> int:
+        """
+        Returns the object's size in bytes.
+        """
+        return self._stat().size
+
+    @property
+    def _info(self) -> Optional[s3.ObjectInfo]:
+        """
+        The object's metadata, from a cached listing of its prefix, or None if it does not exist.
+        """
+        return s3.stat(self.bucket, [self.key])[self.key]
+
+    def _stat(self) -> s3.ObjectInfo:
+        """
+        The object's metadata.
+        """
+        info = self._info
+        if info is None:
+            raise FileNotFoundError("File not found: %s" % self._uri)
+        return info
 
     @property
     def uri_prefix(self) -> str:
@@ -103,7 +151,7 @@ class Unix(File):
     @property
     def dir(self) -> List[Any]:
         """
-        Returns the contents of the directory recursively.
+        Returns the file, or the top-level contents of the directory (see walk()).
         """
         if Path(self.path).is_file():
             return glob(self.path)
@@ -122,3 +170,25 @@ class Unix(File):
         The URI prefix for this file type.
         """
         return Prefixes.UNIX.value
+
+    def walk(
+        self, pattern: Optional[str] = None, workers: int = 1, follow_symlinks: bool = False
+    ) -> Iterator[unix.WalkEntry]:
+        """
+        Yields the file, or every file and directory under the directory, with its stat result.
+
+        Entries are found by scanning directories as they are walked, and are not themselves File
+        objects, so that walking a large directory tree stats each entry only once, and holds
+        little of the tree in memory (see unix.walk()).
+
+        :param pattern: A glob pattern that paths relative to the directory must match.
+        :param workers: The number of directories to scan concurrently.
+        :param follow_symlinks: Stat the targets of symlinks, and descend into symlinked
+            directories.
+        """
+        path = Path(self.path)
+        if path.is_dir():
+            yield from unix.walk(path, pattern, workers, follow_symlinks)
+        else:
+            info = path.stat() if follow_symlinks else path.lstat()
+            yield unix.WalkEntry(str(path), path.name, info)
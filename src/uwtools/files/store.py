@@ -0,0 +1,237 @@
+"""
+A content-addressed store of files, shared by run directories.
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import stat
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from uwtools.files.gateway import unix
+
+# Strategies that leave a staged file referring to the store's copy.
+LINKS = ("reflink", "hardlink", "symlink")
+
+
+class GCResult(NamedTuple):
+    """
+    The outcome of a garbage collection.
+    """
+
+    objects: int
+    size: int
+    refs: int
+
+
+class Store:
+    """
+    A directory of files named by the SHA-256 digests of their contents.
+
+    Each distinct file is stored once, read-only, and staged into run directories by reflink or
+    hardlink where possible. Each source file is hashed once: its digest is indexed by its path and
+    stat signature. Each staged file is recorded as a reference to the stored file, so that stored
+    files no run directory refers to can be garbage-collected. Storing and staging lock the store
+    shared, and garbage collection exclusively, so that they can safely run concurrently.
+    """
+
+    def __init__(self, root: Path) -> None:
+        """
+        :param root: The store's directory, created if necessary.
+        """
+        self.root = Path(root)
+        for subdir in ("index", "objects", "refs", "tmp"):
+            (self.root / subdir).mkdir(parents=True, exist_ok=True)
+
+    # Private methods
+
+    def _alive(self, ref: Dict[str, Any]) -> bool:
+        """
+        Whether a staged file is still in place.
+
+        :param ref: The reference recorded when the file was staged.
+        """
+        try:
+            info = os.lstat(ref["path"])
+        except FileNotFoundError:
+            return False
+        return (info.st_dev, info.st_ino) == (ref["dev"], ref["ino"])
+
+    def _add(self, src: Path, throttle: Optional[unix.Throttle] = None) -> Path:
+        """
+        Store a file, if not already stored, returning the path to the stored file. The caller must
+        hold a lock on the store.
+
+        :param src: The file to store.
+        :param throttle: Limit the bandwidth of a copy into the store.
+        """
+        src = Path(src)
+        info = src.stat()
+        signature = {"dev": info.st_dev, "ino": info.st_ino}
+        signature.update({"mtime_ns": info.st_mtime_ns, "size": info.st_size})
+        index = self._index_path(src)
+        try:
+            entry = json.loads(index.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            entry = {}
+        if entry and all(entry.get(k) == v for k, v in signature.items()):
+            obj = self.object_path(entry["digest"])
+            if obj.is_file():
+                return obj
+        # Hash the store's own copy, so that its digest is right even if the source is changing.
+        tmp = self.root / "tmp" / uuid.uuid4().hex
+        unix.stage(src, tmp, ("reflink", "copy"), throttle)
+        os.chmod(tmp, stat.S_IMODE(tmp.stat().st_mode) & ~0o222)
+        digest = unix.digest(tmp)
+        obj = self.object_path(digest)
+        obj.parent.mkdir(exist_ok=True)
+        if obj.is_file():
+            tmp.unlink()
+        else:
+            os.replace(tmp, obj)
+            logging.debug("Stored %s as %s", src, digest)
+        if src.stat().st_mtime_ns == info.st_mtime_ns:
+            self._write_json(index, {**signature, "digest": digest})
+        return obj
+
+    def _index_path(self, path: Path) -> Path:
+        """
+        The index entry for a source file.
+
+        :param path: The source file.
+        """
+        return self.root / "index" / f"{_hash_str(str(path.resolve()))}.json"
+
+    @contextmanager
+    def _lock(self, operation: int) -> Iterator[None]:
+        """
+        Hold a lock on the store.
+
+        :param operation: fcntl.LOCK_SH or fcntl.LOCK_EX.
+        """
+        with open(self.root / "lock", "a", encoding="utf-8") as f:
+            fcntl.flock(f.fileno(), operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _reference(self, obj: Path, dst: Path) -> None:
+        """
+        Record that a staged file refers to a stored file.
+
+        :param obj: The stored file.
+        :param dst: The staged file.
+        """
+        path = os.path.abspath(dst)
+        info = os.lstat(path)
+        ref = {"digest": obj.name, "path": path, "dev": info.st_dev, "ino": info.st_ino}
+        self._write_json(self.root / "refs" / f"{_hash_str(path)}.json", ref)
+
+    def _write_json(self, path: Path, data: Dict[str, Any]) -> None:
+        """
+        Atomically replace a JSON file.
+
+        :param path: The file.
+        :param data: Its contents.
+        """
+        tmp = self.root / "tmp" / uuid.uuid4().hex
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp, path)
+
+    # Public methods
+
+    def add(self, src: Path, throttle: Optional[unix.Throttle] = None) -> Path:
+        """
+        Store a file, if not already stored, returning the path to the stored file.
+
+        :param src: The file to store.
+        :param throttle: Limit the bandwidth of a copy into the store.
+        """
+        with self._lock(fcntl.LOCK_SH):
+            return self._add(src, throttle)
+
+    def gc(self, dry_run: bool = False) -> GCResult:
+        """
+        Remove stored files that no staged file refers to, returning what was, or would be, removed.
+
+        :param dry_run: Only report what would be removed.
+        """
+        with self._lock(fcntl.LOCK_EX):
+            live, dead = set(), []
+            for path in (self.root / "refs").glob("*.json"):
+                ref = json.loads(path.read_text(encoding="utf-8"))
+                if self._alive(ref):
+                    live.add(ref["digest"])
+                else:
+                    dead.append(path)
+            objects = [obj for obj in (self.root / "objects").glob("*/*") if obj.name not in live]
+            size = sum(obj.stat().st_size for obj in objects)
+            if not dry_run:
+                for path in [*dead, *objects, *(self.root / "tmp").iterdir()]:
+                    path.unlink()
+                for path in (self.root / "index").glob("*.json"):
+                    digest = json.loads(path.read_text(encoding="utf-8"))["digest"]
+                    if not self.object_path(digest).is_file():
+                        path.unlink()
+        return GCResult(len(objects), size, len(dead))
+
+    def object_path(self, digest: str) -> Path:
+        """
+        The path to a stored file.
+
+        :param digest: The SHA-256 digest of the file's contents.
+        """
+        return self.root / "objects" / digest[:2] / digest
+
+    def stage(
+        self,
+        pairs: List[Tuple[Path, Path]],
+        strategies: Sequence[str] = ("reflink", "hardlink", "copy"),
+        workers: int = 8,
+        verify: Optional[unix.VerifyOptions] = None,
+        throttle: Optional[unix.Throttle] = None,
+    ) -> List[unix.CopyResult]:
+        """
+        Stage files via the store, in parallel, returning the outcome of each.
+
+        Each file is stored, if not already, and its stored copy staged by the first of the given
+        strategies that works (see unix.stage()). Files staged by reflink, hardlink or symlink are
+        recorded as referring to the stored copy. Staged files are read-only, as hardlinks share the
+        stored copy's permissions.
+
+        :param pairs: The (file, destination) pairs.
+        :param strategies: The strategies to try, in order.
+        :param workers: The number of files to store and stage concurrently.
+        :param verify: Verify each staged file against the stored copy, with these options (see
+            unix.verify()).
+        :param throttle: Limit the bandwidth of, and the number of files in, copies into and out of
+            the store.
+        """
+        with self._lock(fcntl.LOCK_SH):
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                srcs = [src for src, _ in pairs]
+                objects = list(executor.map(self._add, srcs, [throttle] * len(srcs)))
+            with unix.Copier(
+                workers=workers, strategies=strategies, verification=verify, throttle=throttle
+            ) as copier:
+                results = copier.copy([(obj, dst) for obj, (_, dst) in zip(objects, pairs)])
+            for obj, result in zip(objects, results):
+                if result.strategy in LINKS:
+                    self._reference(obj, result.dst)
+        return [result._replace(src=src) for (src, _), result in zip(pairs, results)]
+
+
+def _hash_str(s: str) -> str:
+    """
+    The SHA-256 digest of a string.
+
+    :param s: The string.
+    """
+    return hashlib.sha256(s.encode("utf-8")).hexdigest()
@@ -4,12 +4,15 @@ Template classes.
 
 import logging
 import os
-from typing import Optional
+from functools import lru_cache
+from typing import FrozenSet, Mapping, Optional, Tuple
 
-from jinja2 import BaseLoader, Environment, FileSystemLoader, meta
+from jinja2 import BaseLoader, Environment, FileSystemLoader, Template, meta
 
 from uwtools import logger
 
+TEMPLATE_CACHE_SIZE = 4096
+
 
 def register_filters(j2env):
     """
@@ -26,6 +29,57 @@ def path_join(arg):
     return os.path.join(*arg)
 
 
+@lru_cache(maxsize=None)
+def _environment(loader_args: Tuple) -> Environment:
+    """
+    Returns a shared Jinja2 environment for string templates with the given loader arguments.
+
+    :param loader_args: Sorted (name, value) pairs of arguments to pass to the J2 loader.
+    """
+    j2env = Environment(loader=BaseLoader(), **dict(loader_args))
+    register_filters(j2env)
+    return j2env
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _template(template_str: str, loader_args: Tuple) -> Template:
+    """
+    Returns a compiled Jinja2 template, shared by every caller using the same string and loader
+    arguments.
+
+    :param template_str: A Jinja2 template.
+    :param loader_args: Sorted (name, value) pairs of arguments to pass to the J2 loader.
+    """
+    return _environment(loader_args).from_string(template_str)
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _variables(template_str: str, loader_args: Tuple) -> FrozenSet[str]:
+    """
+    Returns the names of the variables a template refers to, other than those it sets itself.
+
+    :param template_str: A Jinja2 template.
+    :param loader_args: Sorted (name, value) pairs of arguments to pass to the J2 loader.
+    """
+    ast = _environment(loader_args).parse(template_str)
+    return frozenset(meta.find_undeclared_variables(ast))
+
+
+def template_cache_clear() -> None:
+    """
+    Empties the compiled-template cache and resets its counters.
+    """
+    _template.cache_clear()
+    _variables.cache_clear()
+
+
+def template_cache_info():
+    """
+    Returns the hits, misses, maximum size, and current size of the compiled-template cache.
+    """
+    return _template.cache_info()  # pylint: disable=no-value-for-parameter
+
+
 class J2Template:
     """
     This class reads in Jinja templates from files or strings, and renders the template given the
@@ -34,7 +88,7 @@ class J2Template:
     Attributes
     ----------
 
-    configure_obj : dict
+    configure_obj : Mapping
         The key/value pairs needed to fill in the provided template.
         Defaults to the user's shell environment.
 
@@ -63,7 +117,7 @@ class J2Template:
 
     def __init__(
         self,
-        configure_obj: dict,
+        configure_obj: Mapping,
         template_path: Optional[str] = None,
         template_str: Optional[str] = None,
         **kwargs,
@@ -133,24 +187,37 @@ class J2Template:
         """
         Load the Jinja2 template from the string provided.
 
+        Compiled templates are cached and shared by all J2Template objects in the process.
+
         Returns
         -------
         Jinja2 Template object
         """
 
-        self._j2env = Environment(loader=BaseLoader(), **self.loader_args)
-        register_filters(self._j2env)
-        return self._j2env.from_string(template_str)
+        loader_args = tuple(sorted(self.loader_args.items()))
+        self._j2env = _environment(loader_args)
+        return _template(template_str, loader_args)
 
     def render_template(self):
         """
         Render the Jinja2 template so that it's available in memory.
 
+        Template.render() copies its context into a new dict. So that configure_obj, which may be
+        any (e.g. layered) mapping, is not copied in full for each string template rendered, only
+        the variables the template refers to are looked up in it. A string template cannot include
+        or import another template that might refer to other variables. The context of a template
+        file, which can, is copied in full.
+
         Returns
         -------
         A string containing a rendered Jinja2 template.
         """
-        return self.template.render(self.configure_obj)
+        if self.template_str is None:
+            return self.template.render(dict(self.configure_obj))
+        loader_args = tuple(sorted(self.loader_args.items()))
+        context = self.configure_obj
+        names = _variables(self.template_str, loader_args)
+        return self.template.render({name: context[name] for name in names if name in context})
 
     @property
     def undeclared_variables(self):
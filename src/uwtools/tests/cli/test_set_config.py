@@ -37,6 +37,8 @@ def test_main(create_config_obj, setup_logging, args):
         )
         create_config_obj.assert_called_once_with(
             input_base_file=args["--input-base-file"],
+            cache_dir=None,
+            cache_size=1000 * 1000 * 1000,
             compare=False,
             config_file=args["--config-file"],
             config_file_type=None,
@@ -58,9 +60,37 @@ def test_main(create_config_obj, setup_logging, args):
             assert exit_.called_once_with("")
 
 
+@patch.object(set_config.cli_helpers, "setup_logging")
+@patch.object(set_config.config_batch, "run")
+@patch.object(set_config.config_batch, "load_manifest")
+@patch.object(set_config.config_batch, "report")
+def test_main_manifest(report, load_manifest, run, setup_logging, tmp_path):
+    manifest = tmp_path / "manifest.yaml"
+    manifest.touch()
+    with patch.object(set_config.sys, "argv", ["test", "-m", str(manifest), "-j", "4"]):
+        # Test success:
+        set_config.main()
+        load_manifest.assert_called_once_with(str(manifest))
+        run.assert_called_once_with(
+            load_manifest(),
+            log=setup_logging(),
+            jobs=4,
+            cache_dir=None,
+            cache_size=1000 * 1000 * 1000,
+        )
+        report.assert_called_once_with(run(), setup_logging())
+        # Test failure:
+        report.return_value = False
+        with raises(SystemExit) as e:
+            set_config.main()
+        assert str(e.value) == "Set config failure: not all manifest entries succeeded"
+
+
 def test_parse_args_base(args):
     arglist = list(chain(*args.items()))
     parsed = set_config.parse_args(arglist)
+    assert not parsed.cache_dir
+    assert parsed.cache_size == 1000
     assert not parsed.config_file_type
     assert not parsed.dry_run
     assert not parsed.input_file_type
@@ -71,10 +101,21 @@ def test_parse_args_base(args):
     assert not parsed.verbose
     assert parsed.config_file.endswith("/cfg.yaml")
     assert parsed.input_base_file.endswith("/in.yaml")
+    assert not parsed.jobs
     assert parsed.log_file.endswith("/log")
+    assert not parsed.manifest
     assert parsed.outfile.endswith("/out.yaml")
 
 
+def test_parse_args_cache(args):
+    args["--cache-dir"] = "/path/to/cache"
+    args["--cache-size"] = "50"
+    arglist = list(chain(*args.items()))
+    parsed = set_config.parse_args(arglist)
+    assert parsed.cache_dir == "/path/to/cache"
+    assert parsed.cache_size == 50
+
+
 def test_parse_args_file_type_output_fieldtable(args):
     args["--output-file-type"] = "FieldTable"
     arglist = list(chain(*args.items()))
@@ -106,6 +147,19 @@ def test_parse_args_mutually_exclusive_1(args):
         set_config.parse_args(arglist)
 
 
+def test_parse_args_mutually_exclusive_manifest(args):
+    manifest = args["--input-base-file"]
+    del args["--input-base-file"]
+    arglist = list(chain(*args.items())) + ["--manifest", manifest]
+    with raises(ArgumentError):
+        set_config.parse_args(arglist)
+    parsed = set_config.parse_args(["--manifest", manifest, "--jobs", "2"])
+    assert parsed.manifest == manifest
+    assert parsed.jobs == 2
+    with raises(SystemExit):
+        set_config.parse_args(["--manifest", manifest, "--input-base-file", manifest])
+
+
 def test_parse_args_mutually_inclusive_1(args):
     del args["--outfile"]
     arglist = list(chain(*args.items()))
@@ -0,0 +1,67 @@
+# pylint: disable=duplicate-code,missing-function-docstring
+"""
+Tests for the store-gc CLI.
+"""
+
+from types import SimpleNamespace as ns
+from unittest.mock import patch
+
+import pytest
+from pytest import raises
+
+from uwtools.cli import store_gc
+from uwtools.files.store import GCResult, Store
+
+# NB: Ensure that at least one test exercises both short and long forms of each
+#     CLI switch.
+
+
+@pytest.mark.parametrize("dry_run,verb", [(False, "Removed"), (True, "Would remove")])
+def test_main(dry_run, tmp_path, verb):
+    Store(tmp_path)
+    args = ns(dry_run=dry_run, log_file="/dev/null", quiet=False, store=str(tmp_path), verbose=True)
+    with patch.object(store_gc, "parse_args", return_value=args):
+        with patch.object(store_gc.cli_helpers, "setup_logging") as setup_logging:
+            with patch.object(store_gc.store.Store, "gc", return_value=GCResult(2, 6, 1)) as gc:
+                store_gc.main()
+    gc.assert_called_once_with(dry_run=dry_run)
+    log = setup_logging.return_value
+    log.info.assert_any_call(f"{verb} 2 stored files (6 bytes)")
+    log.info.assert_any_call(f"{verb} 1 references to files no longer staged")
+
+
+def test_parse_args_bad_store(capsys, tmp_path):
+    with raises(SystemExit) as e:
+        store_gc.parse_args(["-s", str(tmp_path / "no-such-dir")])
+    assert e.value.code == 2
+    assert "does not exist" in capsys.readouterr().err
+
+
+def test_parse_args_help(capsys):
+    with raises(SystemExit) as e:
+        store_gc.parse_args([])
+    assert e.value.code == 0
+    assert "usage:" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize(
+    "sw",
+    [
+        ns(d="-d", l="-l", s="-s", v="-v"),
+        ns(d="--dry-run", l="--log-file", s="--store", v="--verbose"),
+    ],
+)
+def test_parse_args_good(sw, tmp_path):
+    logfile = str(tmp_path / "log")
+    parsed = store_gc.parse_args([sw.s, str(tmp_path), sw.d, sw.l, logfile, sw.v])
+    assert parsed.store == str(tmp_path)
+    assert parsed.dry_run
+    assert parsed.log_file == logfile
+    assert parsed.verbose
+
+
+@pytest.mark.parametrize("sw", ["-q", "--quiet"])
+def test_parse_args_quiet(sw, tmp_path):
+    parsed = store_gc.parse_args(["-s", str(tmp_path), sw])
+    assert parsed.quiet
+    assert not parsed.dry_run
@@ -38,7 +38,7 @@ def test_main(files):
             validation_schema=schemafile,
             verbose=False,
         )
-        with patch.object(validate_config, "config_is_valid") as config_is_valid:
+        with patch.object(validate_config.config_validator, "config_is_valid") as config_is_valid:
             with patch.object(validate_config.cli_helpers, "setup_logging") as setup_logging:
                 setup_logging.return_value = log
                 with raises(SystemExit) as e:
@@ -4,15 +4,19 @@ Tests for forecast driver.
 """
 
 import filecmp
+import logging
 import sys
 from pathlib import Path
+from typing import Dict, Union
 from unittest.mock import patch
 
 from pytest import fixture, raises
 
 from uwtools import config
 from uwtools.drivers.forecast import FV3Forecast
-from uwtools.tests.support import compare_files, fixture_path
+from uwtools.files.gateway import unix
+from uwtools.tests.support import compare_files, fixture_path, msg_in_caplog
+from uwtools.utils import file_helpers
 
 
 def test_create_config(tmp_path):
@@ -211,3 +215,93 @@ def test_FV3Forecast_stage_static_files(tmp_path):
     # Test that all of the destination files now exist:
     for dst_fn in files_to_stage.keys():
         assert (run_directory / dst_fn).is_file()
+
+
+def test_FV3Forecast_stage_static_files_strategies(caplog, tmp_path):
+    logging.getLogger().setLevel(logging.INFO)
+    run_directory = tmp_path / "run"
+    for name in ("a", "b", "c"):
+        (tmp_path / name).write_text(name)
+    (run_directory / "INPUT").mkdir(parents=True)
+    FV3Forecast().stage_static_files(
+        str(run_directory),
+        {
+            "a": str(tmp_path / "a"),
+            "INPUT/b": {"path": str(tmp_path / "b")},
+            "c": {"path": str(tmp_path / "c"), "strategy": "copy"},
+        },
+        strategy="symlink",
+    )
+    assert (run_directory / "a").is_symlink()
+    assert (run_directory / "INPUT" / "b").is_symlink()
+    assert not (run_directory / "c").is_symlink()
+    assert (run_directory / "c").read_text() == "c"
+    for src, dst_fn, strategy in (
+        ("a", "a", "symlink"),
+        ("b", "INPUT/b", "symlink"),
+        ("c", "c", "copy"),
+    ):
+        msg = f"File {tmp_path / src} staged in run directory at {dst_fn} by {strategy}"
+        assert msg_in_caplog(msg, caplog.records)
+
+
+def test_FV3Forecast__strategies():  # pylint: disable=protected-access
+    assert FV3Forecast._strategies(None) == ("reflink", "hardlink", "symlink", "copy")
+    assert FV3Forecast._strategies("hardlink") == ("hardlink", "symlink", "copy")
+    assert FV3Forecast._strategies(["copy", "symlink"]) == ("copy", "symlink")
+    with raises(ValueError):
+        FV3Forecast._strategies("teleport")
+
+
+def test_FV3Forecast_stage_static_files_store(caplog, tmp_path):
+    logging.getLogger().setLevel(logging.INFO)
+    (tmp_path / "a").write_text("a")
+    store = tmp_path / "store"
+    for run in ("run1", "run2"):
+        FV3Forecast().stage_static_files(
+            str(tmp_path / run), {"a": str(tmp_path / "a")}, strategy="hardlink", store=str(store)
+        )
+        msg = f"File {tmp_path / 'a'} staged in run directory at a by hardlink"
+        assert msg_in_caplog(msg, caplog.records)
+    assert (tmp_path / "run1" / "a").stat().st_ino == (tmp_path / "run2" / "a").stat().st_ino
+    assert len(list((store / "refs").iterdir())) == 2
+
+
+def test_create_directory_structure_delete_async(tmp_path):
+    rundir = tmp_path / "rundir"
+    forecast_obj = FV3Forecast()
+    forecast_obj.create_directory_structure(rundir, "delete_async")
+    (rundir / "test.txt").touch()
+    forecast_obj.create_directory_structure(rundir, "delete_async")
+    assert (rundir / "RESTART").is_dir()
+    assert not (rundir / "test.txt").exists()
+    assert file_helpers.wait_for_deletions() == []
+    assert [p.name for p in tmp_path.iterdir()] == ["rundir"]
+
+
+def test_FV3Forecast_stage_static_files_verify(tmp_path):
+    (tmp_path / "a").write_text("a")
+    stage = lambda run, **kwargs: FV3Forecast().stage_static_files(
+        str(tmp_path / run), {"a": {"path": str(tmp_path / "a"), "strategy": "copy"}}, **kwargs
+    )
+    with patch.object(unix, "_copy_file", side_effect=lambda _, dst, *__: dst.write_text("b")):
+        with raises(OSError):
+            stage("run1", verify=0)
+        stage("run2")
+    stage("run3", store=str(tmp_path / "store"), verify=4)
+    assert (tmp_path / "run3" / "a").read_text() == "a"
+
+
+def test_FV3Forecast_stage_static_files_throttle(tmp_path):
+    (tmp_path / "a").write_text("a")
+    static: Dict[str, Union[str, Dict[str, str]]] = {
+        "a": {"path": str(tmp_path / "a"), "strategy": "copy"}
+    }
+    throttle = {"bandwidth": 10**9, "files": 2}
+    with patch.object(unix.Throttle, "take") as take:
+        FV3Forecast().stage_static_files(str(tmp_path / "run1"), static, throttle=throttle)
+        FV3Forecast().stage_static_files(
+            str(tmp_path / "run2"), static, store=str(tmp_path / "store"), throttle=throttle
+        )
+    assert take.call_count == 3
+    assert (tmp_path / "run2" / "a").read_text() == "a"
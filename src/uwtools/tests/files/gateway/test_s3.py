@@ -1,19 +1,29 @@
-# pylint: disable=missing-function-docstring,redefined-outer-name
+# pylint: disable=missing-function-docstring,protected-access,redefined-outer-name
 """
 Tests for uwtools.files.gateway.s3 module.
 """
 
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 from pathlib import Path
 from unittest.mock import patch
 
-from pytest import fixture
+from pytest import fixture, raises
 
 from uwtools.files.gateway import s3
+from uwtools.tests.support import mock_s3
+
+
+@fixture
+def bucket():
+    with mock_s3("bucket") as name:
+        yield name
 
 
 @fixture
 def exc():
-    return s3.ClientError(operation_name="NA", error_response={})
+    return s3.botocore_exceptions.ClientError(operation_name="NA", error_response={})
 
 
 @fixture
@@ -28,16 +38,153 @@ def test_download_file():
         assert S3_CLIENT.download_file.called_once_with(*kwargs.values())
 
 
-def test_exists_false(exc):
-    with patch.object(s3, "S3_CLIENT") as S3_CLIENT:
-        S3_CLIENT.head_object.side_effect = exc
-        assert not s3.exists(Path("/foo/bar"))
+@fixture
+def boto3():
+    with patch.object(s3, "S3_CLIENT", None):
+        with patch.object(s3, "boto3") as boto3:
+            yield boto3
 
 
-def test_exists_true():
-    with patch.object(s3, "S3_CLIENT") as S3_CLIENT:
-        S3_CLIENT.head_object.return_value = True
-        assert s3.exists(Path("/foo/bar"))
+def test__client(boto3):
+    client = boto3.session.Session.return_value.client
+    assert s3._client() is client.return_value
+    assert s3._client() is client.return_value
+    client.assert_called_once()
+    config = client.call_args.kwargs["config"]
+    assert config.max_pool_connections == 50
+    assert config.connect_timeout == 10
+    assert config.read_timeout == 60
+    assert config.retries == {"max_attempts": 5, "mode": "standard"}
+
+
+def test__client_forked(boto3):
+    client = boto3.session.Session.return_value.client
+    s3._client()
+    with patch.object(s3.os, "getpid", return_value=-1):
+        s3._client()
+        s3._client()
+    assert client.call_count == 2
+
+
+def test__client_configured_meanwhile(boto3):
+    client = s3._client()
+    getpid = os.getpid
+
+    def configure():
+        s3.configure()
+        return getpid()
+
+    # configure() runs after _client() has checked the client, but before it returns it.
+    with patch.object(s3.os, "getpid", side_effect=configure):
+        assert s3._client() is client
+    assert s3.S3_CLIENT is None
+    assert boto3.session.Session.return_value.client.call_count == 1
+
+
+def test__client_threads(boto3):
+    client = boto3.session.Session.return_value.client
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        clients = set(map(id, executor.map(lambda _: s3._client(), range(32))))
+    assert len(clients) == 1
+    client.assert_called_once()
+
+
+def test_configure(boto3):
+    client = boto3.session.Session.return_value.client
+    with patch.dict(s3.SETTINGS):
+        s3._client()
+        s3.configure(max_pool_connections=100, retries=2)
+        s3._client()
+        assert client.call_count == 2
+        config = client.call_args.kwargs["config"]
+        assert config.max_pool_connections == 100
+        assert config.retries == {"max_attempts": 2, "mode": "standard"}
+        assert config.read_timeout == 60
+
+
+def test_exists(bucket):
+    s3._client().put_object(Bucket=bucket, Key="foo/bar", Body=b"")
+    assert s3.exists(Path("bucket/foo/bar"))
+    assert not s3.exists(Path("bucket/foo/baz"))
+
+
+def test_listing_cache_clear(bucket):
+    s3.stat(bucket, ["a"])
+    assert s3._listings
+    s3.listing_cache_clear()
+    assert not s3._listings
+
+
+def test_parse_uri():
+    assert s3.parse_uri("s3://bucket/a/b.txt") == ("bucket", "a/b.txt")
+    assert s3.parse_uri("s3://bucket") == ("bucket", "")
+    assert s3.parse_uri("s3://bucket/") == ("bucket", "")
+    for uri in ("s3:///a/b.txt", "/bucket/a/b.txt", "file:///a/b.txt"):
+        with raises(ValueError):
+            s3.parse_uri(uri)
+
+
+def test_stat(bucket):
+    client = s3._client()
+    for key in ("a.txt", "x/b.txt", "x/y/c.txt", "z/d.txt"):
+        client.put_object(Bucket=bucket, Key=key, Body=key.encode())
+    keys = ["a.txt", "x/b.txt", "x/y/c.txt", "x/missing.txt", "x/y", "missing/e.txt"]
+    with patch.object(s3, "_list", wraps=s3._list) as _list:
+        info = s3.stat(bucket, keys)
+        assert sorted(call.args[1] for call in _list.call_args_list) == [
+            "",
+            "missing/",
+            "x/",
+            "x/y/",
+        ]
+    assert set(info) == set(keys)
+    assert info["x/b.txt"] == s3.ObjectInfo(
+        7, client.head_object(Bucket=bucket, Key="x/b.txt")["ETag"]
+    )
+    assert [getattr(info[key], "size") for key in ("a.txt", "x/y/c.txt")] == [5, 9]
+    for key in ("x/missing.txt", "x/y", "missing/e.txt"):
+        assert info[key] is None
+
+
+def test_stat_paginated(bucket):
+    client = s3._client()
+    for i in range(5):
+        client.put_object(Bucket=bucket, Key=f"p/{i}", Body=b"")
+    paginate = client.get_paginator("list_objects_v2").paginate
+
+    def small_pages(**kwargs):
+        return paginate(**kwargs, PaginationConfig={"PageSize": 2})
+
+    with patch.object(client, "get_paginator") as get_paginator:
+        get_paginator.return_value.paginate.side_effect = small_pages
+        info = s3.stat(bucket, [f"p/{i}" for i in range(5)])
+    assert all(info.values())
+
+
+def test_stat_ttl(bucket):
+    client = s3._client()
+    with patch.object(s3, "_list", wraps=s3._list) as _list:
+        assert s3.stat(bucket, ["a/b"]) == {"a/b": None}
+        client.put_object(Bucket=bucket, Key="a/b", Body=b"")
+        assert s3.stat(bucket, ["a/b"]) == {"a/b": None}
+        assert _list.call_count == 1
+        assert s3.stat(bucket, ["a/b"], ttl=0)["a/b"] is not None
+        assert _list.call_count == 2
+        with patch.object(s3, "LISTING_TTL", 0):
+            s3.stat(bucket, ["a/b"])
+        assert _list.call_count == 3
+
+
+def test_stat_upload_forgets(bucket, tmp_path):
+    path = tmp_path / "b"
+    path.write_text("hello")
+    assert s3.stat(bucket, ["a/b", "a/c"]) == {"a/b": None, "a/c": None}
+    s3.upload_file(str(path), bucket, "a/b")
+    assert s3.stat(bucket, ["a/b"])["a/b"] is not None
+    transfer = s3.Transfer()
+    transfer.upload(str(path), bucket, "a/c")
+    transfer.run()
+    assert s3.stat(bucket, ["a/c"])["a/c"] is not None
 
 
 def test_upload_file_failure(exc, upload_kwargs):
@@ -50,3 +197,227 @@ def test_upload_file_success(upload_kwargs):
     with patch.object(s3, "S3_CLIENT") as S3_CLIENT:
         assert s3.upload_file(**upload_kwargs)
         S3_CLIENT.upload_file.assert_called_once_with(*upload_kwargs.values(), "bar")
+
+
+def test_Transfer_download_error(bucket, tmp_path):
+    transfer = s3.Transfer()
+    transfer.download(bucket, "missing", str(tmp_path / "missing"))
+    (result,) = transfer.run()
+    assert result.source == "s3://bucket/missing"
+    assert result.size == 0
+    assert result.error
+
+
+def test_Transfer_download_into_dir(bucket, tmp_path):
+    s3._client().put_object(Bucket=bucket, Key="a/b/c.txt", Body=b"hello")
+    transfer = s3.Transfer()
+    transfer.download(bucket, "a/b/c.txt", str(tmp_path))
+    transfer.download(bucket, "a/b/c.txt", str(tmp_path / "new") + "/")
+    results = transfer.run()
+    assert [r.destination for r in results] == [
+        str(tmp_path / "c.txt"),
+        str(tmp_path / "new/c.txt"),
+    ]
+    assert all(r.error is None and r.size == 5 for r in results)
+    assert (tmp_path / "new" / "c.txt").read_text() == "hello"
+
+
+def test_Transfer_metrics(bucket, tmp_path):
+    s3._client().put_object(Bucket=bucket, Key="a", Body=b"hello")
+    download_file = s3._client().download_file
+
+    def flaky(bucket, key, *args, **kwargs):
+        s3._count_retries(
+            {"ResponseMetadata": {"RetryAttempts": 2}}, {"uwtools_object": (bucket, key)}
+        )
+        return download_file(bucket, key, *args, **kwargs)
+
+    transfer = s3.Transfer(workers=1)
+    transfer.download(bucket, "a", str(tmp_path / "a"))
+    transfer.download(bucket, "a", str(tmp_path / "b"))
+    with patch.object(s3._client(), "download_file", side_effect=flaky):
+        results = transfer.run()
+    assert [r.retries for r in results] == [2, 2]
+    assert results[0].queued >= 0
+    assert results[1].queued >= results[0].seconds
+    assert not s3._retries
+
+
+def test__count_retries():
+    with patch.dict(s3._retries, clear=True):
+        s3._count_retries(
+            {"ResponseMetadata": {"RetryAttempts": 1}}, {"uwtools_object": ("b", "k")}
+        )
+        s3._count_retries(
+            {"ResponseMetadata": {"RetryAttempts": 2}}, {"uwtools_object": ("b", "k")}
+        )
+        s3._count_retries({"ResponseMetadata": {"RetryAttempts": 3}}, {})
+        s3._count_retries(
+            {"ResponseMetadata": {"RetryAttempts": 0}}, {"uwtools_object": ("b", "x")}
+        )
+        s3._count_retries({}, {"uwtools_object": ("b", "y")})
+        assert s3._retries == {("b", "k"): 3}
+
+
+def test__note_object():
+    context: dict = {}
+    s3._note_object({"Bucket": "b"}, context)
+    assert not context
+    s3._note_object({"Bucket": "b", "Key": "k"}, context)
+    assert context == {"uwtools_object": ("b", "k")}
+
+
+def test_Transfer_grows_pool(bucket):
+    s3.configure(max_pool_connections=10)
+    client = s3._client()
+    s3.Transfer(workers=16, part_concurrency=2).run()
+    assert s3.SETTINGS["max_pool_connections"] == 32
+    assert s3._client() is not client
+    client = s3._client()
+    s3.Transfer(workers=4, part_concurrency=2).run()
+    assert s3.SETTINGS["max_pool_connections"] == 32
+    assert s3._client() is client
+
+
+def test_Transfer_roundtrip(bucket, tmp_path):
+    mb = s3.MB
+    sizes = {"small": 1024, "large": 6 * mb}
+    for name, size in sizes.items():
+        (tmp_path / name).write_bytes(bytes(i % 251 for i in range(size)))
+    upload = s3.Transfer(workers=2, multipart_threshold=5 * mb, multipart_chunksize=5 * mb)
+    for name in sizes:
+        upload.upload(str(tmp_path / name), bucket, f"out/{name}")
+    results = upload.run()
+    assert [(r.destination, r.size, r.error) for r in results] == [
+        ("s3://bucket/out/small", 1024, None),
+        ("s3://bucket/out/large", 6 * mb, None),
+    ]
+    large = s3._client().head_object(Bucket=bucket, Key="out/large")
+    assert large["ETag"].endswith('-2"')  # Uploaded in two parts.
+    download = s3.Transfer(workers=2, multipart_threshold=5 * mb, multipart_chunksize=5 * mb)
+    for name in sizes:
+        download.download(bucket, f"out/{name}", str(tmp_path / "back" / name))
+    assert all(r.error is None for r in download.run())
+    for name in sizes:
+        assert (tmp_path / "back" / name).read_bytes() == (tmp_path / name).read_bytes()
+
+
+def test_Transfer_upload_key_prefix(bucket, tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("hello")
+    transfer = s3.Transfer(part_concurrency=1)
+    transfer.upload(str(path), bucket)
+    transfer.upload(str(path), bucket, "x/")
+    transfer.upload(str(path), bucket, "x/y.txt")
+    results = transfer.run()
+    assert [r.destination for r in results] == [
+        "s3://bucket/a.txt",
+        "s3://bucket/x/a.txt",
+        "s3://bucket/x/y.txt",
+    ]
+    assert all(r.source == str(path) and r.error is None for r in results)
+
+
+@fixture
+def ranged(bucket):
+    data = bytes(i % 251 for i in range(10_000))
+    s3._client().put_object(Bucket=bucket, Key="big", Body=data)
+    return data
+
+
+def test_download_ranged(ranged, tmp_path):
+    path = tmp_path / "big"
+    assert s3.download_ranged("bucket", "big", str(path), part_size=1000, workers=4) == 10_000
+    assert path.read_bytes() == ranged
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["big"]
+
+
+def test_download_ranged_empty(bucket, tmp_path):
+    s3._client().put_object(Bucket=bucket, Key="empty", Body=b"")
+    path = tmp_path / "empty"
+    assert s3.download_ranged(bucket, "empty", str(path), use_mmap=True) == 0
+    assert path.read_bytes() == b""
+
+
+def test_download_ranged_mmap(ranged, tmp_path):
+    path = tmp_path / "big"
+    s3.download_ranged("bucket", "big", str(path), part_size=3000, use_mmap=True)
+    assert path.read_bytes() == ranged
+
+
+def test_download_ranged_no_fallocate(ranged, tmp_path):
+    path = tmp_path / "big"
+    with patch.object(s3.os, "posix_fallocate", side_effect=OSError):
+        s3.download_ranged("bucket", "big", str(path), part_size=4000)
+    assert path.read_bytes() == ranged
+
+
+def test_download_ranged_no_posix_fallocate(monkeypatch, ranged, tmp_path):
+    # As on macOS and Windows.
+    monkeypatch.delattr(s3.os, "posix_fallocate")
+    path = tmp_path / "big"
+    s3.download_ranged("bucket", "big", str(path), part_size=4000)
+    assert path.read_bytes() == ranged
+
+
+def test_download_ranged_resume(ranged, tmp_path):
+    client = s3._client()
+    get_object = client.get_object
+    calls = []
+
+    def interrupt(**kwargs):
+        calls.append(kwargs["Range"])
+        if calls == ["bytes=0-999", "bytes=1000-1999", "bytes=2000-2999", "bytes=3000-3999"]:
+            raise RuntimeError("interrupted")
+        return get_object(**kwargs)
+
+    path = tmp_path / "big"
+    with patch.object(client, "get_object", side_effect=interrupt):
+        with raises(RuntimeError):
+            s3.download_ranged("bucket", "big", str(path), part_size=1000, workers=1)
+        assert not path.exists()
+        assert len((tmp_path / "big.ranges").read_text().splitlines()) == 4
+        calls.clear()
+        s3.download_ranged("bucket", "big", str(path), part_size=1000, workers=1)
+    assert calls == [f"bytes={i}-{i + 999}" for i in range(3000, 10_000, 1000)]
+    assert path.read_bytes() == ranged
+
+
+def test_download_ranged_resume_changed(ranged, tmp_path):
+    (tmp_path / "big.partial").write_bytes(b"x" * 10_000)
+    (tmp_path / "big.ranges").write_text('{"etag": "old"}\n0\n1\n')
+    client = s3._client()
+    with patch.object(client, "get_object", wraps=client.get_object) as get_object:
+        s3.download_ranged("bucket", "big", str(tmp_path / "big"), part_size=5000)
+    assert get_object.call_count == 2
+    assert (tmp_path / "big").read_bytes() == ranged
+
+
+def test_download_ranged_resume_no_state(ranged, tmp_path):
+    (tmp_path / "big.partial").write_bytes(b"x" * 10_000)
+    s3.download_ranged("bucket", "big", str(tmp_path / "big"))
+    assert (tmp_path / "big").read_bytes() == ranged
+
+
+def test_download_ranged_short_read(ranged, tmp_path):
+    client = s3._client()
+    get_object = client.get_object
+
+    def short(**kwargs):
+        response = get_object(**kwargs)
+        response["Body"] = BytesIO(b"x")
+        response["Body"].iter_chunks = lambda _: iter([b"x"])
+        return response
+
+    with patch.object(client, "get_object", side_effect=short):
+        with raises(IOError):
+            s3.download_ranged("bucket", "big", str(tmp_path / "big"))
+
+
+def test_Transfer_resumable(ranged, tmp_path):
+    transfer = s3.Transfer(multipart_chunksize=1000, resumable=True)
+    transfer.download("bucket", "big", str(tmp_path / "big"))
+    (result,) = transfer.run()
+    assert result.error is None
+    assert result.size == 10_000
+    assert (tmp_path / "big").read_bytes() == ranged
@@ -3,7 +3,18 @@
 Tests for uwtools.files.gateway.unix module.
 """
 
-from pytest import fixture
+import errno
+import hashlib
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from pytest import fixture, raises
 
 from uwtools.files.gateway import unix
 from uwtools.files.model.file import Unix
@@ -55,6 +66,51 @@ def test_Copier_files(files2copy):
     assert dst2.is_file()
 
 
+def test_Copier_collect_all(files2copy, tmp_path):
+    src1, src2, dst1, dst2 = files2copy
+    (tmp_path / "src" / "f1").unlink()
+    c = unix.Copier(srcs=[src1, src2], dsts=[dst1, dst2], fail_fast=False)
+    results = c.run()
+    assert [r.error is None for r in results] == [False, True]
+    assert results[0].size == 0
+    assert dst2.is_file()
+
+
+def test_Copier_fail_fast(files2copy, tmp_path):
+    src1, src2, dst1, dst2 = files2copy
+    (tmp_path / "src" / "f1").unlink()
+    c = unix.Copier(srcs=[src1, src2], dsts=[dst1, dst2], workers=1)
+    with patch.object(unix, "_copy", wraps=unix._copy) as _copy:
+        with raises(FileNotFoundError):
+            c.run()
+    _copy.assert_called_once()
+    assert not dst2.is_file()
+
+
+def test_Copier_results(files2copy):
+    src1, src2, dst1, dst2 = files2copy
+    results = unix.Copier(srcs=[src1, src2], dsts=[dst1, dst2]).run()
+    assert [(r.src, r.dst, r.size, r.error) for r in results] == [
+        (Path(src1.path), dst1, 3, None),
+        (Path(src2.path), dst2, 3, None),
+    ]
+    assert all(r.seconds >= 0 for r in results)
+    assert all(r.queued >= 0 for r in results)
+
+
+def test_Copier_reuse(files2copy):
+    src1, src2, dst1, dst2 = files2copy
+    with unix.Copier(workers=2) as c:
+        assert c.copy([(Path(src1.path), dst1)])[0].size == 3
+        executor = c._executor
+        assert executor is not None
+        assert executor._max_workers == 2
+        assert c.copy([(Path(src2.path), dst2)])[0].size == 3
+        assert c._executor is executor
+    assert c._executor is None
+    c.close()
+
+
 def test_copy_dir(dirs):
     src, dst = dirs
     assert not dst.is_dir()
@@ -93,3 +149,469 @@ def test__copy_file(dirs):
     dst.mkdir()
     unix._copy(src=srcfile, dst=dstfile)
     assert dstfile.is_file()
+
+
+def test__copy_dir_size(dirs):
+    src, dst = dirs
+    assert unix._copy(src=src, dst=dst) == 6
+
+
+def test__copy_file_into_dir(dirs):
+    src, dst = dirs
+    dst.mkdir()
+    (src / "f1").chmod(0o750)
+    assert unix._copy_file(src / "f1", dst) == 3
+    assert (dst / "f1").read_text() == "f1\n"
+    assert (dst / "f1").stat().st_mode & 0o777 == 0o750
+
+
+@pytest.mark.parametrize("link", [os.link, os.symlink])
+def test__copy_file_same_file(dirs, link):
+    src, dst = dirs
+    dst.mkdir()
+    link(src / "f1", dst / "f1")
+    with raises(shutil.SameFileError):
+        unix._copy_file(src / "f1", dst / "f1")
+    with raises(shutil.SameFileError):
+        unix._copy_file(src / "f1", src / "f1")
+    with raises(shutil.SameFileError):
+        unix.copy([Unix((src / "f1").as_uri())], [dst / "f1"])
+    assert (src / "f1").read_text() == "f1\n"
+
+
+def test__copy_file_sendfile(dirs):
+    src, dst = dirs
+    dst.mkdir()
+    unsupported = OSError(errno.EXDEV, "cross-device")
+    with patch.object(os, "copy_file_range", side_effect=unsupported):
+        with patch.object(os, "sendfile", wraps=os.sendfile) as sendfile:
+            assert unix._copy_file(src / "f1", dst / "f1") == 3
+    assert sendfile.called
+    assert (dst / "f1").read_text() == "f1\n"
+
+
+def test__copy_file_user_space(dirs):
+    src, dst = dirs
+    dst.mkdir()
+    with patch.object(os, "copy_file_range", side_effect=OSError(errno.ENOSYS, "")):
+        with patch.object(os, "sendfile", side_effect=OSError(errno.EINVAL, "")):
+            assert unix._copy_file(src / "f1", dst / "f1") == 3
+    assert (dst / "f1").read_text() == "f1\n"
+
+
+def test__kernel_copy_error(dirs):
+    src, dst = dirs
+    dst.mkdir()
+    with patch.object(os, "copy_file_range", side_effect=OSError(errno.EIO, "")):
+        with raises(OSError):
+            unix._copy_file(src / "f1", dst / "f1")
+    with patch.object(os, "copy_file_range", side_effect=[2, OSError(errno.EXDEV, "")]):
+        with raises(OSError):
+            unix._copy_file(src / "f1", dst / "f1")
+
+
+def test_Copier_strategies(dirs):
+    src, dst = dirs
+    dst.mkdir()
+    with unix.Copier(strategies=["symlink"]) as c:
+        results = c.copy([(src / "f1", dst / "f1"), (src / "subdir", dst / "subdir")])
+        assert [r.strategy for r in results] == ["symlink", "copy"]
+        assert (dst / "f1").is_symlink()
+        assert not (dst / "subdir").is_symlink()
+        (result,) = c.copy([(src / "f1", dst / "f1")], strategies=["copy"])
+    assert result.strategy == "copy"
+    assert result.size == 3
+    assert not (dst / "f1").is_symlink()
+
+
+def test_stage_hardlink(dirs):
+    src, dst = dirs
+    dst.mkdir()
+    with patch.object(unix.fcntl, "ioctl", side_effect=OSError(errno.EOPNOTSUPP, "")):
+        assert unix.stage(src / "f1", dst / "f1") == "hardlink"
+    assert (dst / "f1").samefile(src / "f1")
+
+
+def test_stage_reflink(dirs):
+    src, dst = dirs
+    dst.mkdir()
+    with patch.object(unix.fcntl, "ioctl") as ioctl:
+        assert unix.stage(src / "f1", dst / "f1") == "reflink"
+    assert ioctl.call_args.args[1] == unix.FICLONE
+    assert (dst / "f1").is_file()
+
+
+def test_stage_replaces_symlink(dirs):
+    src, dst = dirs
+    dst.mkdir()
+    assert unix.stage(src / "f1", dst / "f1", ["symlink"]) == "symlink"
+    assert unix.stage(src / "subdir" / "f2", dst / "f1", ["copy"]) == "copy"
+    assert (src / "f1").read_text() == "f1\n"  # i.e. not written through the link
+    assert (dst / "f1").read_text() == "f2\n"
+
+
+def test_stage_symlink_then_copy(dirs):
+    src, dst = dirs
+    dst.mkdir()
+    with patch.object(unix.os, "link", side_effect=OSError(errno.EXDEV, "")):
+        assert unix.stage(src / "f1", dst / "f1", ["hardlink", "symlink"]) == "symlink"
+        assert (dst / "f1").resolve() == (src / "f1").resolve()
+        with patch.object(unix.os, "symlink", side_effect=OSError(errno.EPERM, "")):
+            assert unix.stage(src / "f1", dst / "f1", ["hardlink", "symlink", "copy"]) == "copy"
+    assert not (dst / "f1").is_symlink()
+    assert (dst / "f1").read_text() == "f1\n"
+
+
+def test_stage_unknown(dirs):
+    src, dst = dirs
+    with raises(ValueError):
+        unix.stage(src / "f1", dst / "f1", ["hardlink", "teleport"])
+    with raises(ValueError):
+        unix.stage(src / "f1", dst / "f1", [])
+
+
+def test_stage_unworkable(dirs):
+    src, dst = dirs
+    with raises(FileNotFoundError):
+        unix.stage(src / "f1", dst / "missing" / "f1", ["reflink", "hardlink", "copy"])
+
+
+def test_Copier_incremental(dirs):
+    src, dst = dirs
+    c = unix.Copier(srcs=[Unix(src.as_uri())], dsts=[dst], incremental=unix.SyncOptions())
+    (result,) = c.run()
+    assert (result.strategy, result.size) == ("sync", 6)
+    assert content(src) == content(dst)
+    (result,) = c.run()
+    assert (result.strategy, result.size) == ("sync", 0)
+
+
+def test__copy_dir_incremental(dirs):
+    src, dst = dirs
+    dst.mkdir()
+    (dst / "junk").touch()
+    assert unix._copy(src=src, dst=dst, incremental=unix.SyncOptions(delete=True)) == 6
+    assert content(src) == content(dst)
+
+
+def test_sync_changed(dirs):
+    src, dst = dirs
+    assert unix.sync(src, dst) == 6
+    (src / "f1").write_text("changed\n")
+    (src / "subdir" / "f3").write_text("new\n")
+    with patch.object(unix, "_copy_file", wraps=unix._copy_file) as _copy_file:
+        assert unix.sync(src, dst) == 12
+    assert sorted(call.args[0].name for call in _copy_file.call_args_list) == ["f1", "f3"]
+    assert (dst / "f1").read_text() == "changed\n"
+    assert (dst / "f1").stat().st_mtime_ns == (src / "f1").stat().st_mtime_ns
+
+
+def test_sync_checksum(dirs):
+    src, dst = dirs
+    unix.sync(src, dst)
+    (dst / "f1").write_text("xx\n")  # Same size, new mtime.
+    (dst / "subdir" / "f2").write_text("f2\n")  # Same content, new mtime.
+    assert unix.sync(src, dst, checksum=True) == 3
+    assert (dst / "f1").read_text() == "f1\n"
+    (dst / "f1").write_text("f1 and more\n")
+    assert unix.sync(src, dst, checksum=True) == 3
+    (dst / "f1").unlink()
+    assert unix.sync(src, dst, checksum=True) == 3
+
+
+def test_sync_delete(dirs):
+    src, dst = dirs
+    unix.sync(src, dst)
+    (dst / "junk").touch()
+    (dst / "junkdir" / "sub").mkdir(parents=True)
+    unix.sync(src, dst)
+    assert (dst / "junk").exists()
+    unix.sync(src, dst, delete=True)
+    assert content(src) == content(dst)
+
+
+def test_sync_replaces_links(dirs):
+    src, dst = dirs
+    dst.mkdir()
+    (dst / "f1").symlink_to(src / "subdir" / "f2")
+    unix.sync(src, dst)
+    assert not (dst / "f1").is_symlink()
+    assert (src / "subdir" / "f2").read_text() == "f2\n"
+
+
+def test_sync_type_changes(dirs):
+    src, dst = dirs
+    dst.write_text("not a directory")
+    unix.sync(src, dst)
+    assert content(src) == content(dst)
+    shutil.rmtree(dst / "subdir")
+    (dst / "subdir").touch()
+    (dst / "f1").unlink()
+    (dst / "f1").mkdir()
+    (dst / "f1" / "x").touch()
+    unix.sync(src, dst)
+    assert (dst / "f1").read_text() == "f1\n"
+    assert (dst / "subdir" / "f2").read_text() == "f2\n"
+
+
+def test__scan(dirs):
+    src, _ = dirs
+    entries = unix._scan(src, 2)
+    f1 = (src / "f1").stat()
+    assert entries == {
+        "f1": (False, 3, f1.st_mtime_ns),
+        "subdir": (True, 0, 0),
+        "subdir/f2": (False, 3, (src / "subdir" / "f2").stat().st_mtime_ns),
+    }
+
+
+@fixture
+def tree(tmp_path):
+    for rel in ("a/b/c.nc", "a/d.txt", "e.nc", "f/g/h.nc"):
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel).write_text(rel)
+    (tmp_path / "link").symlink_to(tmp_path / "a")
+    return tmp_path
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_walk(tree, workers):
+    entries = {entry.rel: entry for entry in unix.walk(tree, workers=workers)}
+    assert sorted(entries) == [
+        "a",
+        "a/b",
+        "a/b/c.nc",
+        "a/d.txt",
+        "e.nc",
+        "f",
+        "f/g",
+        "f/g/h.nc",
+        "link",
+    ]
+    assert entries["a/b"].is_dir
+    assert not entries["a/b/c.nc"].is_dir
+    assert not entries["link"].is_dir
+    assert entries["a/b/c.nc"].path == str(tree / "a/b/c.nc")
+    assert entries["a/b/c.nc"].stat.st_size == 8
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_walk_follow_symlinks(tree, workers):
+    rels = {entry.rel for entry in unix.walk(tree, workers=workers, follow_symlinks=True)}
+    assert {"link", "link/b", "link/b/c.nc", "link/d.txt"} <= rels
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_walk_pattern(tree, workers):
+    assert sorted(e.rel for e in unix.walk(tree, "*.nc", workers)) == [
+        "a/b/c.nc",
+        "e.nc",
+        "f/g/h.nc",
+    ]
+    assert [e.rel for e in unix.walk(tree, "f/*.nc", workers)] == ["f/g/h.nc"]
+    assert [e.rel for e in unix.walk(tree, "a/?.txt", workers)] == ["a/d.txt"]
+
+
+def test_walk_serial_depth_first(tree):
+    rels = [entry.rel for entry in unix.walk(tree)]
+    assert rels.index("a/b/c.nc") == rels.index("a/b") + 1
+    assert rels.index("f/g/h.nc") == rels.index("f/g") + 1
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_walk_closed_early(tree, workers):
+    with patch.object(unix.os, "scandir", wraps=os.scandir) as scandir:
+        entries = unix.walk(tree, workers=workers)
+        next(entries)
+        entries.close()
+    assert scandir.call_count < 5
+
+
+def test_walk_closed_while_scanning(tree):
+    # Closing the walk waits for scans in progress, and cancels those not yet started.
+    release = threading.Event()
+    scandir = unix._scandir
+
+    def slow(path, rel, follow_symlinks):
+        if rel == "f":
+            release.wait(timeout=10)
+        yield from scandir(path, rel, follow_symlinks)
+
+    with patch.object(unix, "_scandir", side_effect=slow):
+        entries = unix.walk(tree, workers=4)
+        rels = [next(entries).rel]
+        while not rels[-1].startswith("a/"):
+            rels.append(next(entries).rel)
+        with patch.object(unix.Future, "cancel") as cancel:
+            threading.Timer(0.1, release.set).start()
+            entries.close()
+    assert cancel.call_count == 1
+    assert "f/g" not in rels
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_walk_missing(tmp_path, workers):
+    with raises(FileNotFoundError):
+        list(unix.walk(tmp_path / "no-such-dir", workers=workers))
+
+
+def test_Copier_verify(dirs):
+    src, dst = dirs
+    with unix.Copier(verification=unix.VerifyOptions()) as c:
+        (result,) = c.copy([(src, dst)])
+    assert result.error is None
+
+
+def corrupt(src, dst, *_):
+    dst.write_text("xyz")
+    return 3
+
+
+def test_Copier_verify_mismatch(dirs):
+    src, dst = dirs
+    dst.mkdir()
+    with patch.object(unix, "_copy", side_effect=corrupt):
+        with unix.Copier(verification=unix.VerifyOptions()) as c:
+            with raises(OSError) as e:
+                c.copy([(src / "f1", dst / "f1")])
+        assert str(e.value) == f"{dst / 'f1'} does not match {src / 'f1'}: checksum differs"
+        with unix.Copier(fail_fast=False, verification=unix.VerifyOptions()) as c:
+            (result,) = c.copy([(src / "f1", dst / "f1")])
+        assert result.error is not None
+
+
+@fixture
+def big(tmp_path):
+    data = bytearray(os.urandom(4 * unix.SAMPLE_BLOCK + 100))
+    path = tmp_path / "big"
+    path.write_bytes(data)
+    return path, data
+
+
+def test_digest(big, tmp_path):
+    path, data = big
+    assert unix.digest(path) == hashlib.sha256(data).hexdigest()
+    (tmp_path / "empty").touch()
+    assert unix.digest(tmp_path / "empty") == hashlib.sha256().hexdigest()
+    (tmp_path / "small").write_text("foo")
+    assert unix.digest(tmp_path / "small", samples=2) == hashlib.sha256(b"foo").hexdigest()
+
+
+def test_digest_sampled(big, tmp_path):
+    path, data = big
+    sampled = unix.digest(path, samples=2)
+    assert sampled != unix.digest(path)
+    assert sampled != unix.digest(path, samples=3)
+    # A change between the first and last blocks goes unnoticed, but not one within them.
+    for offset, same in ((2 * unix.SAMPLE_BLOCK, True), (10, False), (len(data) - 10, False)):
+        changed = bytearray(data)
+        changed[offset] ^= 0xFF
+        (tmp_path / "changed").write_bytes(changed)
+        assert (unix.digest(tmp_path / "changed", samples=2) == sampled) is same
+    (tmp_path / "longer").write_bytes(data + b"x")
+    assert unix.digest(tmp_path / "longer", samples=2) != sampled
+    assert unix.digest(path, samples=1) != unix.digest(tmp_path / "longer", samples=1)
+
+
+def test_verify(dirs, tmp_path):
+    src, dst = dirs
+    shutil.copytree(src, dst)
+    (dst / "link").symlink_to(src / "f1")
+    results = unix.verify([(src, dst), (src / "f1", dst / "link")], workers=2)
+    assert sorted(r.dst.name for r in results) == ["f1", "f2", "link"]
+    assert all(r.ok for r in results)
+    f2 = [r for r in results if r.dst.name == "f2"][0]
+    assert f2.src_digest == f2.dst_digest == unix.digest(src / "subdir" / "f2")
+    assert [r for r in results if r.dst.name == "link"][0].src_digest is None
+
+
+def test_verify_mismatch(dirs, tmp_path):
+    src, dst = dirs
+    shutil.copytree(src, dst)
+    (dst / "f1").write_text("xyz")
+    (dst / "subdir" / "f2").unlink()
+    (tmp_path / "f3").write_text("foo")
+    (tmp_path / "f4").write_text("foobar")
+    report = tmp_path / "report.json"
+    pairs = [(src, dst), (tmp_path / "f3", tmp_path / "f4")]
+    results = unix.verify(pairs, samples=4, report=report)
+    assert not any(r.ok for r in results)
+    errors = {r.dst.name: r.error for r in results}
+    assert errors["f1"] == "checksum differs"
+    assert "No such file" in str(errors["f2"])
+    assert errors["f4"] == "size 6 differs from 3"
+    with open(report, encoding="utf-8") as f:
+        data = json.load(f)
+    assert data["files"] == 3
+    assert data["samples"] == 4
+    f1 = [m for m in data["mismatches"] if m["dst"] == str(dst / "f1")][0]
+    assert f1 == {
+        "src": str(src / "f1"),
+        "dst": str(dst / "f1"),
+        "ok": False,
+        "src_digest": unix.digest(src / "f1"),
+        "dst_digest": unix.digest(dst / "f1"),
+        "error": "checksum differs",
+    }
+
+
+def test_Throttle_defaults():
+    throttle = unix.Throttle()
+    assert throttle.chunk == unix.CHUNK
+    assert throttle.burst == 64 * 1024
+    with patch.object(unix.time, "sleep") as sleep:
+        throttle.take(10**9)
+    sleep.assert_not_called()
+    assert unix.Throttle(bandwidth=10**9).chunk == 10**8
+    assert unix.Throttle(bandwidth=1000, burst=100).chunk == 100
+
+
+def test_Throttle_file():
+    throttle = unix.Throttle(files=1)
+    slots = throttle._files
+    assert isinstance(slots, threading.BoundedSemaphore)
+    with throttle.file():
+        assert not slots.acquire(blocking=False)
+    assert slots.acquire(blocking=False)
+    with unix.Throttle().file():
+        pass
+
+
+def test_Throttle_take():
+    with patch.object(unix.time, "monotonic", side_effect=[0.0, 0.0, 0.0, 1.0]):
+        throttle = unix.Throttle(bandwidth=1000, burst=100)
+        with patch.object(unix.time, "sleep") as sleep:
+            throttle.take(100)
+            sleep.assert_not_called()
+            throttle.take(50)
+            sleep.assert_called_once_with(0.05)
+            throttle.take(10)
+            sleep.assert_called_once()
+    assert throttle._tokens == 90
+
+
+def test__copy_file_throttle(dirs):
+    src, dst = dirs
+    dst.mkdir()
+    throttle = unix.Throttle(bandwidth=10**9, files=1)
+    with patch.object(throttle, "take", wraps=throttle.take) as take:
+        assert unix._copy_file(src / "f1", dst / "f1", throttle) == 3
+        take.assert_called_once_with(3)
+        with patch.object(os, "copy_file_range", side_effect=OSError(errno.ENOSYS, "")):
+            with patch.object(os, "sendfile", side_effect=OSError(errno.EINVAL, "")):
+                assert unix._copy_file(src / "f1", dst / "f2", throttle) == 3
+        assert take.call_count == 2
+    assert (dst / "f2").read_text() == "f1\n"
+
+
+def test_copy_throttle(dirs):
+    src, dst = dirs
+    dst.mkdir()
+    throttle = unix.Throttle(bandwidth=10**9)
+    with patch.object(throttle, "take", wraps=throttle.take) as take:
+        (result,) = unix.copy([Unix(src.as_uri())], [dst / "tree"], throttle)
+        assert result.size == 6
+        assert take.call_count == 2
+        unix.sync(src, dst / "synced", throttle=throttle)
+        assert take.call_count == 4
+    assert content(src) == content(dst / "synced")
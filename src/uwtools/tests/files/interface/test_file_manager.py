@@ -1,12 +1,22 @@
-# pylint: disable=missing-function-docstring
+# pylint: disable=missing-function-docstring,protected-access,redefined-outer-name
 
-import shutil
+from pathlib import Path
 from unittest.mock import patch
 
+from pytest import fixture, raises
+
 from uwtools.files import FileManager, S3FileManager, UnixFileManager
-from uwtools.files.gateway import s3
+from uwtools.files.gateway import s3, unix
+from uwtools.files.metrics import Metrics
 from uwtools.files.model import S3, Prefixes, Unix
-from uwtools.tests.support import fixture_uri
+from uwtools.files.store import Store
+from uwtools.tests.support import compare_files, fixture_path, fixture_uri, mock_s3
+
+
+@fixture
+def bucket():
+    with mock_s3("bucket") as name:
+        yield name
 
 
 def test_FileManager_constructor_S3():
@@ -17,22 +27,38 @@ def test_FileManager_constructor_Unix():
     assert isinstance(FileManager.get_file_manager(Prefixes.UNIX), UnixFileManager)
 
 
-@patch.object(s3, "upload_file", return_value=None)
-def test_S3_FileManager(upload_file):
-    source = Unix(fixture_uri("files/a.txt"))
-    destination = S3("s3://tests/fixtures/files/b.txt")
+def test_S3_FileManager(bucket, tmp_path):
+    sources = [Unix(fixture_uri(f"files/{name}.txt")) for name in ("a", "b", "c")]
+    destinations = [f"s3://{bucket}/files/{name}.txt" for name in ("x", "y", "z")]
     fm: S3FileManager = FileManager.get_file_manager(Prefixes.S3)
-    fm.copy([source], [destination])
-    assert upload_file.copy.called_once_with([source], [destination])
+    results = fm.copy(sources, destinations)
+    assert [r.error for r in results] == [None] * 3
+    assert [r.destination for r in results] == destinations
+    results = fm.copy(
+        [S3(uri) for uri in destinations],
+        [str(tmp_path), Unix(tmp_path.as_uri()), str(tmp_path / "w.txt")],
+    )
+    assert [r.error for r in results] == [None] * 3
+    for name, original in (("x", "a"), ("y", "b"), ("w", "c")):
+        assert compare_files(str(tmp_path / f"{name}.txt"), fixture_path(f"files/{original}.txt"))
+
+
+def test_S3_FileManager_bad_destination(tmp_path):
+    source = Unix(fixture_uri("files/a.txt"))
+    fm = S3FileManager(workers=2)
+    assert fm.workers == 2
+    with raises(ValueError):
+        fm.copy([source], [str(tmp_path)])
 
 
-@patch.object(shutil, "copy", return_value=None)
+@patch.object(unix, "_copy", return_value=3)
 def test_Unix_FileManager(copy):
     source = Unix(fixture_uri("files/a.txt"))
     destination = Unix(fixture_uri("files/b.txt"))
     fm: UnixFileManager = FileManager.get_file_manager(Prefixes.UNIX)
-    fm.copy([source], [destination.path])
-    assert copy.copy.called_once_with([source], [destination])
+    (result,) = fm.copy([source], [destination.path])
+    copy.assert_called_once_with(Path(source.path), Path(destination.path), None, None)
+    assert result.size == 3
 
 
 def test_Unix_FileManager_Threaded(tmp_path):
@@ -41,3 +67,29 @@ def test_Unix_FileManager_Threaded(tmp_path):
     fm: UnixFileManager = FileManager.get_file_manager(Prefixes.UNIX)
     fm.copy([source], [destination.path])
     assert len(list(tmp_path.glob("*.txt"))) == 3
+
+
+def test_Unix_FileManager_store(tmp_path):
+    source = Unix(fixture_uri("files/a.txt"))
+    store = Store(tmp_path / "store")
+    fm = UnixFileManager(store=store)
+    (result,) = fm.copy([source], [str(tmp_path / "a.txt")])
+    assert result.src == Path(source.path)
+    assert result.strategy in ("reflink", "hardlink")
+    assert compare_files(source.path, tmp_path / "a.txt")
+    assert len(list((store.root / "refs").iterdir())) == 1
+
+
+def test_FileManager_metrics(bucket, tmp_path):
+    metrics = Metrics()
+    source = Unix(fixture_uri("files/a.txt"))
+    UnixFileManager(metrics=metrics).copy([source], [str(tmp_path / "a.txt")])
+    S3FileManager(metrics=metrics).copy([source], [f"s3://{bucket}/a.txt"])
+    summary = metrics.summary()
+    assert summary.transfers == 2
+    assert summary.size == 2 * Path(source.path).stat().st_size
+    assert summary.seconds > 0
+    assert [m.destination for m in metrics.metrics] == [
+        str(tmp_path / "a.txt"),
+        "s3://bucket/a.txt",
+    ]
@@ -1,11 +1,12 @@
-# pylint: disable=missing-function-docstring
+# pylint: disable=missing-function-docstring,protected-access,redefined-outer-name
 
 from glob import glob
 
-from pytest import raises
+from pytest import fixture, raises
 
 from uwtools.files import S3, Unix
-from uwtools.tests.support import fixture_path, fixture_uri
+from uwtools.files.gateway import s3
+from uwtools.tests.support import fixture_path, fixture_uri, mock_s3
 
 
 def test_dir_file():
@@ -25,8 +26,35 @@ def test_dir_path():
     assert my_init.dir == glob(fixture_path("*"))
 
 
-def test_S3():
-    uri = "s3://foo/bar/files/a.txt"
+def test_Unix_walk(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "b.nc").write_text("foo")
+    (tmp_path / "c.txt").touch()
+    obj = Unix(tmp_path.as_uri())
+    assert sorted(entry.rel for entry in obj.walk()) == ["a", "a/b.nc", "c.txt"]
+    assert [entry.rel for entry in obj.walk("*.nc", workers=2)] == ["a/b.nc"]
+
+
+def test_Unix_walk_file(tmp_path):
+    (tmp_path / "a").write_text("foo")
+    (tmp_path / "b").symlink_to(tmp_path / "a")
+    (entry,) = Unix((tmp_path / "a").as_uri()).walk()
+    assert entry == (str(tmp_path / "a"), "a", (tmp_path / "a").stat())
+    (entry,) = Unix((tmp_path / "b").as_uri()).walk()
+    assert entry.stat.st_size != 3
+    (entry,) = Unix((tmp_path / "b").as_uri()).walk(follow_symlinks=True)
+    assert entry.stat.st_size == 3
+
+
+@fixture
+def bucket():
+    with mock_s3("foo") as name:
+        s3._client().put_object(Bucket=name, Key="bar/files/a.txt", Body=b"hello")
+        yield name
+
+
+def test_S3(bucket):
+    uri = f"s3://{bucket}/bar/files/a.txt"
     obj = S3(uri)
     assert obj.exists
     assert obj.path == "foo/bar/files/a.txt"
@@ -35,6 +63,30 @@ def test_S3():
     assert repr(obj).startswith("<S3 s3://")
     assert repr(obj).endswith("files/a.txt/>")
     assert not obj.dir
+    assert obj.size == 5
+    assert obj.etag == s3._client().head_object(Bucket=bucket, Key="bar/files/a.txt")["ETag"]
+
+
+def test_S3_bucket_and_key(bucket):
+    obj = S3(f"s3://{bucket}/bar/files/a.txt")
+    assert obj.bucket == "foo"
+    assert obj.key == "bar/files/a.txt"
+
+
+def test_S3_deleted(bucket):
+    obj = S3(f"s3://{bucket}/bar/files/a.txt")
+    s3._client().delete_object(Bucket=bucket, Key="bar/files/a.txt")
+    s3.listing_cache_clear()
+    assert not obj.exists
+    with raises(FileNotFoundError):
+        assert obj.size
+
+
+def test_S3_missing(bucket):
+    with raises(FileNotFoundError):
+        S3(f"s3://{bucket}/bar/files/b.txt")
+    with raises(FileNotFoundError):
+        S3(f"s3://{bucket}")
 
 
 def test_Unix():
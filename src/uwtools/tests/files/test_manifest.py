@@ -0,0 +1,98 @@
+# pylint: disable=missing-function-docstring,protected-access,redefined-outer-name
+"""
+Tests for uwtools.files.manifest module.
+"""
+
+import os
+from unittest.mock import patch
+
+from pytest import fixture
+
+from uwtools.files.gateway import unix
+from uwtools.files.manifest import Change, Manifest
+from uwtools.files.model import Unix
+
+
+@fixture
+def tree(tmp_path):
+    root = tmp_path / "tree"
+    (root / "a").mkdir(parents=True)
+    (root / "a" / "b").write_text("foo")
+    (root / "c").write_text("bar")
+    return root
+
+
+@fixture
+def manifest(tmp_path):
+    with Manifest(tmp_path / "manifest.db") as manifest:
+        yield manifest
+
+
+def touch(path, ns):
+    os.utime(path, ns=(ns, ns))
+
+
+def test_Manifest_persists(manifest, tree):
+    manifest.update(Unix(tree.as_uri()))
+    manifest.close()
+    with Manifest(manifest.path) as reopened:
+        assert reopened.update(Unix(tree.as_uri())) == []
+        assert reopened.changes(Unix(tree.as_uri())) == []
+
+
+def test_Manifest_update(manifest, tree):
+    obj = Unix(tree.as_uri())
+    assert manifest.changes(obj) is None
+    assert manifest.updated(obj) is None
+    added = [Change("a", "added"), Change("a/b", "added"), Change("c", "added")]
+    assert manifest.update(obj) == added
+    assert manifest.changes(obj) == added
+    updated = manifest.updated(obj)
+    assert updated is not None
+    assert manifest.update(obj) == []
+    assert manifest.changes(obj) == []
+    assert manifest.updated(obj) >= updated
+    (tree / "a" / "b").unlink()
+    (tree / "a" / "d").touch()
+    (tree / "c").write_text("baz")
+    touch(tree / "c", 1)
+    expected = [Change("a/b", "removed"), Change("a/d", "added"), Change("c", "modified")]
+    assert manifest.update(obj) == expected
+    assert manifest.changes(obj) == expected
+
+
+def test_Manifest_update_checksum(manifest, tree):
+    obj = Unix(tree.as_uri())
+    manifest.update(obj, checksum=True)
+    touch(tree / "c", 1)
+    assert manifest.update(obj, checksum=True) == []
+    (tree / "c").write_text("baz")
+    touch(tree / "c", 2)
+    assert manifest.update(obj, checksum=True) == [Change("c", "modified")]
+    with patch.object(unix, "digest") as digest:
+        assert manifest.update(obj, checksum=True) == []
+    digest.assert_not_called()
+
+
+def test_Manifest_update_checksum_after_none(manifest, tree):
+    obj = Unix(tree.as_uri())
+    manifest.update(obj)
+    touch(tree / "c", 1)
+    assert manifest.update(obj, checksum=True) == [Change("c", "modified")]
+
+
+def test_Manifest_update_trees(manifest, tmp_path, tree):
+    other = tmp_path / "other"
+    other.mkdir()
+    (other / "c").touch()
+    manifest.update(Unix(tree.as_uri()))
+    assert manifest.update(Unix(other.as_uri())) == [Change("c", "added")]
+    assert manifest.update(Unix(tree.as_uri())) == []
+
+
+def test_Manifest_update_type_change(manifest, tree):
+    obj = Unix(tree.as_uri())
+    manifest.update(obj)
+    (tree / "c").unlink()
+    (tree / "c").mkdir()
+    assert manifest.update(obj, checksum=True) == [Change("c", "modified")]
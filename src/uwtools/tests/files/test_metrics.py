@@ -0,0 +1,98 @@
+# pylint: disable=missing-function-docstring,redefined-outer-name
+"""
+Tests for uwtools.files.metrics module.
+"""
+
+import json
+import logging
+from pathlib import Path
+
+from pytest import fixture
+
+from uwtools.files.gateway import s3, unix
+from uwtools.files.metrics import GB, Metric, Metrics, Summary
+from uwtools.tests.support import msg_in_caplog
+
+
+@fixture
+def results():
+    return [
+        unix.CopyResult(Path("/a"), Path("/b"), 100, 2.0, queued=0.5, strategy="copy"),
+        s3.TransferResult("/c", "s3://d/e", 300, 1.0, queued=0.25, retries=2),
+        s3.TransferResult("s3://d/f", "/g", 0, 3.0, "oops"),
+    ]
+
+
+def test_Metric_throughput():
+    assert Metric("a", "b", 10, 2.0, 0.0, 0).throughput == 5.0
+    assert Metric("a", "b", 10, 0.0, 0.0, 0).throughput == 0.0
+
+
+def test_Metrics(results):
+    metrics = Metrics(slowest=2)
+    recorded = metrics.record(results, 4.0)
+    assert recorded == [
+        Metric("/a", "/b", 100, 2.0, 0.5, 0),
+        Metric("/c", "s3://d/e", 300, 1.0, 0.25, 2),
+        Metric("s3://d/f", "/g", 0, 3.0, 0.0, 0, "oops"),
+    ]
+    metrics.record(results[:1], 1.0)
+    summary = metrics.summary()
+    assert summary == Summary(
+        transfers=4,
+        errors=1,
+        size=500,
+        seconds=5.0,
+        queued=1.25,
+        retries=2,
+        slowest=[recorded[2], recorded[0]],
+    )
+    assert summary.throughput == 100.0
+    assert Metrics().summary().throughput == 0.0
+
+
+def test_Metrics_close(caplog, results):
+    logging.getLogger().setLevel(logging.INFO)
+    with Metrics(slowest=1) as metrics:
+        metrics.record(results, 4.0)
+    assert msg_in_caplog(
+        "Transferred %s bytes in %s files (%s errors) in %.3fs: %.3f GB/s", caplog.records
+    )
+    assert caplog.records[0].args == (400, 3, 1, 4.0, 100 / GB)
+    assert caplog.records[1].args == (3.0, 0.0, "s3://d/f", "/g")
+
+
+def test_Metrics_sink(results, tmp_path):
+    sink = tmp_path / "metrics.jsonl"
+    sink.write_text('{"earlier": "run"}\n')
+    metrics = Metrics(sink=sink, slowest=1)
+    metrics.record(results[:2], 1.0)
+    lines = [json.loads(line) for line in sink.read_text().splitlines()]
+    assert lines[1:] == [
+        {
+            "source": "/a",
+            "destination": "/b",
+            "size": 100,
+            "seconds": 2.0,
+            "queued": 0.5,
+            "retries": 0,
+            "error": None,
+            "throughput": 50.0,
+        },
+        {
+            "source": "/c",
+            "destination": "s3://d/e",
+            "size": 300,
+            "seconds": 1.0,
+            "queued": 0.25,
+            "retries": 2,
+            "error": None,
+            "throughput": 300.0,
+        },
+    ]
+    metrics.close()
+    metrics.close()
+    summary = json.loads(sink.read_text().splitlines()[-1])["summary"]
+    assert summary["size"] == 400
+    assert summary["gb_per_second"] == 400 / GB
+    assert [metric["source"] for metric in summary["slowest"]] == ["/a"]
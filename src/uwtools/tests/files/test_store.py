@@ -0,0 +1,162 @@
+# pylint: disable=missing-function-docstring,protected-access,redefined-outer-name
+"""
+Tests for uwtools.files.store module.
+"""
+
+import fcntl
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from unittest.mock import patch
+
+from pytest import fixture, raises
+
+from uwtools.files.gateway import unix
+from uwtools.files.store import GCResult, Store
+
+
+@fixture
+def store(tmp_path):
+    return Store(tmp_path / "store")
+
+
+@fixture
+def srcs(tmp_path):
+    paths = []
+    for name, text in (("a", "foo"), ("b", "bar"), ("c", "foo")):
+        path = tmp_path / name
+        path.write_text(text)
+        paths.append(path)
+    return paths
+
+
+def test_Store(store):
+    for subdir in ("index", "objects", "refs", "tmp"):
+        assert (store.root / subdir).is_dir()
+
+
+def test_Store_add(srcs, store):
+    a, _, c = srcs
+    obj = store.add(a)
+    assert obj == store.object_path(unix.digest(a))
+    assert obj.read_text() == "foo"
+    assert not os.access(obj, os.W_OK) or os.geteuid() == 0
+    assert not os.stat(obj).st_mode & 0o222
+    assert store.add(c) == obj
+    assert len(list((store.root / "objects").glob("*/*"))) == 1
+    assert not list((store.root / "tmp").iterdir())
+
+
+def test_Store_add_index(srcs, store):
+    a = srcs[0]
+    obj = store.add(a)
+    with patch.object(unix, "digest") as digest:
+        assert store.add(a) == obj
+    digest.assert_not_called()
+
+
+def test_Store_add_index_changed(srcs, store):
+    a = srcs[0]
+    store.add(a)
+    a.write_text("qux")
+    assert store.add(a).read_text() == "qux"
+
+
+def test_Store_add_index_object_gone(srcs, store):
+    a = srcs[0]
+    obj = store.add(a)
+    obj.unlink()
+    assert store.add(a) == obj
+    assert obj.is_file()
+
+
+def test_Store_add_source_changing(srcs, store):
+    a = srcs[0]
+    real = unix.digest
+
+    def digest(path):
+        os.utime(a, ns=(0, 0))
+        return real(path)
+
+    with patch.object(unix, "digest", side_effect=digest):
+        store.add(a)
+    assert not store._index_path(a).exists()
+
+
+def test_Store_add_locked(srcs, store):
+    # A file is not stored while the store is being garbage-collected, which empties tmp/.
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        with store._lock(fcntl.LOCK_EX):
+            future = executor.submit(store.add, srcs[0])
+            with raises(TimeoutError):
+                future.result(timeout=0.2)
+        assert future.result().read_text() == "foo"
+
+
+def test_Store_gc(srcs, store, tmp_path):
+    run = tmp_path / "run"
+    run.mkdir()
+    store.stage([(src, run / src.name) for src in srcs], strategies=("hardlink",))
+    assert store.gc() == GCResult(0, 0, 0)
+    (run / "a").unlink()
+    assert store.gc() == GCResult(0, 0, 1)
+    (run / "b").unlink()
+    (store.root / "tmp" / "junk").touch()
+    (run / "c").unlink()
+    (run / "c").write_text("foo")  # A new file at the old path is not a reference.
+    assert store.gc(dry_run=True) == GCResult(2, 6, 2)
+    assert (store.root / "tmp" / "junk").exists()
+    assert store.gc() == GCResult(2, 6, 2)
+    assert not list((store.root / "objects").glob("*/*"))
+    assert not list((store.root / "refs").iterdir())
+    assert not list((store.root / "index").iterdir())
+    assert not list((store.root / "tmp").iterdir())
+
+
+def test_Store_gc_keeps_index(srcs, store, tmp_path):
+    a = srcs[0]
+    store.stage([(a, tmp_path / "x")], strategies=("hardlink",))
+    assert store.gc() == GCResult(0, 0, 0)
+    assert store._index_path(a).is_file()
+
+
+def test_Store_object_path(store):
+    assert store.object_path("abcdef") == store.root / "objects" / "ab" / "abcdef"
+
+
+def test_Store_stage(srcs, store, tmp_path):
+    run = tmp_path / "run"
+    run.mkdir()
+    pairs = [(src, run / src.name) for src in srcs]
+    results = store.stage(pairs, strategies=("hardlink",))
+    assert [(r.src, r.dst, r.strategy) for r in results] == [(s, d, "hardlink") for s, d in pairs]
+    assert (run / "a").stat().st_ino == (run / "c").stat().st_ino
+    assert (run / "a").stat().st_ino == store.object_path(unix.digest(srcs[0])).stat().st_ino
+    refs = [json.loads(p.read_text()) for p in (store.root / "refs").iterdir()]
+    assert sorted(ref["path"] for ref in refs) == sorted(str(dst) for _, dst in pairs)
+
+
+def test_Store_stage_copy(srcs, store, tmp_path):
+    dst = tmp_path / "x"
+    (result,) = store.stage([(srcs[0], dst)], strategies=("copy",))
+    assert result.strategy == "copy"
+    assert dst.read_text() == "foo"
+    assert not list((store.root / "refs").iterdir())
+    assert store.gc() == GCResult(1, 3, 0)
+    assert dst.read_text() == "foo"
+
+
+def test_Store_stage_symlink(srcs, store, tmp_path):
+    dst = tmp_path / "x"
+    store.stage([(srcs[0], dst)], strategies=("symlink",))
+    assert dst.is_symlink()
+    assert store.gc() == GCResult(0, 0, 0)
+    assert dst.read_text() == "foo"
+
+
+def test_Store_stage_verify(srcs, store, tmp_path):
+    dst = tmp_path / "x"
+    copy_file = lambda src, dst, *_: dst.write_text("bad" if dst.name == "x" else src.read_text())
+    with patch.object(unix, "_copy_file", side_effect=copy_file):
+        with raises(OSError):
+            store.stage([(srcs[0], dst)], strategies=("copy",), verify=unix.VerifyOptions())
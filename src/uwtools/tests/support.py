@@ -1,10 +1,17 @@
 # pylint: disable=missing-function-docstring
 
+import os
 import re
+from contextlib import contextmanager
 from importlib import resources
 from logging import LogRecord
 from pathlib import Path
-from typing import List
+from typing import Iterator, List
+from unittest.mock import patch
+
+from moto import mock_aws
+
+from uwtools.files.gateway import s3
 
 
 def compare_files(path1: str, path2: str) -> bool:
@@ -101,6 +108,32 @@ def line_in_lines(line: str, lines: List[str]) -> bool:
     return any(x for x in lines if re.match(r"^.*%s$" % re.escape(line), x))
 
 
+@contextmanager
+def mock_s3(bucket: str) -> Iterator[str]:
+    """
+    Stands in for S3, with an empty bucket, using fresh client settings and listing cache.
+
+    Parameters
+    ----------
+    bucket
+        Name of the bucket to create
+
+    Returns
+    -------
+    The bucket name.
+    """
+    env = {
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_DEFAULT_REGION": "us-east-1",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+    }
+    with patch.dict(os.environ, env), mock_aws():
+        with patch.object(s3, "S3_CLIENT", None), patch.dict(s3.SETTINGS):
+            with patch.dict(s3._listings, clear=True):  # pylint: disable=protected-access
+                s3._client().create_bucket(Bucket=bucket)  # pylint: disable=protected-access
+                yield bucket
+
+
 def msg_in_caplog(msg: str, records: List[LogRecord]) -> bool:
     """
     Determines whether the given message occurs in the given list of log records.
@@ -1,17 +1,24 @@
-# pylint: disable=duplicate-code,missing-function-docstring,redefined-outer-name
+# pylint: disable=duplicate-code,missing-function-docstring,protected-access,redefined-outer-name
+# pylint: disable=too-many-lines
 """
 Tests for uwtools.config module.
 """
 
 import builtins
+import copy
 import datetime
 import filecmp
+import json
 import logging
 import os
+import pickle
 import re
+import subprocess
 import sys
+import threading
 from argparse import ArgumentTypeError
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, List
 from unittest.mock import patch
@@ -20,7 +27,7 @@ import pytest
 import yaml
 from pytest import fixture, raises
 
-from uwtools import config, exceptions
+from uwtools import config, config_includes, exceptions
 from uwtools.exceptions import UWConfigError
 from uwtools.tests.support import compare_files, fixture_path, line_in_lines, msg_in_caplog
 from uwtools.utils import cli_helpers
@@ -30,7 +37,8 @@ from uwtools.utils import cli_helpers
 
 def help_cfgclass(ext):
     return getattr(
-        config, "%sConfig" % {".nml": "F90", ".ini": "INI", ".sh": "INI", ".yaml": "YAML"}[ext]
+        config,
+        "%sConfig" % {".nml": "F90", ".ini": "INI", ".sh": "INI", ".yaml": "YAML"}[ext],
     )
 
 
@@ -93,6 +101,44 @@ def salad_base():
     }
 
 
+def test_base_config(tmp_path):
+    """
+    Test that a supplied base config object is used instead of loading the input base file.
+    """
+    infile = fixture_path("simple2.yaml")
+    outfile = tmp_path / "out.yaml"
+    base_config = config.YAMLConfig(infile)
+    base_config["nodes"] = 12
+    config.create_config_obj(input_base_file=infile, base_config=base_config, outfile=outfile)
+    assert config.YAMLConfig(str(outfile))["nodes"] == 12
+
+
+def test_cache_dir(tmp_path):
+    """
+    Test that an output created from unchanged inputs is reused from the cache.
+    """
+    cache_dir = str(tmp_path / "cache")
+    infile = fixture_path("include_files.yaml")
+    outfile = str(tmp_path / "out.yaml")
+    with patch.dict(os.environ, {"UFSEXEC": "/my/path/"}):
+        kwargs = dict(input_base_file=infile, cache_dir=cache_dir, outfile=outfile)
+        config.create_config_obj(**kwargs)  # type: ignore
+        expected = Path(outfile).read_text(encoding="utf-8")
+        os.remove(outfile)
+        with patch.object(config, "YAMLConfig") as YAMLConfig:
+            config.create_config_obj(**kwargs)  # type: ignore
+            YAMLConfig.assert_not_called()
+        assert Path(outfile).read_text(encoding="utf-8") == expected
+        entries = list((tmp_path / "cache").glob("*.json"))
+        assert len(entries) == 1
+        with open(entries[0], "r", encoding="utf-8") as f:
+            includes = json.load(f)["files"]
+        assert sorted(Path(x).name for x in includes) == [
+            "fruit_config.yaml",
+            "fruit_config_similar.yaml",
+        ]
+
+
 @pytest.mark.parametrize("fmt", ["F90", "INI", "YAML"])
 def test_compare_config(fmt, salad_base, caplog):
     """
@@ -183,7 +229,10 @@ def test_config_file_conversion(tmp_path):
     cfgfile = fixture_path("simple2.ini")
     outfile = str(tmp_path / "test_config_conversion.nml")
     config.create_config_obj(
-        input_base_file=infile, config_file=cfgfile, outfile=outfile, config_file_type="F90"
+        input_base_file=infile,
+        config_file=cfgfile,
+        outfile=outfile,
+        config_file_type="F90",
     )
     expected = config.F90Config(infile)
     config_obj = config.F90Config(cfgfile)
@@ -250,6 +299,87 @@ def test_dereference():
         assert cfg["grid_stats"]["points_per_level"] == 10000
 
 
+def test_dereference_all_cycles_and_unresolved(caplog, tmp_path):
+    """
+    Test that reference cycles and unresolved references are reported with their chains.
+    """
+    path = tmp_path / "cfg.yaml"
+    with open(path, "w", encoding="utf-8") as f:
+        print(
+            """
+a: '{{ b }}'
+b: '{{ a }}'
+c: '{{ d }}'
+d: '{{ NOPE }}'
+e: '{{ f }}'
+f: 88
+""",
+            file=f,
+        )
+    log = logging.getLogger("test")
+    log.setLevel(logging.DEBUG)
+    cfgobj = config.YAMLConfig(config_path=path, log_name="test")
+    cfgobj.dereference_all()
+    assert cfgobj.data == {
+        "a": "{{ b }}",
+        "b": "{{ a }}",
+        "c": "{{ NOPE }}",
+        "d": "{{ NOPE }}",
+        "e": 88,
+        "f": 88,
+    }
+    assert msg_in_caplog("Reference cycle: a -> b -> a", caplog.records)
+    assert msg_in_caplog("Unresolved reference: d -> NOPE", caplog.records)
+    assert msg_in_caplog("Unresolved reference: c -> d -> NOPE", caplog.records)
+
+
+def test_dereference_all_incremental():
+    """
+    Test that, after an update, only the affected values are rendered again.
+    """
+    with patch.dict(os.environ, {"UFSEXEC": "/my/path/"}):
+        cfg = config.YAMLConfig(fixture_path("gfs.yaml"))
+        cfg.dereference_all()
+        assert cfg["testupdate"] == "testpassed"
+        cfg.update_values({"updatethis": "updated", "grid_stats": {"num_ens_members": 3}})
+        with patch.object(cfg, "_render", wraps=cfg._render) as render:
+            cfg.dereference_all()
+        rendered = sorted(call.args[0] for call in render.call_args_list)
+        assert rendered == ["points_per_level", "testupdate", "total_ens_points"]
+        assert cfg["testupdate"] == "updated"
+        assert cfg["grid_stats"]["total_ens_points"] == 1920000
+        assert cfg["grid_stats"]["points_per_level"] == 10000
+        reference = config.YAMLConfig(fixture_path("gfs.yaml"))
+        reference.update_values({"updatethis": "updated", "grid_stats": {"num_ens_members": 3}})
+        reference.dereference_all()
+        assert cfg.data == reference.data
+
+
+def test_dereference_all_incremental_setitem():
+    cfg = config.YAMLConfig(fixture_path("gfs.yaml"))
+    cfg.dereference_all()
+    cfg["updatethis"] = "set"
+    cfg.dereference_all()
+    assert cfg["testupdate"] == "set"
+    del cfg["updatethis"]
+    cfg.dereference_all()
+    assert cfg["testupdate"] == "{{ updatethis }}"
+
+
+def test_referenced_environment():
+    with patch.dict(os.environ, {"UFSEXEC": "/my/path/"}):
+        cfg = config.YAMLConfig(fixture_path("gfs.yaml"))
+        expected = {
+            "NOPE": None,
+            "UFSEXEC": "/my/path/",
+            "current_cycle": None,
+            "experiment_dir": None,
+        }
+        assert cfg.referenced_environment() == expected
+        cfg.dereference_all()
+        assert cfg.referenced_environment() == expected
+
+
 def test_dereference_bad_filter(tmp_path):
     """
     Test that an unregistered filter is detected and treated as an error.
@@ -338,7 +468,10 @@ def test_ini_config_bash(salad_base, tmp_path):
     infile = fixture_path("simple.sh")
     outfile = tmp_path / "outfile.sh"
     cfgobj = config.INIConfig(infile, space_around_delimiters=False)
-    expected = {**salad_base["salad"], "how_many": "12"}  # str "12" (not int 12) for INI
+    expected = {
+        **salad_base["salad"],
+        "how_many": "12",
+    }  # str "12" (not int 12) for INI
     assert cfgobj == expected
     cfgobj.dump_file(outfile)
     assert filecmp.cmp(infile, outfile)
@@ -403,6 +536,21 @@ def test_parse_include_ini():
     assert len(cfgobj) == 5
 
 
+def test_parse_include_prefetch(tmp_path):
+    """
+    Test that files included by a Fortran namelist are loaded concurrently.
+    """
+    for fn in ("a", "b"):
+        (tmp_path / f"{fn}.nml").write_text(f"&{fn}\n  x = 1\n/\n", encoding="utf-8")
+    path = tmp_path / "config.nml"
+    path.write_text("&a\n  i = '!INCLUDE [a.nml]'\n  j = '!INCLUDE [b.nml]'\n/\n", encoding="utf-8")
+    config_includes.cache_clear()
+    with patch.object(config, "ThreadPoolExecutor", wraps=config.ThreadPoolExecutor) as pool:
+        cfgobj = config.F90Config(str(path))
+    pool.assert_called_once_with(max_workers=2)
+    assert cfgobj == {"a": {"x": 1}, "b": {"x": 1}}
+
+
 def test_parse_include_mult_sect():
     """
     Test that non-YAML handles !INCLUDE tags with files that have multiple sections in separate
@@ -693,6 +841,164 @@ def test_yaml_config_include_files():
     assert cfgobj["reverse_files"]["vegetable"] == "eggplant"
 
 
+def test_yaml_config_include_files_concurrent(tmp_path):
+    """
+    Test that configs including different files can be loaded concurrently.
+    """
+    paths = []
+    for i in range(8):
+        (tmp_path / f"include{i}.yaml").write_text(f"n: {i}\n", encoding="utf-8")
+        path = tmp_path / f"config{i}.yaml"
+        path.write_text(f"a: !INCLUDE [{tmp_path}/include{i}.yaml]\n", encoding="utf-8")
+        paths.append(str(path))
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        cfgobjs = list(executor.map(config.YAMLConfig, paths * 4))
+    assert [cfgobj["a"]["n"] for cfgobj in cfgobjs] == list(range(8)) * 4
+    assert "!INCLUDE" not in config.SafeLoader.yaml_constructors
+
+
+@pytest.mark.parametrize("cls,ext", [("F90Config", "nml"), ("INIConfig", "ini")])
+def test_config_load_concurrent(cls, ext):
+    """
+    Test that namelist and INI configs can be loaded concurrently in a fresh interpreter.
+    """
+    paths = [fixture_path(f"simple.{ext}")] * 8
+    code = (
+        "import sys\n"
+        "from concurrent.futures import ThreadPoolExecutor\n"
+        "from uwtools import config\n"
+        "with ThreadPoolExecutor(max_workers=8) as executor:\n"
+        f"    cfgobjs = list(executor.map(config.{cls}, sys.argv[1:]))\n"
+        "print(len({str(cfgobj.data) for cfgobj in cfgobjs}))"
+    )
+    for _ in range(5):
+        result = subprocess.run(
+            [sys.executable, "-c", code, *paths],
+            capture_output=True,
+            check=False,
+            text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "1"
+
+
+def test_yaml_config_include_files_cached(tmp_path):
+    """
+    Test that an included file is parsed once, until it or a file it includes changes.
+    """
+    (tmp_path / "inner.yaml").write_text("n: 1\n", encoding="utf-8")
+    (tmp_path / "outer.yaml").write_text("inner: !INCLUDE [inner.yaml]\n", encoding="utf-8")
+    path = tmp_path / "config.yaml"
+    path.write_text("a: !INCLUDE [outer.yaml]\nb: !INCLUDE [outer.yaml]\n", encoding="utf-8")
+    config_includes.cache_clear()
+    _load = config.YAMLConfig._load
+    with patch.object(config.YAMLConfig, "_load", autospec=True, side_effect=_load) as _load:
+        cfgobj = config.YAMLConfig(str(path))
+        cfgobj["a"]["inner"]["n"] = 2
+        assert config.YAMLConfig(str(path))["b"] == {"inner": {"n": 1}}
+        assert _load.call_count == 4
+        assert cfgobj.includes == [str(tmp_path / f) for f in ("outer.yaml", "inner.yaml")] * 2
+        os.utime(tmp_path / "inner.yaml", ns=(0, 0))
+        config.YAMLConfig(str(path))
+        assert _load.call_count == 7
+
+
+def test_yaml_config_include_files_prefetch(tmp_path):
+    """
+    Test that included files are loaded concurrently, and merged as when loaded in turn.
+    """
+    for fn in ("a", "b", "c", "d"):
+        text = f"{fn}: 1\nwho: {fn}\nnested: !INCLUDE [d.yaml, e.yaml]\n" if fn == "c" else ""
+        (tmp_path / f"{fn}.yaml").write_text(text or f"{fn}: 1\nwho: {fn}\n", encoding="utf-8")
+    (tmp_path / "e.yaml").write_text("who: e\n", encoding="utf-8")
+    path = tmp_path / "config.yaml"
+    path.write_text(
+        "x: !INCLUDE [a.yaml, b.yaml, c.yaml]\ny: !INCLUDE ['c.yaml', a.yaml]\n", encoding="utf-8"
+    )
+    config_includes.cache_clear()
+    with patch.object(config.Config, "_prefetch"):
+        expected = config.YAMLConfig(str(path))
+    config_includes.cache_clear()
+    threads = set()
+    _load = config.YAMLConfig._load
+
+    def load(self, config_path):
+        threads.add(threading.current_thread())
+        return _load(self, config_path)
+
+    with patch.object(config.YAMLConfig, "_load", load):
+        cfgobj = config.YAMLConfig(str(path))
+    assert len(threads) > 1
+    assert cfgobj == expected
+    assert cfgobj["x"]["who"] == "c"
+    assert cfgobj["x"]["nested"]["who"] == "e"
+    assert cfgobj["y"]["who"] == "a"
+    assert cfgobj.includes == expected.includes
+
+
+def test_yaml_config_include_files_prefetch_error(tmp_path):
+    """
+    Test that errors loading included files are raised in turn, not when prefetching.
+    """
+    (tmp_path / "a.yaml").write_text("a: 1\n", encoding="utf-8")
+    path = tmp_path / "config.yaml"
+    path.write_text("x: !INCLUDE [a.yaml, nope.yaml]\n", encoding="utf-8")
+    with raises(FileNotFoundError):
+        config.YAMLConfig(str(path))
+
+
+def test_yaml_config_include_cycle(caplog, tmp_path):
+    """
+    Test that a file including itself, indirectly, is reported.
+    """
+    a, b = [tmp_path / fn for fn in ("a.yaml", "b.yaml")]
+    a.write_text("b: !INCLUDE [b.yaml]\n", encoding="utf-8")
+    b.write_text("a: !INCLUDE [a.yaml]\n", encoding="utf-8")
+    config_includes.cache_clear()
+    with raises(UWConfigError) as e:
+        config.YAMLConfig(str(a))
+    msg = f"Include cycle: {a} -> {b} -> {a}"
+    assert str(e.value) == msg
+    assert msg_in_caplog(msg, caplog.records)
+
+
+def test_yaml_config_include_cycle_cached(tmp_path):
+    """
+    Test that a cached include file is not reused when it would hide an include cycle.
+    """
+    a, b, c = [tmp_path / fn for fn in ("a.yaml", "b.yaml", "c.yaml")]
+    b.write_text("c: !INCLUDE [c.yaml]\n", encoding="utf-8")
+    c.write_text("n: 1\n", encoding="utf-8")
+    config_includes.cache_clear()
+    a.write_text("b: !INCLUDE [b.yaml]\n", encoding="utf-8")
+    config.YAMLConfig(str(a))
+    c.write_text("c: !INCLUDE [b.yaml]\n", encoding="utf-8")
+    os.utime(c, ns=(0, 0))
+    with raises(UWConfigError):
+        config.YAMLConfig(str(a))
+    c.unlink()
+    with raises(FileNotFoundError):
+        config.YAMLConfig(str(a))
+
+
+def test_yaml_config_pure_python_backend(tmp_path):
+    """
+    Test that the pure-Python YAML loader and dumper, used if libyaml is unavailable, give the same
+    results as the default backend.
+    """
+    infile = fixture_path("include_files.yaml")
+    outfiles = [tmp_path / "default.yaml", tmp_path / "python.yaml"]
+    cfgobj = config.YAMLConfig(infile)
+    cfgobj.dump_file(outfiles[0])
+    with patch.multiple(config, SafeDumper=yaml.SafeDumper, SafeLoader=yaml.SafeLoader):
+        pycfgobj = config.YAMLConfig(infile)
+        pycfgobj.dump_file(outfiles[1])
+        assert repr(pycfgobj) == repr(cfgobj)
+    assert pycfgobj == cfgobj
+    assert pycfgobj["salad"]["fruit"] == "papaya"
+    assert filecmp.cmp(*outfiles)
+
+
 def test_yaml_config_simple(tmp_path):
     """
     Test that YAML load, update, and dump work with a basic YAML file.
@@ -760,6 +1066,45 @@ def test_Config___repr__(f90_cfgobj, capsys):
     assert yaml.safe_load(capsys.readouterr().out)["nl"]["n"] == 88
 
 
+def test_Config_copy_and_pickle():
+    cfg = config.YAMLConfig(fixture_path("gfs.yaml"))
+    cfg.dereference_all()
+    for other in copy.deepcopy(cfg), pickle.loads(pickle.dumps(cfg)):
+        assert other == cfg
+        assert other._graph.data is other.data
+        other["fcst"]["length"] = 24
+        assert cfg["fcst"]["length"] == 12
+        assert other._local is not cfg._local
+
+
+def test_Config__context(f90_cfgobj):
+    section = {"a": "section", "b": "section"}
+    full = {"a": "full", "s": section}
+    with patch.dict(os.environ, {"a": "env", "b": "env", "c": "env"}):
+        context = f90_cfgobj._context(section, full)
+        assert [context[x] for x in "abc"] == ["full", "section", "env"]
+    with raises(TypeError):
+        context["a"] = "new"  # type: ignore
+    section["d"] = "new"
+    assert context["d"] == "new"
+
+
+def test_Config_update_values_dst(f90_cfgobj, tmp_path):
+    path = tmp_path / "other.nml"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("&nl n = 1, m = 2 /")
+    other = config.F90Config(config_path=path)
+    f90_cfgobj.update_values({"nl": {"m": 3}, "new": {"k": 4}}, dst=other)
+    assert other.data == {"nl": {"n": 1, "m": 3}, "new": {"k": 4}}
+    assert f90_cfgobj.data == {"nl": {"n": 88}}
+
+
+def test_Config_dereference_single_pass(f90_cfgobj):
+    f90_cfgobj.update_values({"nl": {"m": "{{ n }}"}})
+    f90_cfgobj.dereference()
+    assert f90_cfgobj["nl"] == {"n": 88, "m": 88}
+
+
 def test_Config_dereference_unexpected_error(f90_cfgobj):
     exctype = FloatingPointError
     with patch.object(config.J2Template, "render_template", side_effect=exctype):
@@ -783,7 +1128,11 @@ def test_Config_iterate_values(f90_cfgobj):
     set_var: List[str] = []
     d = {1: "", 2: None, 3: "{{ n }}", 4: {"a": 88}, 5: [{"b": 99}], 6: "string"}
     f90_cfgobj.iterate_values(
-        config_dict=d, empty_var=empty_var, jinja2_var=jinja2_var, set_var=set_var, parent="p"
+        config_dict=d,
+        empty_var=empty_var,
+        jinja2_var=jinja2_var,
+        set_var=set_var,
+        parent="p",
     )
     assert empty_var == ["    p1", "    p2"]
     assert jinja2_var == ["    p3: {{ n }}"]
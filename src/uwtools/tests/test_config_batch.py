@@ -0,0 +1,115 @@
+# pylint: disable=missing-function-docstring,protected-access,redefined-outer-name
+"""
+Tests for uwtools.config_batch module.
+"""
+
+import json
+from unittest.mock import Mock, patch
+
+import yaml
+from pytest import fixture, raises
+
+from uwtools import config, config_batch
+from uwtools.exceptions import UWConfigError
+from uwtools.logger import Logger
+from uwtools.tests.support import fixture_path
+
+
+@fixture
+def entries(tmp_path):
+    base = fixture_path("simple2.yaml")
+    return [
+        {"input_base_file": base, "outfile": str(tmp_path / "a.yaml")},
+        {"input_base_file": fixture_path("simple2.nml"), "outfile": str(tmp_path / "b.nml")},
+        {"input_base_file": base, "outfile": str(tmp_path / "c.ini"), "output_file_type": "INI"},
+        {"input_base_file": base, "config_file": "/no/such/file.yaml"},
+    ]
+
+
+@fixture
+def log():
+    return Logger(name="test_config_batch", quiet=True)
+
+
+def test__chunks(entries):
+    chunks = config_batch._chunks(entries, jobs=1)
+    assert [[i for i, _ in chunk] for chunk in chunks] == [[0, 2, 3], [1]]
+    chunks = config_batch._chunks(entries, jobs=2)
+    assert [[i for i, _ in chunk] for chunk in chunks] == [[0, 2], [3], [1]]
+    chunks = config_batch._chunks(entries * 4, jobs=99)
+    assert all(len(chunk) == 1 for chunk in chunks)
+
+
+def test_load_manifest(tmp_path):
+    manifest = [
+        {"input_base_file": "in.yaml", "outfile": "/abs/out.nml", "output_file_type": "F90"}
+    ]
+    for fn, text in (("m.yaml", yaml.dump(manifest)), ("m.json", json.dumps(manifest))):
+        path = tmp_path / fn
+        path.write_text(text, encoding="utf-8")
+        assert config_batch.load_manifest(str(path)) == [
+            {
+                "input_base_file": str(tmp_path / "in.yaml"),
+                "outfile": "/abs/out.nml",
+                "output_file_type": "F90",
+            }
+        ]
+
+
+def test_load_manifest_bad(tmp_path):
+    path = tmp_path / "m.yaml"
+    for text, msg in [
+        ("[", "Could not parse manifest"),
+        ("input_base_file: in.yaml", "must contain a list"),
+        ("- outfile: out.yaml", "Manifest entry 0 must be a mapping with an input_base_file"),
+        (
+            "- {input_base_file: in.yaml, dry_run: true}",
+            "Manifest entry 0 has unknown keys: dry_run",
+        ),
+    ]:
+        path.write_text(text, encoding="utf-8")
+        with raises(UWConfigError) as e:
+            config_batch.load_manifest(str(path))
+        assert msg in str(e.value)
+
+
+def test_report():
+    results = [
+        config_batch.Result(0, "/a.yaml", 0.5),
+        config_batch.Result(1, None, 0.25, "oops"),
+    ]
+    log = Mock()
+    assert not config_batch.report(results, log)
+    assert [c.args[0] for c in log.info.call_args_list] == [
+        "Manifest summary:",
+        "   0 OK        0.500s /a.yaml",
+        "   1 FAILED    0.250s -: oops",
+        "1 of 2 entries succeeded",
+    ]
+    assert config_batch.report(results[:1], log)
+
+
+def test_run(entries, log, tmp_path):
+    with patch.object(config, "YAMLConfig", wraps=config.YAMLConfig) as YAMLConfig:
+        results = config_batch.run(entries, log=log, jobs=1)
+    # The shared base file is loaded once:
+    paths = [c.args[0] for c in YAMLConfig.call_args_list]
+    assert paths == [fixture_path("simple2.yaml"), "/no/such/file.yaml"]
+    assert [(r.entry, r.outfile, r.error) for r in results] == [
+        (0, str(tmp_path / "a.yaml"), None),
+        (1, str(tmp_path / "b.nml"), None),
+        (2, str(tmp_path / "c.ini"), None),
+        (3, None, "[Errno 2] No such file or directory: '/no/such/file.yaml'"),
+    ]
+    assert config.YAMLConfig(str(tmp_path / "a.yaml")) == config.YAMLConfig(
+        fixture_path("simple2.yaml")
+    )
+    assert (tmp_path / "b.nml").is_file()
+    assert "scheduler=slurm" in (tmp_path / "c.ini").read_text(encoding="utf-8")
+
+
+def test_run_process_pool(entries, log, tmp_path):
+    results = config_batch.run(entries[:3], log=log, jobs=2)
+    assert [r.error for r in results] == [None, None, None]
+    for fn in ("a.yaml", "b.nml", "c.ini"):
+        assert (tmp_path / fn).is_file()
@@ -0,0 +1,84 @@
+# pylint: disable=missing-function-docstring,redefined-outer-name
+"""
+Tests for uwtools.config_cache module.
+"""
+
+import os
+from unittest.mock import patch
+
+from pytest import fixture
+
+from uwtools import config_cache
+from uwtools.config_cache import ConfigCache
+
+
+@fixture
+def assets(tmp_path):
+    infile, include, outfile = [tmp_path / fn for fn in ("in.yaml", "include.yaml", "out.yaml")]
+    for path in infile, include, outfile:
+        path.write_text(path.name, encoding="utf-8")
+    return ConfigCache(str(tmp_path / "cache")), infile, include, outfile
+
+
+def test_digest(tmp_path):
+    path = tmp_path / "f"
+    path.write_text("foo", encoding="utf-8")
+    assert config_cache.digest(str(path)).startswith("2c26b46b68ffc68ff99b453c1d304134")
+
+
+def test_ConfigCache_key(assets):
+    _, infile, include, _ = assets
+    key = ConfigCache.key([str(infile), None], ["YAML"])
+    assert key == ConfigCache.key([str(infile), None], ["YAML"])
+    assert key != ConfigCache.key([str(infile), None], ["INI"])
+    assert key != ConfigCache.key([str(include), None], ["YAML"])
+
+
+def test_ConfigCache_fetch_miss(assets, tmp_path):
+    cache, *_ = assets
+    assert not cache.fetch("nope", str(tmp_path / "copy"))
+    assert not (tmp_path / "copy").exists()
+
+
+def test_ConfigCache_store_fetch(assets, tmp_path):
+    cache, _, include, outfile = assets
+    with patch.dict(os.environ, {"FOO": "foo"}):
+        cache.store("k", str(outfile), [str(include)], {"FOO": "foo", "BAR": None})
+        assert cache.fetch("k", str(tmp_path / "copy"))
+    assert (tmp_path / "copy").read_text(encoding="utf-8") == "out.yaml"
+
+
+def test_ConfigCache_fetch_invalidated(assets, tmp_path):
+    cache, _, include, outfile = assets
+    with patch.dict(os.environ, {"FOO": "foo"}):
+        cache.store("k", str(outfile), [str(include)], {"FOO": "foo"})
+    # The environment variable changed:
+    with patch.dict(os.environ, {"FOO": "bar"}):
+        assert not cache.fetch("k", str(tmp_path / "copy"))
+    # The included file changed:
+    include.write_text("changed", encoding="utf-8")
+    with patch.dict(os.environ, {"FOO": "foo"}):
+        assert not cache.fetch("k", str(tmp_path / "copy"))
+    # The included file is gone:
+    include.unlink()
+    with patch.dict(os.environ, {"FOO": "foo"}):
+        assert not cache.fetch("k", str(tmp_path / "copy"))
+
+
+def test_ConfigCache_evict(assets, tmp_path):
+    cache, _, _, outfile = assets
+    cache.max_size = 200
+    for key in ("a", "b", "c"):
+        cache.store(key, str(outfile), [], {})
+    # Use "a", so that "b" is the least recently used entry.
+    os.utime(cache.path / "a.json", (0, 0))
+    os.utime(cache.path / "b.json", (0, 0))
+    assert cache.fetch("a", str(tmp_path / "copy"))
+    cache.max_size = sum(p.stat().st_size for p in cache.path.glob("[abc].*")) - 1
+    cache.store("c", str(outfile), [], {})
+    assert sorted(p.name for p in cache.path.glob("[!.]*")) == [
+        "a.json",
+        "a.out",
+        "c.json",
+        "c.out",
+    ]
@@ -0,0 +1,135 @@
+# pylint: disable=missing-function-docstring
+"""
+Tests for uwtools.config_graph module.
+"""
+
+import os
+from unittest.mock import patch
+
+from uwtools import config_graph
+from uwtools.config_graph import ConfigGraph
+
+
+def render(key, val, section):  # pylint: disable=unused-argument
+    return val.replace("{{", "").replace("}}", "").strip()
+
+
+def test_fragments():
+    assert config_graph.fragments("a{{ b }} c") == ["a", "{{ b }}", "c"]
+    assert config_graph.fragments("{% if a %}b{% endif %}") == ["{% if a %}b{% endif %}"]
+
+
+def test_is_template():
+    assert config_graph.is_template("{{ a }}")
+    assert config_graph.is_template(["{% if a %}b{% endif %}"])
+    assert not config_graph.is_template(88)
+
+
+def test_references():
+    refs = config_graph.references("{{ fcst.length // freq + d['k'][n] }}")
+    assert refs == {("fcst", "length"), ("freq",), ("d", "k"), ("n",)}
+
+
+def test_references_loop_variables_and_errors():
+    assert config_graph.references("{% for h in hours %}{{ h }}{% endfor %}") == {("hours",)}
+    assert config_graph.references("{{ a | path_join }}") == {("a",)}
+    assert config_graph.references("{{ a | no_such_filter }}") == set()
+    assert config_graph.references("{{ a") == set()
+
+
+def test_ConfigGraph_order():
+    data = {
+        "a": "{{ b }}",
+        "b": "{{ s.c ~ s.x }}",
+        "s": {"c": "{{ d }}", "d": 1, "e": "{{ s }}"},
+    }
+    graph = ConfigGraph(data)
+    assert graph.order == [("s", "c"), ("s", "e"), ("b",), ("a",)]
+    assert graph.deps[("s", "e")] == [("s", "c")]
+    assert not graph.cycles
+    assert not graph.missing
+
+
+def test_ConfigGraph_precedence():
+    # Top-level keys take precedence over section keys, which take precedence over the environment.
+    data = {"x": "{{ y }}", "y": "{{ z }}", "s": {"t": "{{ x }}", "x": "{{ HOME }}"}}
+    with patch.dict(os.environ, {"HOME": "/home"}):
+        graph = ConfigGraph(data)
+    assert graph.deps[("s", "t")] == [("x",)]
+    assert graph.deps[("s", "x")] == []
+    assert graph.missing == {("y",): ["z"]}
+
+
+def test_ConfigGraph_cycles():
+    data = {"a": "{{ b }}", "b": "{{ c }}", "c": "{{ a }}", "d": "{{ a }}", "e": "{{ e }}"}
+    graph = ConfigGraph(data)
+    assert graph.cycles == [[("a",), ("b",), ("c",), ("a",)]]
+    assert graph.order == [("d",), ("e",)]
+    assert graph.missing == {("e",): ["e"]}
+
+
+def test_ConfigGraph_cycles_cross_edge():
+    # d is only reached through a cross edge from a, but is on the cycle d -> b -> c -> a -> d.
+    data = {"a": "{{ b }}{{ d }}", "b": "{{ c }}", "c": "{{ a }}", "d": "{{ b }}", "e": "{{ d }}"}
+    graph = ConfigGraph(data)
+    assert graph.cycles == [
+        [("a",), ("b",), ("c",), ("a",)],
+        [("d",), ("b",), ("c",), ("a",), ("d",)],
+    ]
+    assert graph.order == [("e",)]
+    graph.render(lambda key, val, section: "rendered")
+    assert data["d"] == "{{ b }}"
+
+
+def test_ConfigGraph_cycles_separate():
+    data = {"a": "{{ b }}", "b": "{{ a }}", "c": "{{ d }}", "d": "{{ c ~ a }}", "e": "{{ d }}"}
+    graph = ConfigGraph(data)
+    assert graph.cycles == [[("a",), ("b",), ("a",)], [("c",), ("d",), ("c",)]]
+    assert graph.order == [("e",)]
+
+
+def test_ConfigGraph_render():
+    data = {"a": "{{ b }}", "b": "{{ c }}", "c": "{{ undefined }}", "d": "{{ x }}", "x": 1}
+    graph = ConfigGraph(data)
+    graph.render(lambda key, val, section: val if key != "d" else 1)
+    assert data["d"] == 1
+    assert graph.unresolved == {
+        ("c",): ["c", "undefined"],
+        ("b",): ["b", "c", "undefined"],
+        ("a",): ["a", "b", "c", "undefined"],
+    }
+    data = {"s": {"a": "{{ b }}", "b": "x"}}
+    ConfigGraph(data).render(render)
+    assert data == {"s": {"a": "b", "b": "x"}}
+
+
+def test_ConfigGraph_update():
+    data = {"a": "{{ b }}", "b": "{{ c }}", "c": 1, "d": "{{ e }}", "e": 2, "s": {"t": "{{ c }}"}}
+    graph = ConfigGraph(data)
+    graph.render(lambda key, val, section: "rendered")
+    assert graph.templates[("a",)] == "{{ b }}"
+    data["c"] = 3
+    graph.update([("c",)])
+    assert set(graph.order) == {("a",), ("b",), ("s", "t")}
+    assert graph.order.index(("b",)) < graph.order.index(("a",))
+    assert data["a"] == "{{ b }}"
+    assert data["d"] == "rendered"
+
+
+def test_ConfigGraph_update_replaced_and_removed():
+    data = {"a": "{{ b }}", "b": "{{ s.c }}", "s": {"c": "{{ x }}"}, "x": 1}
+    graph = ConfigGraph(data)
+    graph.render(lambda key, val, section: "rendered")
+    data["b"] = "pinned"
+    graph.update([("b",)])
+    assert ("b",) not in graph.templates
+    assert graph.order == [("a",)]
+    del data["s"]
+    data["x"] = "{{ y }}"
+    graph.update([("s",), ("x",)])
+    assert ("s", "c") not in graph.templates
+    assert graph.order == [("x",)]
+    assert graph.missing == {("x",): ["y"]}
+    data["s"] = {"c": "{{ x }}"}
+    graph.update([("s",)])
+    assert graph.order == [("s", "c")]
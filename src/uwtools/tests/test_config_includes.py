@@ -0,0 +1,47 @@
+# pylint: disable=missing-function-docstring,protected-access
+"""
+Tests for uwtools.config_includes module.
+"""
+
+import os
+from unittest.mock import patch
+
+from uwtools import config_includes
+
+
+def test_cache_put_get(tmp_path):
+    path = str(tmp_path / "a.yaml")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("a: 1\n")
+    config_includes.cache_clear()
+    key = (dict, path, str(tmp_path))
+    cfg = {"a": {"b": 1}}
+    config_includes.cache_put(key, cfg, [(path, config_includes.signature(path))])
+    cfg["a"]["b"] = 2
+    cached, files = config_includes.cache_get(key, [])  # type: ignore
+    assert cached == {"a": {"b": 1}}
+    assert files == [(path, config_includes.signature(path))]
+    cached["a"]["b"] = 3
+    assert config_includes.cache_get(key, [])[0] == {"a": {"b": 1}}  # type: ignore
+    # Entries drawing on a file being loaded, or on changed or missing files, are not used:
+    assert config_includes.cache_get(key, [path]) is None
+    os.utime(path, ns=(0, 0))
+    assert config_includes.cache_get(key, []) is None
+    os.remove(path)
+    assert config_includes.cache_get(key, []) is None
+    assert config_includes.cache_get((dict, "nope", ""), []) is None
+
+
+def test_cache_size(tmp_path):
+    config_includes.cache_clear()
+    path = str(tmp_path / "a.yaml")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("a: 1\n")
+    files = [(path, config_includes.signature(path))]
+    keys = [(dict, path, str(n)) for n in range(3)]
+    with patch.object(config_includes, "CACHE_SIZE", 2):
+        config_includes.cache_put(keys[0], {}, files)
+        config_includes.cache_put(keys[1], {}, files)
+        assert config_includes.cache_get(keys[0], [])
+        config_includes.cache_put(keys[2], {}, files)
+    assert list(config_includes._cache) == [keys[0], keys[2]]
@@ -3,10 +3,15 @@
 Tests for uwtools.j2template module.
 """
 
+from collections import ChainMap
+from collections.abc import Mapping
+from types import MappingProxyType
 from types import SimpleNamespace as ns
 
+from jinja2 import StrictUndefined, UndefinedError
 from pytest import fixture, raises
 
+from uwtools import j2template
 from uwtools.j2template import J2Template
 
 
@@ -40,3 +45,62 @@ def test_render_file(testdata, tmp_path):
 
 def test_render_string(testdata):
     validate(J2Template(testdata.config, template_str=testdata.template))
+
+
+def test_render_string_mapping(testdata):
+    config = MappingProxyType(ChainMap({"greeting": "Hello"}, {"recipient": "the world"}))
+    validate(J2Template(config, template_str=testdata.template))
+
+
+def test_render_string_cached(testdata):
+    j2template.template_cache_clear()
+    first = J2Template(testdata.config, template_str=testdata.template)
+    second = J2Template({"greeting": "Hi", "recipient": "you"}, template_str=testdata.template)
+    assert second.template is first.template
+    assert second.render_template() == "Hi to you"
+    info = j2template.template_cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+
+
+def test_render_string_cached_by_loader_args(testdata):
+    j2template.template_cache_clear()
+    first = J2Template(testdata.config, template_str=testdata.template)
+    second = J2Template(
+        testdata.config,
+        template_str=testdata.template,
+        loader_args={"undefined": StrictUndefined},
+    )
+    assert second.template is not first.template
+    assert j2template.template_cache_info().misses == 2
+    with raises(UndefinedError):
+        J2Template(
+            {}, template_str=testdata.template, loader_args={"undefined": StrictUndefined}
+        ).render_template()
+
+
+def test_render_string_looks_up_referenced_variables_only(testdata):
+    class Context(Mapping):
+        """
+        A context that may only be looked up in, not iterated over.
+        """
+
+        def __getitem__(self, key):
+            return testdata.config[key]
+
+        def __iter__(self):
+            raise AssertionError("The context was copied in full")
+
+        def __len__(self):
+            return len(testdata.config)
+
+    template = J2Template(Context(), template_str="{% set x = 1 %}{{ greeting ~ x ~ range(1)[0] }}")
+    assert template.render_template() == "Hello10"
+
+
+def test_render_file_include(tmp_path):
+    (tmp_path / "inner.j2").write_text("{{ recipient }}", encoding="utf-8")
+    include = "{% include '" + str(tmp_path / "inner.j2") + "' %}"
+    (tmp_path / "outer.j2").write_text("{{ greeting }} " + include, encoding="utf-8")
+    config = {"greeting": "Hello", "recipient": "the world"}
+    template = J2Template(config, template_path=str(tmp_path / "outer.j2"))
+    assert template.render_template() == "Hello the world"
@@ -1,7 +1,8 @@
-# pylint: disable=missing-function-docstring,redefined-outer-name
+# pylint: disable=missing-function-docstring,protected-access,redefined-outer-name
 """
 Tests for uwtools.utils.file_helpers module.
 """
+import threading
 from datetime import datetime as dt
 from unittest.mock import patch
 
@@ -22,6 +23,75 @@ def assets(tmp_path):
     return now, renamed, rundir
 
 
+@fixture(autouse=True)
+def deletions():
+    yield
+    assert file_helpers.wait_for_deletions() == []
+
+
+def test__delete(tmp_path):
+    (tmp_path / "a" / "b").mkdir(parents=True)
+    assert file_helpers._delete(str(tmp_path / "a"))
+    assert not (tmp_path / "a").exists()
+    assert file_helpers._delete(str(tmp_path / "a"))
+
+
+def test__delete_failure(tmp_path):
+    (tmp_path / "a").mkdir()
+    with patch.object(file_helpers.os, "rmdir", side_effect=PermissionError):
+        assert not file_helpers._delete(str(tmp_path / "a"))
+    assert (tmp_path / "a").is_dir()
+
+
+def test_handle_existing_delete_async_failure(assets):
+    _, _, rundir = assets
+    with patch.object(file_helpers.os, "rename", side_effect=PermissionError):
+        with raises(RuntimeError) as e:
+            file_helpers.handle_existing(run_directory=rundir, exist_act="delete_async")
+        assert "Could not delete directory" in str(e.value)
+    assert rundir.is_dir()
+
+
+def test_handle_existing_delete_async_success(assets):
+    _, _, rundir = assets
+    (rundir / "a" / "b").mkdir(parents=True)
+    (rundir / "a" / "b" / "c").touch()
+    release = threading.Event()
+    delete = file_helpers._delete
+    with patch.object(file_helpers, "_delete", side_effect=lambda t: release.wait() and delete(t)):
+        file_helpers.handle_existing(run_directory=rundir, exist_act="delete_async")
+        assert not rundir.exists()
+        rundir.mkdir()
+        (tombstone,) = rundir.parent.glob(".rundir.deleting-*")
+        assert file_helpers.wait_for_deletions(timeout=0) == [str(tombstone)]
+        release.set()
+        assert file_helpers.wait_for_deletions() == []
+    assert [p.name for p in rundir.parent.iterdir()] == ["rundir"]
+
+
+def test_wait_for_deletions_failure(assets):
+    _, _, rundir = assets
+    with patch.object(file_helpers, "_delete", return_value=False):
+        file_helpers.handle_existing(run_directory=rundir, exist_act="delete_async")
+        (tombstone,) = rundir.parent.glob(".rundir.deleting-*")
+        assert file_helpers.wait_for_deletions() == [str(tombstone)]
+    file_helpers.reap_tombstones(rundir)
+
+
+def test_reap_tombstones(tmp_path):
+    rundir = tmp_path / "rundir"
+    for name in (".rundir.deleting-1", ".rundir.deleting-2", ".other.deleting-1", "rundir"):
+        (tmp_path / name).mkdir()
+    release = threading.Event()
+    with patch.object(file_helpers, "_delete", side_effect=lambda _: release.wait()) as delete:
+        assert file_helpers.reap_tombstones(rundir) == 2
+        assert file_helpers.reap_tombstones(rundir) == 0
+        release.set()
+        assert file_helpers.wait_for_deletions() == []
+    deleted = sorted(call.args[0] for call in delete.call_args_list)
+    assert deleted == [str(tmp_path / ".rundir.deleting-1"), str(tmp_path / ".rundir.deleting-2")]
+
+
 @pytest.mark.parametrize("exc", [FileExistsError, RuntimeError])
 def test_handle_existing_delete_failure(exc, assets):
     _, _, rundir = assets
@@ -0,0 +1,65 @@
+# pylint: disable=missing-function-docstring
+"""
+Tests for uwtools.utils.imports module.
+"""
+
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+from pytest import raises
+
+from uwtools.utils import imports
+
+
+def test_lazy_import(tmp_path):
+    (tmp_path / "lazypkg").mkdir()
+    (tmp_path / "lazypkg" / "__init__.py").write_text("import sys\nsys.lazy_pkg_ran = True\n")
+    (tmp_path / "lazypkg" / "mod.py").write_text("import sys\nsys.lazy_ran = True\nx = 88\n")
+    with patch.object(sys, "path", [str(tmp_path), *sys.path]):
+        with patch.dict(sys.modules):
+            module = imports.lazy_import("lazypkg.mod")
+            assert not hasattr(sys, "lazy_pkg_ran")
+            assert not hasattr(sys, "lazy_ran")
+            assert module.x == 88
+            assert getattr(sys, "lazy_ran")
+            assert sys.modules["lazypkg"].mod is module
+            assert getattr(sys, "lazy_pkg_ran")
+            assert imports.lazy_import("lazypkg.mod") is module
+    del sys.lazy_ran  # type: ignore # pylint: disable=no-member
+    del sys.lazy_pkg_ran  # type: ignore # pylint: disable=no-member
+
+
+def test_lazy_import_missing():
+    with raises(ModuleNotFoundError):
+        imports.lazy_import("no_such_module")
+
+
+def test_lazy_import_missing_submodule():
+    with patch.dict(sys.modules):
+        with raises(ModuleNotFoundError):
+            imports.lazy_import("uwtools.no_such_module")
+        with raises(ModuleNotFoundError):
+            imports.lazy_import("uwtools.logger.no_such_module")
+
+
+@pytest.mark.parametrize(
+    "cli",
+    [
+        "atparse_to_jinja2",
+        "experiment_manager",
+        "run_forecast",
+        "set_config",
+        "store_gc",
+        "templater",
+        "validate_config",
+    ],
+)
+def test_cli_imports_are_lazy(cli):
+    heavy = ["boto3", "botocore", "f90nml", "jinja2", "jsonschema", "yaml"]
+    code = f"import sys, uwtools.cli.{cli}; print(*[m for m in {heavy} if m in sys.modules])"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    )
+    assert result.stdout.strip() == ""
@@ -5,12 +5,60 @@ Helpers for working with files and directories.
 import logging
 import os
 import shutil
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from datetime import datetime as dt
+from typing import Dict, List, Optional
+
+DELETE_WORKERS = 4
+TOMBSTONE = ".deleting-"
+
+_deleter: Optional[ThreadPoolExecutor] = None
+_deleter_lock = threading.Lock()
+_pending: Dict[str, Future] = {}
+
+
+def _delete(tombstone: str) -> bool:
+    """
+    Delete a tombstone, returning whether it was deleted.
+
+    A tombstone already deleted, e.g. by another process reaping the same directory, counts as
+    deleted.
+
+    :param tombstone: The renamed directory.
+    """
+
+    def onerror(_func, _path, exc_info):
+        if not issubclass(exc_info[0], FileNotFoundError):
+            raise exc_info[1]
+
+    try:
+        shutil.rmtree(tombstone, onerror=onerror)
+    except OSError as e:
+        logging.warning("Could not delete directory %s: %s", tombstone, e)
+        return False
+    logging.debug("Deleted directory %s", tombstone)
+    return True
+
+
+def _tombstone(run_directory: str) -> str:
+    """
+    A new tombstone name for a run directory, hidden alongside it and so on the same filesystem.
+
+    :param run_directory: The run directory.
+    """
+    parent, name = os.path.split(os.path.abspath(run_directory))
+    return os.path.join(parent, f".{name}{TOMBSTONE}{uuid.uuid4().hex}")
 
 
 def handle_existing(run_directory: str, exist_act: str) -> None:
     """
     Given a run directory, and an action to do if directory exists, delete or rename directory.
+
+    With the delete_async action, the directory is renamed to a tombstone and deleted in the
+    background, so that a new run directory can be created immediately (see reap_tombstones() and
+    wait_for_deletions()).
     """
 
     # Try to delete existing run directory if option is delete.
@@ -23,6 +71,18 @@ def handle_existing(run_directory: str, exist_act: str) -> None:
         logging.critical(msg)
         raise RuntimeError(msg) from e
 
+    # Try to rename existing run directory to a tombstone, to be deleted in the background, if
+    # option is delete_async.
+
+    try:
+        if exist_act == "delete_async" and os.path.isdir(run_directory):
+            os.rename(run_directory, _tombstone(run_directory))
+            reap_tombstones(run_directory)
+    except OSError as e:
+        msg = f"Could not delete directory {run_directory}"
+        logging.critical(msg)
+        raise RuntimeError(msg) from e
+
     # Try to rename existing run directory if option is rename.
 
     try:
@@ -34,3 +94,49 @@ def handle_existing(run_directory: str, exist_act: str) -> None:
         msg = f"Could not rename directory {run_directory}"
         logging.critical(msg)
         raise RuntimeError(msg) from e
+
+
+def reap_tombstones(run_directory: str) -> int:
+    """
+    Start deleting, in the background, the tombstones of a run directory, returning the number of
+    deletions started.
+
+    Tombstones left by earlier processes, e.g. ones that exited before finishing, are deleted too.
+    Pending deletions are finished before the interpreter exits.
+
+    :param run_directory: The run directory whose old copies should be deleted.
+    """
+    global _deleter  # pylint: disable=global-statement
+    parent, name = os.path.split(os.path.abspath(run_directory))
+    prefix = f".{name}{TOMBSTONE}"
+    started = 0
+    with _deleter_lock:
+        if _deleter is None:
+            _deleter = ThreadPoolExecutor(max_workers=DELETE_WORKERS)
+        with os.scandir(parent) as entries:
+            for entry in entries:
+                if entry.name.startswith(prefix) and entry.path not in _pending:
+                    _pending[entry.path] = _deleter.submit(_delete, entry.path)
+                    started += 1
+    return started
+
+
+def wait_for_deletions(timeout: Optional[float] = None) -> List[str]:
+    """
+    Wait for background deletions, returning the tombstones not deleted: those still being deleted
+    at the timeout, or whose deletion failed.
+
+    :param timeout: Seconds to wait, or None to wait until all deletions are finished.
+    """
+    with _deleter_lock:
+        pending = dict(_pending)
+    wait(pending.values(), timeout=timeout)
+    remaining = []
+    with _deleter_lock:
+        for tombstone, future in pending.items():
+            if future.done():
+                del _pending[tombstone]
+                if future.result():
+                    continue
+            remaining.append(tombstone)
+    return sorted(remaining)
@@ -0,0 +1,66 @@
+"""
+Support for deferring the cost of importing modules until they are used.
+"""
+
+import importlib.util
+import sys
+from importlib.machinery import ModuleSpec
+from types import ModuleType
+from typing import Dict, Optional
+
+# The specs of lazily imported modules, which cannot be read from the modules themselves without
+# executing them.
+_specs: Dict[str, ModuleSpec] = {}
+
+
+def _find_spec(name: str, parent: str) -> Optional[ModuleSpec]:
+    """
+    The spec of a module, found without executing its parent package.
+
+    :param name: The fully qualified name of the module.
+    :param parent: The fully qualified name of its parent package, already in sys.modules.
+    """
+    spec = _specs.get(parent) or sys.modules[parent].__spec__
+    path = spec.submodule_search_locations if spec else None
+    if path is None:
+        return None
+    for finder in sys.meta_path:
+        found = finder.find_spec(name, path)  # type: ignore
+        if found is not None:
+            return found
+    return None
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    A module that is only executed when one of its attributes is first accessed.
+
+    Importing a module whose code path is not used, e.g. a file-format or storage-backend library,
+    can dominate the startup time of a CLI tool, especially when site-packages is on a slow shared
+    filesystem. A module that has already been imported is returned as-is. The parent packages of a
+    module not yet imported are themselves imported lazily. Before Python 3.12, a module's first
+    attribute access is not thread-safe, so a module first used from several threads at once must
+    be imported eagerly.
+
+    :param name: The fully qualified name of the module.
+    :raises: ModuleNotFoundError if the module cannot be found.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    parent, _, child = name.rpartition(".")
+    if parent:
+        lazy_import(parent)
+        spec = _find_spec(name, parent)
+    else:
+        spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    _specs[name] = spec
+    loader.exec_module(module)
+    if parent:
+        setattr(sys.modules[parent], child, module)
+    return module